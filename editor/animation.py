@@ -0,0 +1,96 @@
+import math
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+from moviepy.editor import VideoClip
+from moviepy.video.fx.resize import resizer
+
+
+def pop_scale(grow_factor: float, duration: float) -> Callable[[float], float]:
+    """
+    Triangle-shaped scale curve: 1 -> grow_factor at duration / 2 -> 1 at duration.
+    """
+    half = duration / 2
+    return lambda t: 1 + (grow_factor - 1) * max(0, min(1, 1 - abs(t - half) / half))
+
+
+class KeyframeAnimation:
+    """
+    Scale animation of a static RGBA image, rasterized once per clip.
+
+    Only the frames that fall inside `animation_duration` are resampled, at the
+    exact clip times the writer will ask for (`start` is used to align to the
+    output frame grid). Every later frame is served from the untouched image,
+    so per-frame work after the animation is a list lookup.
+    """
+
+    def __init__(
+        self,
+        rgba: np.ndarray,
+        scale: Callable[[float], float],
+        animation_duration: float,
+        start: float,
+        fps: float,
+    ):
+        self.fps = fps
+        # Clip time of the first output frame the clip is visible on
+        self.phase = (math.ceil(start * fps - 1e-9) - start * fps) / fps
+
+        rgb = np.ascontiguousarray(rgba[:, :, :3])
+        alpha = rgba[:, :, 3]
+        height, width = rgb.shape[:2]
+
+        steps: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray]] = {}
+        self.frames: List[np.ndarray] = []
+        self.masks: List[np.ndarray] = []
+        n_frames = max(0, math.ceil((animation_duration - self.phase) * fps))
+        for idx in range(n_frames):
+            factor = scale(self.phase + idx / fps)
+            size = (int(factor * width), int(factor * height))
+            if size not in steps:
+                if size == (width, height):
+                    steps[size] = (rgb, alpha / 255.0)
+                else:
+                    steps[size] = (
+                        resizer(rgb, size),
+                        resizer(alpha, size) / 255.0,
+                    )
+            frame, mask = steps[size]
+            self.frames.append(frame)
+            self.masks.append(mask)
+
+        self.final_frame = rgb
+        self.final_mask = alpha / 255.0
+
+    def _index(self, t: float) -> int:
+        return int(round((t - self.phase) * self.fps))
+
+    def get_frame(self, t: float) -> np.ndarray:
+        idx = self._index(t)
+        if 0 <= idx < len(self.frames):
+            return self.frames[idx]
+        return self.final_frame
+
+    def get_mask(self, t: float) -> np.ndarray:
+        idx = self._index(t)
+        if 0 <= idx < len(self.masks):
+            return self.masks[idx]
+        return self.final_mask
+
+    def to_clip(self, duration: float) -> VideoClip:
+        mask = VideoClip(self.get_mask, ismask=True, duration=duration)
+        return VideoClip(self.get_frame, duration=duration).set_mask(mask)
+
+
+def animated_clip(
+    rgba: np.ndarray,
+    grow_factor: float,
+    animation_duration: float,
+    start: float,
+    duration: float,
+    fps: float,
+) -> VideoClip:
+    animation = KeyframeAnimation(
+        rgba, pop_scale(grow_factor, animation_duration), animation_duration, start, fps
+    )
+    return animation.to_clip(duration).set_start(start)
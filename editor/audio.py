@@ -0,0 +1,209 @@
+import os
+import subprocess as sp
+from typing import Optional, Tuple
+
+import numpy as np
+from moviepy.config import get_setting
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+from transcription.models import Subtitles
+from utils.audio import (
+    AUDIO_FPS,
+    MIN_SPEECH_BITRATE,
+    MP3_BITRATES,
+    SPEECH_BITRATE,
+    SPEECH_SAMPLE_RATE,
+    decode_pcm,
+)
+from utils.utils import TRANSCRIPTION_SIZE_LIMIT
+
+BLEEP_PATH = "assets/sounds/bleep.mp3"
+BACKGROUND_GAIN = 0.3
+BLEEP_GAIN = 0.3
+# Speech level under a bleep and the ramp into / out of it
+DUCK_GAIN = 0.1
+DUCK_RAMP = 0.01  # seconds
+TRANSCRIPTION_SIZE_MARGIN = 0.95
+
+
+def fit_length(samples: np.ndarray, n_samples: int) -> np.ndarray:
+    if len(samples) >= n_samples:
+        return samples[:n_samples]
+    padding = np.zeros(
+        (n_samples - len(samples), samples.shape[1]), dtype=samples.dtype
+    )
+    return np.concatenate([samples, padding])
+
+
+def get_censored_mask(
+    subtitles: Subtitles, start: float, n_samples: int, fps: int = AUDIO_FPS
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per sample: whether it lies in a censored subtitle, and how many samples
+    into its (merged) censored interval it is.
+    """
+    intervals = np.array(
+        [(sub.start, sub.end) for sub in subtitles.subtitles if sub.censored],
+        dtype=np.float64,
+    ).reshape(-1, 2)
+    bounds = np.clip(np.round((intervals - start) * fps).astype(np.int64), 0, n_samples)
+    bounds = bounds[bounds[:, 1] > bounds[:, 0]]
+
+    edges = np.zeros(n_samples + 1, dtype=np.int32)
+    np.add.at(edges, bounds[:, 0], 1)
+    np.add.at(edges, bounds[:, 1], -1)
+    mask = np.cumsum(edges[:-1]) > 0
+
+    # Start of the censored run each sample belongs to
+    indices = np.arange(n_samples)
+    run_starts = np.flatnonzero(mask & ~np.concatenate([[False], mask[:-1]]))
+    if not len(run_starts):
+        return mask, np.zeros(n_samples, dtype=np.int64)
+    run_of_sample = np.searchsorted(run_starts, indices, side="right") - 1
+    offsets = np.where(mask, indices - run_starts[np.maximum(run_of_sample, 0)], 0)
+    return mask, offsets
+
+
+def mix_audio(
+    main_video_path: str,
+    background_path: str,
+    background_start: float,
+    subtitles: Subtitles,
+    start: float = 0.0,
+    duration: Optional[float] = None,
+    fps: int = AUDIO_FPS,
+    bleep_path: str = BLEEP_PATH,
+) -> np.ndarray:
+    """
+    The finished soundtrack of a short from `start` for `duration` seconds:
+    main audio plus the background at BACKGROUND_GAIN, with a bleep over
+    every censored subtitle and the speech ducked under it. Returns float32
+    (samples, 2).
+    """
+    main_infos = ffmpeg_parse_infos(main_video_path)
+    if duration is None:
+        duration = main_infos["duration"] - start
+    n_samples = int(round(duration * fps))
+
+    track = fit_length(decode_pcm(main_video_path, start, duration, fps), n_samples)
+
+    background_duration = ffmpeg_parse_infos(background_path)["duration"]
+    if background_duration > main_infos["duration"]:
+        # Trimmed to the main video and turned down, as append_additional_video
+        background = (
+            decode_pcm(background_path, background_start + start, duration, fps)
+            * BACKGROUND_GAIN
+        )
+    else:
+        background = decode_pcm(background_path, start, duration, fps)
+    background = fit_length(background, n_samples)
+
+    mask, offsets = get_censored_mask(subtitles, start, n_samples, fps)
+    if mask.any():
+        if os.path.exists(bleep_path):
+            bleep = decode_pcm(bleep_path, fps=fps)
+            if not len(bleep):
+                raise ValueError(f"Bleep sound at {bleep_path} decodes to no samples")
+            # Each censored interval restarts the bleep, looping if it is longer
+            bleep_track = bleep[offsets % len(bleep)] * (mask[:, None] * BLEEP_GAIN)
+        else:
+            print(
+                f"EDITOR >> Bleep sound not found at {bleep_path}, censored "
+                "speech is only ducked"
+            )
+            bleep_track = 0.0
+
+        ramp = max(1, int(DUCK_RAMP * fps))
+        window = np.ones(2 * ramp + 1, dtype=np.float32) / (2 * ramp + 1)
+        duck = np.convolve(mask.astype(np.float32), window, mode="same")
+        track = track * (1.0 - (1.0 - DUCK_GAIN) * duck)[:, None] + bleep_track
+
+    track = track + background
+    return np.clip(track, -1.0, 1.0).astype(np.float32)
+
+
+def to_pcm16(track: np.ndarray) -> np.ndarray:
+    return (track * 32767).astype(np.int16)
+
+
+def write_track(track: np.ndarray, output_path: str, fps: int = AUDIO_FPS) -> None:
+    """
+    Encode a mixed track (AAC for .m4a / .aac, PCM for .wav).
+    """
+    codec = "pcm_s16le" if output_path.endswith(".wav") else "aac"
+    cmd = [
+        get_setting("FFMPEG_BINARY"),
+        "-y",
+        "-loglevel",
+        "error",
+        "-f",
+        "s16le",
+        "-ar",
+        str(fps),
+        "-ac",
+        str(track.shape[1]),
+        "-i",
+        "pipe:0",
+        "-c:a",
+        codec,
+        output_path,
+    ]
+    process = sp.run(cmd, input=to_pcm16(track).tobytes(), stderr=sp.PIPE)
+    if process.returncode != 0:
+        error = process.stderr.decode(errors="replace")
+        raise IOError(f"ffmpeg failed writing {output_path}:\n{error.strip()}")
+
+
+def get_speech_bitrate(duration: float) -> int:
+    """
+    Highest bitrate (kbps, up to SPEECH_BITRATE) that keeps `duration`
+    seconds under the transcription upload limit.
+    """
+    budget = TRANSCRIPTION_SIZE_LIMIT * TRANSCRIPTION_SIZE_MARGIN * 8 / 1000
+    fitting = budget / max(duration, 1e-3)
+    # CBR MP3 at 16 kHz only has these rates, the encoder would round others
+    allowed = [rate for rate in MP3_BITRATES if rate <= min(SPEECH_BITRATE, fitting)]
+    return allowed[-1] if allowed else MIN_SPEECH_BITRATE
+
+
+def extract_speech_audio(video_path: str, audio_path: str) -> None:
+    """
+    Write the audio track of `video_path` as a small mono 16 kHz MP3 for
+    speech recognition. Only the audio stream is decoded. The render mixes
+    from the source video itself, so no quality is lost there.
+    """
+    infos = ffmpeg_parse_infos(video_path)
+    if not infos.get("audio_found"):
+        raise ValueError(f"No audio stream in {video_path}")
+    bitrate = get_speech_bitrate(infos["duration"])
+    tmp_path = f"{os.path.splitext(audio_path)[0]}.tmp{os.path.splitext(audio_path)[1]}"
+    cmd = [
+        get_setting("FFMPEG_BINARY"),
+        "-y",
+        "-loglevel",
+        "error",
+        "-i",
+        video_path,
+        "-map",
+        "0:a:0",
+        "-vn",
+        "-ac",
+        "1",
+        "-ar",
+        str(SPEECH_SAMPLE_RATE),
+        "-b:a",
+        f"{bitrate}k",
+        tmp_path,
+    ]
+    process = sp.run(cmd, stderr=sp.PIPE)
+    if process.returncode != 0:
+        error = process.stderr.decode(errors="replace")
+        raise IOError(f"ffmpeg failed writing {audio_path}:\n{error.strip()}")
+    os.replace(tmp_path, audio_path)
+
+    size = os.path.getsize(audio_path)
+    if size > TRANSCRIPTION_SIZE_LIMIT:
+        print(
+            f"EDITOR >> Warning: {audio_path} is {size / 1e6:.1f} MB, over the "
+            f"{TRANSCRIPTION_SIZE_LIMIT / 1e6:.0f} MB transcription limit"
+        )
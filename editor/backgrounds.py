@@ -0,0 +1,146 @@
+import bisect
+import os
+import subprocess as sp
+from typing import List
+
+from moviepy.config import get_setting
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+from pydantic import BaseModel
+
+from editor.recut import get_keyframes
+from utils.utils import CACHE_PATH
+
+PROXY_PATH = os.path.join(CACHE_PATH, "proxies")
+# Keyframe interval of the proxies: a seek decodes at most this much
+PROXY_GOP_DURATION = 0.5  # seconds
+PROXY_PRESET = "veryfast"
+PROXY_CRF = 18
+
+
+class BackgroundProxy(BaseModel):
+    source_path: str
+    source_size: int
+    source_mtime: float
+    path: str
+    width: int
+    fps: float
+    duration: float
+    keyframes: List[float]
+
+    def snap(self, t: float) -> float:
+        """
+        Latest keyframe at or before t: seeking there decodes no extra frames.
+        """
+        idx = bisect.bisect_right(self.keyframes, t + 1e-6)
+        return self.keyframes[idx - 1] if idx else 0.0
+
+
+class BackgroundLibrary:
+    """
+    Background footage transcoded once per (width, fps) into short-GOP proxies
+    that are already the size they are stacked at, each with a keyframe index
+    stored next to it as JSON.
+    """
+
+    def __init__(self, proxy_dir: str = PROXY_PATH):
+        self.proxy_dir = proxy_dir
+
+    def get_proxy_path(self, source_path: str, width: int, fps: float) -> str:
+        name = os.path.splitext(os.path.basename(source_path))[0]
+        return os.path.join(self.proxy_dir, f"{name}_{width}w_{fps:g}fps.mp4")
+
+    def get_index_path(self, proxy_path: str) -> str:
+        return f"{os.path.splitext(proxy_path)[0]}.json"
+
+    def load(self, source_path: str, width: int, fps: float) -> BackgroundProxy | None:
+        """
+        The proxy's index if it exists and was built from the current source.
+        """
+        proxy_path = self.get_proxy_path(source_path, width, fps)
+        index_path = self.get_index_path(proxy_path)
+        if not (os.path.exists(index_path) and os.path.exists(proxy_path)):
+            return None
+        with open(index_path, "r") as file:
+            proxy = BackgroundProxy.model_validate_json(file.read())
+        stat = os.stat(source_path)
+        if proxy.source_size != stat.st_size or proxy.source_mtime != stat.st_mtime:
+            return None
+        return proxy
+
+    def get(self, source_path: str, width: int, fps: float) -> BackgroundProxy:
+        if not os.path.exists(source_path):
+            raise FileNotFoundError(f"Background video not found at {source_path}")
+        proxy = self.load(source_path, width, fps)
+        if proxy is None:
+            proxy = self.build(source_path, width, fps)
+        return proxy
+
+    def build(
+        self,
+        source_path: str,
+        width: int,
+        fps: float,
+        preset: str = PROXY_PRESET,
+        crf: int = PROXY_CRF,
+    ) -> BackgroundProxy:
+        os.makedirs(self.proxy_dir, exist_ok=True)
+        proxy_path = self.get_proxy_path(source_path, width, fps)
+        tmp_path = f"{os.path.splitext(proxy_path)[0]}.tmp.mp4"
+        gop = max(1, round(PROXY_GOP_DURATION * fps))
+        stat = os.stat(source_path)
+        print(f"EDITOR >> Building background proxy {proxy_path}")
+
+        cmd = [
+            get_setting("FFMPEG_BINARY"),
+            "-y",
+            "-loglevel",
+            "error",
+            "-i",
+            source_path,
+            "-vf",
+            f"scale={width}:-2,fps={fps}",
+            "-c:v",
+            "libx264",
+            "-preset",
+            preset,
+            "-crf",
+            str(crf),
+            "-g",
+            str(gop),
+            "-keyint_min",
+            str(gop),
+            "-sc_threshold",
+            "0",
+            "-pix_fmt",
+            "yuv420p",
+            "-c:a",
+            "aac",
+            "-movflags",
+            "+faststart",
+            tmp_path,
+        ]
+        process = sp.run(cmd, stderr=sp.PIPE)
+        if process.returncode != 0:
+            error = process.stderr.decode(errors="replace")
+            raise IOError(f"ffmpeg failed writing {proxy_path}:\n{error.strip()}")
+        os.replace(tmp_path, proxy_path)
+
+        proxy = BackgroundProxy(
+            source_path=source_path,
+            source_size=stat.st_size,
+            source_mtime=stat.st_mtime,
+            path=proxy_path,
+            width=width,
+            fps=fps,
+            duration=ffmpeg_parse_infos(proxy_path)["duration"],
+            keyframes=get_keyframes(proxy_path),
+        )
+        index_path = self.get_index_path(proxy_path)
+        with open(f"{index_path}.tmp", "w") as file:
+            file.write(proxy.model_dump_json(indent=2))
+        os.replace(f"{index_path}.tmp", index_path)
+        print(
+            f"EDITOR >> Proxy {proxy_path}: {proxy.duration:.1f}s, "
+            f"{len(proxy.keyframes)} keyframes"
+        )
+        return proxy
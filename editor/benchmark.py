@@ -0,0 +1,47 @@
+import time
+from typing import Dict, Iterable
+
+from editor.main import build, generate_audio
+from transcription.main import Transcription
+from utils.utils import Path
+
+
+def benchmark(
+    raw_name: str,
+    lower_video_name: str,
+    renderers: Iterable[str] = ("moviepy", "ffmpeg"),
+    preset: str = "medium",
+) -> Dict[str, float]:
+    """
+    Time build() end to end for each renderer on the same source. Audio and
+    subtitles are prepared first so only rendering is measured.
+    """
+    warmup_path = Path(raw_name=raw_name, lower_video_name=lower_video_name)
+    generate_audio(warmup_path.main_video_path, warmup_path.subtitle_audio_path)
+    Transcription().get_subtitles(
+        full_audio_file_path=warmup_path.subtitle_audio_path,
+        save_path=warmup_path.subtitle_json_path,
+    )
+
+    results = {}
+    for renderer in renderers:
+        path = Path(
+            raw_name=raw_name,
+            lower_video_name=lower_video_name,
+            output_name=f"benchmark_{renderer}",
+        )
+        started = time.time()
+        build(resize_video=False, path=path, renderer=renderer, preset=preset)
+        results[renderer] = time.time() - started
+
+    baseline = results.get("moviepy")
+    for renderer, elapsed in results.items():
+        speedup = f" ({baseline / elapsed:.1f}x)" if baseline else ""
+        print(f"BENCHMARK >> {renderer:<8} {elapsed:8.1f}s{speedup}")
+    return results
+
+
+if __name__ == "__main__":
+    benchmark(
+        raw_name="Joe_Rogan_Is_Steven_Seagal_Legit_", lower_video_name="parkour_big"
+    )
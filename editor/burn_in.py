@@ -0,0 +1,294 @@
+import os
+import subprocess as sp
+import tempfile
+from collections import defaultdict
+from typing import List, Optional, Tuple
+
+from moviepy.config import get_setting
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+from PIL import ImageColor
+
+from transcription.models import Subtitles
+from editor.text_render import FONTS_PATH
+
+# ImageMagick font names -> font family names libass can resolve
+FONT_FAMILIES = {
+    "JetBrainsMono-NF-ExtraBold": "JetBrainsMono NF ExtraBold",
+}
+
+# Pop animation, mirrors create_subtitle_clip
+ANIMATION_DURATION = 0.25
+GROW_FACTOR = 1.13
+BOX_PADDING = 10
+
+ASS_STYLE_FIELDS = [
+    "Name", "Fontname", "Fontsize", "PrimaryColour", "SecondaryColour",
+    "OutlineColour", "BackColour", "Bold", "Italic", "Underline", "StrikeOut",
+    "ScaleX", "ScaleY", "Spacing", "Angle", "BorderStyle", "Outline", "Shadow",
+    "Alignment", "MarginL", "MarginR", "MarginV", "Encoding",
+]  # fmt: skip
+# Opaque box (BorderStyle 3) centred (Alignment 5), in ASS_STYLE_FIELDS order
+ASS_STYLE = [
+    "Default", "{font}", "{fontsize}", "{color}", "{color}", "{box_color}",
+    "{box_color}", "1", "0", "0", "0", "100", "100", "0", "0", "3", "{padding}",
+    "0", "5", "0", "0", "0", "1",
+]  # fmt: skip
+ASS_EVENT_FIELDS = [
+    "Layer", "Start", "End", "Style", "Name", "MarginL", "MarginR", "MarginV",
+    "Effect", "Text",
+]  # fmt: skip
+
+ASS_HEADER = f"""[Script Info]
+ScriptType: v4.00+
+PlayResX: {{width}}
+PlayResY: {{height}}
+WrapStyle: 2
+ScaledBorderAndShadow: yes
+
+[V4+ Styles]
+Format: {", ".join(ASS_STYLE_FIELDS)}
+Style: {",".join(ASS_STYLE)}
+
+[Events]
+Format: {", ".join(ASS_EVENT_FIELDS)}
+"""
+
+# (emoji png path, start, end)
+EmojiOverlay = Tuple[str, float, float]
+
+
+def ass_color(color: str) -> str:
+    red, green, blue = ImageColor.getrgb(color)[:3]
+    return f"&H00{blue:02X}{green:02X}{red:02X}"
+
+
+def ass_time(seconds: float) -> str:
+    centiseconds = int(round(max(seconds, 0) * 100))
+    hours, centiseconds = divmod(centiseconds, 360000)
+    minutes, centiseconds = divmod(centiseconds, 6000)
+    secs, centiseconds = divmod(centiseconds, 100)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
+
+
+def ass_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("{", "\\{").replace("}", "\\}")
+
+
+def filter_escape(path: str) -> str:
+    return path.replace("\\", "/").replace(":", "\\:").replace("'", "\\'")
+
+
+def subtitles_to_ass(
+    subtitles: Subtitles, ass_path: str, size, style: dict, offset: float = 0.0
+) -> str:
+    """
+    Write subtitles as an ASS script approximating `style` (an editor text style
+    such as black_jetbrainsMono_gold): opaque box captions centred on the frame
+    with the same pop animation as the moviepy renderer. Times are shifted
+    back by `offset` seconds.
+    """
+    header = ASS_HEADER.format(
+        width=size[0],
+        height=size[1],
+        font=FONT_FAMILIES.get(style["font"], style["font"]),
+        fontsize=style["fontsize"],
+        color=ass_color(style.get("color", "black")),
+        box_color=ass_color(style.get("bg_color", "gold")),
+        padding=BOX_PADDING,
+    )
+    half = int(ANIMATION_DURATION * 1000 / 2)
+    scale = int(round(GROW_FACTOR * 100))
+    grow = f"\\t(0,{half},\\fscx{scale}\\fscy{scale})"
+    shrink = f"\\t({half},{2 * half},\\fscx100\\fscy100)"
+    pop = f"{{{grow}{shrink}}}"
+
+    lines = []
+    for subtitle in subtitles.subtitles:
+        if subtitle.end <= offset:
+            continue
+        text = ass_escape(subtitle.word.upper())
+        start, end = subtitle.start - offset, subtitle.end - offset
+        lines.append(
+            f"Dialogue: 0,{ass_time(start)},{ass_time(end)},"
+            f"Default,,0,0,0,,{pop}{text}"
+        )
+
+    with open(ass_path, "w", encoding="utf-8") as file:
+        file.write(header)
+        file.write("\n".join(lines))
+        file.write("\n")
+    return ass_path
+
+
+def build_filtergraph(
+    main_size,
+    lower_size,
+    ass_path: str,
+    emoji_overlays: List[EmojiOverlay],
+    emoji_position,
+    fps: float,
+    lower_has_audio: bool,
+    lower_volume: float = 0.3,
+    video_filters: Optional[str] = None,
+    mix_audio: bool = True,
+) -> str:
+    """
+    Stack main over background like clips_array, burn the ASS captions and
+    overlay the emoji PNGs, each enabled only for its subtitle interval.
+    With mix_audio the graph also mixes both audio streams into [aout].
+    """
+    width = max(main_size[0], lower_size[0])
+    graph = [
+        f"[0:v]fps={fps},pad={width}:{main_size[1]}:(ow-iw)/2:0[top]",
+        f"[1:v]fps={fps},pad={width}:{lower_size[1]}:(ow-iw)/2:0[bottom]",
+        "[top][bottom]vstack=inputs=2[stack]",
+        f"[stack]subtitles=filename='{filter_escape(ass_path)}'"
+        f":fontsdir='{filter_escape(FONTS_PATH)}'[v0]",
+    ]
+
+    # One decoded source per distinct emoji, split to every place it is used
+    uses = defaultdict(list)
+    for idx, (emoji_path, _, _) in enumerate(emoji_overlays):
+        uses[emoji_path].append(idx)
+    for emoji_path, overlay_ids in uses.items():
+        outputs = "".join(f"[e{idx}]" for idx in overlay_ids)
+        graph.append(
+            f"movie='{filter_escape(emoji_path)}':f=image2,format=rgba,"
+            f"split={len(overlay_ids)}{outputs}"
+        )
+
+    x, y = emoji_position
+    last = "v0"
+    for idx, (_, start, end) in enumerate(emoji_overlays):
+        graph.append(
+            f"[{last}][e{idx}]overlay=x={x}:y={y}:eof_action=repeat"
+            f":enable='between(t,{start:.3f},{end:.3f})'[v{idx + 1}]"
+        )
+        last = f"v{idx + 1}"
+
+    if video_filters:
+        graph.append(f"[{last}]{video_filters}[vout]")
+    else:
+        graph.append(f"[{last}]null[vout]")
+
+    if mix_audio:
+        if lower_has_audio:
+            graph.append(f"[1:a]volume={lower_volume}[bga]")
+            graph.append("[0:a][bga]amix=inputs=2:duration=first:normalize=0[aout]")
+        else:
+            graph.append("[0:a]anull[aout]")
+    return ";\n".join(graph)
+
+
+def render_burn_in(
+    main_video_path: str,
+    lower_video_path: str,
+    subtitles: Subtitles,
+    emoji_overlays: List[EmojiOverlay],
+    output_path: str,
+    style: dict,
+    background_start: float,
+    fps: float = 30,
+    preset: str = "medium",
+    crf: int = 23,
+    threads: Optional[int] = None,
+    duration: Optional[float] = None,
+    video_filters: Optional[str] = None,
+    start: float = 0.0,
+    audio_path: Optional[str] = None,
+) -> None:
+    """
+    Render a short in one native ffmpeg decode -> encode pass: no Python work
+    per frame. Output approximates the moviepy renderer (same layout, caption
+    style and pop animation; emoji are not animated). `start` skips the
+    first seconds of the short. `audio_path` is a finished soundtrack
+    (see editor/audio.py) used instead of mixing the inputs' audio.
+    """
+    main_infos = ffmpeg_parse_infos(main_video_path)
+    lower_infos = ffmpeg_parse_infos(lower_video_path)
+    main_size = main_infos["video_size"]
+    if duration is None:
+        duration = main_infos["duration"] - start
+
+    # The ASS script and filtergraph only live as long as the ffmpeg run
+    with tempfile.TemporaryDirectory(prefix="burn_in_") as work_dir:
+        ass_path = subtitles_to_ass(
+            subtitles,
+            os.path.join(work_dir, "captions.ass"),
+            (
+                max(main_size[0], lower_infos["video_size"][0]),
+                main_size[1] + lower_infos["video_size"][1],
+            ),
+            style,
+            offset=start,
+        )
+        emoji_overlays = [
+            (emoji_path, emoji_start - start, emoji_end - start)
+            for emoji_path, emoji_start, emoji_end in emoji_overlays
+        ]
+        emoji_position = (main_size[0] // 2 - 160 // 2, main_size[1] + 120)
+        graph = build_filtergraph(
+            main_size,
+            lower_infos["video_size"],
+            ass_path,
+            emoji_overlays,
+            emoji_position,
+            fps,
+            lower_has_audio=lower_infos["audio_found"],
+            video_filters=video_filters,
+            mix_audio=audio_path is None,
+        )
+        graph_path = os.path.join(work_dir, "graph.filtergraph")
+        with open(graph_path, "w", encoding="utf-8") as file:
+            file.write(graph)
+
+        cmd = [
+            get_setting("FFMPEG_BINARY"),
+            "-y",
+            "-loglevel",
+            "error",
+            "-ss",
+            f"{start:.3f}",
+            "-i",
+            main_video_path,
+            "-ss",
+            f"{background_start + start:.3f}",
+            "-i",
+            lower_video_path,
+        ]
+        if audio_path is not None:
+            cmd += ["-i", audio_path]
+        cmd += [
+            "-filter_complex_script",
+            graph_path,
+            "-map",
+            "[vout]",
+            "-map",
+            "2:a:0" if audio_path is not None else "[aout]",
+            "-t",
+            f"{duration:.3f}",
+            "-c:v",
+            "libx264",
+            "-preset",
+            preset,
+            "-crf",
+            str(crf),
+            "-pix_fmt",
+            "yuv420p",
+            "-c:a",
+            "aac",
+            "-movflags",
+            "+faststart",
+        ]
+        if threads is not None:
+            cmd += ["-threads", str(threads)]
+        cmd.append(output_path)
+
+        print(
+            f"EDITOR >> Burning in {len(subtitles.subtitles)} captions and "
+            f"{len(emoji_overlays)} emoji -> {output_path}"
+        )
+        process = sp.run(cmd, stderr=sp.PIPE)
+        if process.returncode != 0:
+            error = process.stderr.decode(errors="replace")
+            raise IOError(f"ffmpeg failed writing {output_path}:\n{error.strip()}")
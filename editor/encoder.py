@@ -0,0 +1,262 @@
+import os
+import subprocess as sp
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+from moviepy.config import get_setting
+from moviepy.editor import VideoClip
+
+from utils.audio import AUDIO_FPS
+
+AUDIO_CHUNK_DURATION = 1.0  # seconds
+PROGRESS_INTERVAL = 2.0  # seconds between progress lines
+
+
+class FFmpegPipeWriter:
+    """
+    Long-lived ffmpeg process fed raw RGB frames on stdin and raw s16le PCM on a
+    second inherited pipe, so video and audio are encoded and muxed in one run with
+    no temporary audio file.
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        size,
+        fps: float,
+        preset: str = "medium",
+        crf: int = 23,
+        threads: Optional[int] = None,
+        audio_nchannels: Optional[int] = None,
+        audio_fps: int = AUDIO_FPS,
+        audio_codec: str = "aac",
+        ffmpeg_params: Optional[List[str]] = None,
+    ):
+        self.output_path = output_path
+        self.width, self.height = size
+        self.buffer = np.empty((self.height, self.width, 3), dtype=np.uint8)
+
+        cmd = [
+            get_setting("FFMPEG_BINARY"),
+            "-y",
+            "-loglevel",
+            "error",
+            "-f",
+            "rawvideo",
+            "-vcodec",
+            "rawvideo",
+            "-s",
+            f"{self.width}x{self.height}",
+            "-pix_fmt",
+            "rgb24",
+            "-r",
+            f"{fps:.02f}",
+            "-i",
+            "pipe:0",
+        ]
+
+        pass_fds = ()
+        self.audio_fd = None
+        if audio_nchannels:
+            read_fd, self.audio_fd = os.pipe()
+            pass_fds = (read_fd,)
+            cmd += [
+                "-f",
+                "s16le",
+                "-ar",
+                str(audio_fps),
+                "-ac",
+                str(audio_nchannels),
+                "-i",
+                f"pipe:{read_fd}",
+                "-c:a",
+                audio_codec,
+            ]
+        else:
+            cmd += ["-an"]
+
+        cmd += ["-c:v", "libx264", "-preset", preset, "-crf", str(crf)]
+        if threads is not None:
+            cmd += ["-threads", str(threads)]
+        if ffmpeg_params:
+            cmd += ffmpeg_params
+        if self.width % 2 == 0 and self.height % 2 == 0:
+            cmd += ["-pix_fmt", "yuv420p"]
+        cmd += ["-movflags", "+faststart", output_path]
+
+        self.proc = sp.Popen(
+            cmd,
+            stdin=sp.PIPE,
+            stdout=sp.DEVNULL,
+            stderr=sp.PIPE,
+            pass_fds=pass_fds,
+        )
+        if pass_fds:
+            # ffmpeg holds its own copy of the read end
+            os.close(pass_fds[0])
+
+    def _error(self) -> IOError:
+        self.proc.wait()
+        error = self.proc.stderr.read().decode(errors="replace")
+        return IOError(f"ffmpeg failed writing {self.output_path}:\n{error.strip()}")
+
+    def write_frame(self, frame: np.ndarray) -> None:
+        # Frames coming out of blit_on may be float or views into clip memory;
+        # copy into the one reused buffer instead of allocating per frame
+        np.copyto(self.buffer, frame, casting="unsafe")
+        try:
+            self.proc.stdin.write(memoryview(self.buffer).cast("B"))
+        except BrokenPipeError:
+            raise self._error()
+
+    def write_audio(self, chunks) -> None:
+        try:
+            with os.fdopen(self.audio_fd, "wb") as pipe:
+                for chunk in chunks:
+                    pipe.write(np.ascontiguousarray(chunk, dtype=np.int16).tobytes())
+        except BrokenPipeError:
+            pass  # reported through the video pipe / return code
+
+    def abort(self) -> None:
+        self.proc.kill()
+        self.proc.wait()
+
+    def close(self) -> None:
+        self.proc.stdin.close()
+        if self.proc.wait() != 0:
+            raise self._error()
+        self.proc.stderr.close()
+
+
+def write_video(
+    clip: VideoClip,
+    output_path: str,
+    fps: float,
+    preset: str = "medium",
+    crf: int = 23,
+    threads: Optional[int] = None,
+    ffmpeg_params: Optional[List[str]] = None,
+    frame_range: Optional[Tuple[int, int]] = None,
+    with_audio: bool = True,
+    audio_track: Optional[np.ndarray] = None,
+) -> None:
+    """
+    Drop-in alternative to `clip.write_videofile(output_path, audio_codec="aac")`
+    that streams frames straight into ffmpeg and muxes the audio in the same run.
+
+    `frame_range` (first, last) writes only those frames of the full-length
+    frame grid (and the audio under them), for chunks and partial renders.
+
+    `audio_track` is a finished float (samples, channels) track at AUDIO_FPS
+    covering exactly the written frames; it replaces the clip's audio.
+    """
+    times = np.arange(0, clip.duration, 1.0 / fps)
+    if frame_range is not None:
+        first_frame, last_frame = frame_range
+        times = times[first_frame:last_frame]
+    n_frames = len(times)
+
+    audio = clip.audio if with_audio and audio_track is None else None
+    if audio is not None and frame_range is not None:
+        audio = audio.subclip(times[0], times[0] + n_frames / fps)
+    audio_nchannels = None
+    if audio_track is not None:
+        audio_nchannels = audio_track.shape[1]
+    elif audio is not None:
+        audio_nchannels = audio.nchannels
+    writer = FFmpegPipeWriter(
+        output_path,
+        clip.size,
+        fps,
+        preset=preset,
+        crf=crf,
+        threads=threads,
+        audio_nchannels=audio_nchannels,
+        ffmpeg_params=ffmpeg_params,
+    )
+
+    audio_thread = None
+    if audio_nchannels:
+        chunksize = int(AUDIO_CHUNK_DURATION * AUDIO_FPS)
+        if audio_track is not None:
+            chunks = (
+                (chunk * 32767).astype(np.int16)
+                for chunk in np.array_split(
+                    audio_track, range(chunksize, len(audio_track), chunksize)
+                )
+            )
+        else:
+            chunks = audio.iter_chunks(
+                chunksize=chunksize,
+                fps=AUDIO_FPS,
+                quantize=True,
+                nbytes=2,
+                logger=None,
+            )
+        audio_thread = threading.Thread(
+            target=writer.write_audio, args=(chunks,), daemon=True
+        )
+        audio_thread.start()
+
+    print(f"EDITOR >> Encoding {n_frames} frames -> {output_path}")
+    started = last_report = time.time()
+    try:
+        for idx, t in enumerate(times):
+            writer.write_frame(clip.get_frame(t))
+            now = time.time()
+            if now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                rate = (idx + 1) / (now - started)
+                print(f"EDITOR >> {idx + 1}/{n_frames} frames ({rate:.1f} frames/sec)")
+    except BaseException:
+        writer.abort()
+        raise
+    finally:
+        if audio_thread is not None:
+            audio_thread.join()
+    writer.close()
+
+    elapsed = time.time() - started
+    print(
+        f"EDITOR >> Encoded {n_frames} frames in {elapsed:.1f}s "
+        f"({n_frames / max(elapsed, 1e-9):.1f} frames/sec) -> {output_path}"
+    )
+
+
+def concat_chunks(
+    chunk_paths: List[str], output_path: str, audio_path: Optional[str] = None
+) -> None:
+    """
+    Join video chunks encoded with identical settings without re-encoding,
+    optionally muxing a separately rendered audio track.
+    """
+    list_path = f"{os.path.splitext(output_path)[0]}_chunks.txt"
+    with open(list_path, "w") as file:
+        for chunk_path in chunk_paths:
+            file.write(f"file '{os.path.abspath(chunk_path)}'\n")
+
+    cmd = [
+        get_setting("FFMPEG_BINARY"),
+        "-y",
+        "-loglevel",
+        "error",
+        "-f",
+        "concat",
+        "-safe",
+        "0",
+        "-i",
+        list_path,
+    ]
+    if audio_path is not None:
+        cmd += ["-i", audio_path, "-map", "0:v:0", "-map", "1:a:0"]
+    cmd += ["-c", "copy", "-movflags", "+faststart", output_path]
+    try:
+        process = sp.run(cmd, stderr=sp.PIPE)
+    finally:
+        os.remove(list_path)
+    if process.returncode != 0:
+        error = process.stderr.decode(errors="replace")
+        raise IOError(f"ffmpeg failed writing {output_path}:\n{error.strip()}")
+    print(f"EDITOR >> Joined {len(chunk_paths)} chunks -> {output_path}")
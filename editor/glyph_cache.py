@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Callable, Tuple
+
+import numpy as np
+
+from utils.utils import CACHE_PATH
+
+GLYPH_CACHE_PATH = os.path.join(CACHE_PATH, "glyphs")
+GLYPH_CACHE_MAX_ITEMS = 1024
+GLYPH_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+class GlyphCache:
+    """
+    Rendered subtitle bitmaps (RGBA uint8 arrays) keyed by text, style and padding.
+    Lookups go through an in-memory LRU first and fall back to `.npy` files on disk,
+    so repeated words and re-renders of the same video never reach the rasterizer.
+
+    The disk store is capped at `max_bytes`: file modification times track the
+    last use, and the least recently used files are evicted past the cap.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = GLYPH_CACHE_PATH,
+        max_items: int = GLYPH_CACHE_MAX_ITEMS,
+        max_bytes: int = GLYPH_CACHE_MAX_BYTES,
+    ):
+        self.cache_dir = cache_dir
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        # Size of the disk store as last seen, None until it is first scanned
+        self._disk_bytes: int | None = None
+        self._memory: OrderedDict[str, np.ndarray] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_key(
+        text: str, style: dict, padding: Tuple[int, int], renderer: str = ""
+    ) -> str:
+        payload = json.dumps(
+            {
+                "text": text,
+                "style": style,
+                "padding": list(padding),
+                "renderer": renderer,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def _remember(self, key: str, rgba: np.ndarray) -> None:
+        self._memory[key] = rgba
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> np.ndarray | None:
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        disk_path = self._disk_path(key)
+        if not os.path.exists(disk_path):
+            return None
+        try:
+            rgba = np.load(disk_path)
+            os.utime(disk_path)
+        except (OSError, ValueError):
+            # Half-written, corrupted or just evicted entry, render it again
+            return None
+        self._remember(key, rgba)
+        return rgba
+
+    def put(self, key: str, rgba: np.ndarray) -> None:
+        rgba = np.ascontiguousarray(rgba, dtype=np.uint8)
+        self._remember(key, rgba)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        disk_path = self._disk_path(key)
+        tmp_path = f"{disk_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            np.save(file, rgba)
+        os.replace(tmp_path, disk_path)
+        if self._disk_bytes is None:
+            self._evict()
+        else:
+            self._disk_bytes += os.path.getsize(disk_path)
+            if self._disk_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """
+        Rescan the disk store (other processes write to it too) and remove the
+        least recently used files until it fits in `max_bytes`.
+        """
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".npy"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+        if evicted:
+            print(f"EDITOR >> Evicted {evicted} glyph cache entries")
+        self._disk_bytes = total
+
+    def get_or_render(
+        self,
+        text: str,
+        style: dict,
+        padding: Tuple[int, int],
+        render: Callable[[str, dict, Tuple[int, int]], np.ndarray],
+        renderer: str = "",
+    ) -> np.ndarray:
+        key = self.get_key(text, style, padding, renderer)
+        rgba = self.get(key)
+        if rgba is not None:
+            self.hits += 1
+            return rgba
+        self.misses += 1
+        rgba = np.ascontiguousarray(render(text, style, padding), dtype=np.uint8)
+        self.put(key, rgba)
+        return rgba
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        hit_rate = self.hits / total if total else 0.0
+        return (
+            f"{self.hits}/{total} hits ({hit_rate:.0%}), {len(self._memory)} in memory"
+        )
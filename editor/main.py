@@ -4,24 +4,49 @@ from moviepy.editor import (
     TextClip,
     concatenate_videoclips,
     clips_array,
-    ImageClip,
-    vfx,
-    CompositeAudioClip,
-    AudioFileClip,
 )
+from moviepy.audio.AudioClip import AudioArrayClip
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
 from transcription.main import Transcription, SubtitleSegment
 import random
 import math
-from typing import List
+from typing import Tuple
 from PIL import Image, ImageFont
 import numpy as np
 from pilmoji import Pilmoji
-from utils.utils import Path
+from utils.utils import Path, EMOJI_ATLAS_PATH
+from utils.emoji_index import EmojiIndex, DEFAULT_EMOJI
+from utils.emoji_atlas import EmojiAtlas
+from editor.glyph_cache import GlyphCache
+from editor.text_render import render_text_pillow
+from editor.animation import animated_clip
+from editor.timeline import TimelineCompositor
+from editor.encoder import write_video, concat_chunks, AUDIO_FPS
+from editor.audio import mix_audio, write_track, extract_speech_audio
+from editor.burn_in import render_burn_in
+from editor.recut import recut_video
+from editor.readers import prefetch_clip, PREFETCH_FRAMES
+from editor.backgrounds import BackgroundLibrary, BackgroundProxy
+from editor.preview import (
+    PREVIEW_RESIZE_ALGORITHM,
+    RenderPlan,
+    RenderSettings,
+    get_plan_path,
+    load_plan,
+    save_plan,
+    scale_size,
+)
 import os
-import sys
-import time
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 
-SHORT_VIDEO = False 
+# "imagemagick" (moviepy TextClip) or "pillow" (in-process Pilmoji rasterizer)
+TEXT_BACKEND = "imagemagick"
+FPS = 30
+# "moviepy" (write_videofile) or "ffmpeg" (direct frame pipe, see editor/encoder.py)
+ENCODER = "moviepy"
+# "moviepy" (Python compositing) or "ffmpeg" (ASS + overlay filtergraph burn-in)
+RENDERER = "moviepy"
 
 black_jetbrainsMono_gold = {
     "font": "JetBrainsMono-NF-ExtraBold",
@@ -29,6 +54,32 @@ black_jetbrainsMono_gold = {
     "color": "black",
     "fontsize": 60
 }
+
+glyph_cache = GlyphCache()
+background_library = BackgroundLibrary()
+emoji_index = EmojiIndex()
+
+
+def load_emoji_atlas() -> EmojiAtlas | None:
+    """
+    The memory-mapped emoji atlas when it is built and matches the pack,
+    otherwise None and emoji PNGs are decoded one by one.
+    """
+    if not os.path.exists(EMOJI_ATLAS_PATH):
+        return None
+    atlas = EmojiAtlas(EMOJI_ATLAS_PATH)
+    if len(emoji_index) and atlas.get_fingerprint() != emoji_index.get_fingerprint():
+        print(
+            f"EDITOR >> Emoji atlas {EMOJI_ATLAS_PATH} is out of date with the pack, "
+            "rebuild it with `python -m utils.emoji_atlas`"
+        )
+        return None
+    return atlas
+
+
+emoji_atlas = load_emoji_atlas()
+
+
 def convert_channels(img, n_channels):
     """
     Convert an image to have the specified number of channels.
@@ -59,108 +110,213 @@ def check_channel_mismatch(img, n_channels):
         return True
     return False
 
-def handle_bleep_audio(video_clip, subtitle):
-    if subtitle.censored:
-        bleep_audio = AudioFileClip("assets/sounds/bleep.mp3").subclip(0, subtitle.end - subtitle.start).volumex(0.3)
-        video_audio = video_clip.audio
-        new_audio = CompositeAudioClip([video_audio, bleep_audio.set_start(subtitle.start)])
-        video_clip = video_clip.set_audio(new_audio)
-    return video_clip
-
 
+def render_text_imagemagick(text: str, style: dict, padding) -> np.ndarray:
+    """
+    Render text through ImageMagick into an RGBA array, padded on every side.
+    """
+    padding_x, padding_y = padding
+    txt_clip = TextClip(text, **style)
+    txt_width = txt_clip.size[0] + 2 * padding_x
+    txt_height = txt_clip.size[1] + 2 * padding_y
 
-def create_subtitle_clip(subtitle: SubtitleSegment, origin):
-    padding_x = 20  # Horizontal padding
-    padding_y = 10  # Vertical padding
+    txt_clip = TextClip(text, **style, size=(txt_width, txt_height))
+    rgb = convert_channels(txt_clip.get_frame(0), 3).astype(np.uint8)
+    if txt_clip.mask is not None:
+        alpha = (255 * txt_clip.mask.get_frame(0)).astype(np.uint8)
+    else:
+        alpha = np.full(rgb.shape[:2], 255, dtype=np.uint8)
+    return np.dstack([rgb, alpha])
 
-    if SHORT_VIDEO and subtitle.start > 10:
-        return [None, None]
 
-    txt_clip = TextClip(
-        subtitle.word.upper(),
-        **black_jetbrainsMono_gold,
-    )
+TEXT_RENDERERS = {
+    "imagemagick": render_text_imagemagick,
+    "pillow": render_text_pillow,
+}
 
-    txt_width = txt_clip.size[0] + 2 * padding_x
-    txt_height = txt_clip.size[1] + 2 * padding_y
 
-    txt_clip = (
-        TextClip(
-            subtitle.word.upper(),
-            **black_jetbrainsMono_gold,
-            size=(txt_width, txt_height),
-        )
-        .set_position("center")
-        .set_duration(subtitle.end - subtitle.start)
-        .set_start(subtitle.start)
-    )
+def get_emoji_path(subtitle: SubtitleSegment) -> str | None:
+    emoji = subtitle.emoji[0] if subtitle.emoji else DEFAULT_EMOJI
+    emoji_path = emoji_index.get_path(emoji)
+    if emoji_path is None:
+        print(f"  >>Emoji '{emoji}' not in the emoji pack.")
+    return emoji_path
 
-    try:
-        emoji = subtitle.emoji[0][0]
-    except IndexError:
-        emoji = "🤔"
-    character = emoji.encode('utf-16', 'surrogatepass').decode('utf-16')
-    unicode_code = f"{ord(character):04X}"
 
-    x = origin[0] - 160 // 2 
-    y = origin[1] + 120
-    position = (x, y)
-    emoji_path = f"assets/ios_emoji_pack/{unicode_code}.png"
-    print(f"Creating subtitle {position} clip for '{subtitle.word}' with emoji '{emoji} {unicode_code}'")
-    if not os.path.exists(emoji_path):
-        print(f"  >>Emoji not found at {emoji_path}.")
-        emoji_clip = None
+def get_emoji_rgba(subtitle: SubtitleSegment, scale: float = 1.0) -> np.ndarray | None:
+    if emoji_atlas is None:
+        emoji_path = get_emoji_path(subtitle)
+        if emoji_path is None:
+            return None
+        emoji_rgba = np.asarray(Image.open(emoji_path).convert("RGBA"))
     else:
-        emoji_clip = (
-            ImageClip(emoji_path, duration=subtitle.end - subtitle.start)
-            .set_start(subtitle.start)
-            .set_position(position)
-        )
+        emoji = subtitle.emoji[0] if subtitle.emoji else DEFAULT_EMOJI
+        emoji_rgba = emoji_atlas.get_frame(emoji)
+        if emoji_rgba is None:
+            print(f"  >>Emoji '{emoji}' not in the emoji pack.")
+            return None
+    if scale != 1.0:
+        height, width = emoji_rgba.shape[:2]
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        emoji_image = Image.fromarray(emoji_rgba).resize(size, Image.BILINEAR)
+        emoji_rgba = np.asarray(emoji_image)
+    return emoji_rgba
+
+
+def get_scaled_style(style: dict, scale: float) -> dict:
+    if scale == 1.0:
+        return style
+    return {**style, "fontsize": max(1, round(style["fontsize"] * scale))}
+
+
+def create_subtitle_clip(
+    subtitle: SubtitleSegment,
+    origin,
+    text_backend: str = TEXT_BACKEND,
+    fps: int = FPS,
+    scale: float = 1.0,
+):
+    """
+    Caption and emoji clips of a subtitle. `scale` shrinks fonts, padding,
+    emoji and offsets for a render whose inputs are scaled by it.
+    """
+    padding_x = round(20 * scale)  # Horizontal padding
+    padding_y = round(10 * scale)  # Vertical padding
+
+    rgba = glyph_cache.get_or_render(
+        subtitle.word.upper(),
+        get_scaled_style(black_jetbrainsMono_gold, scale),
+        (padding_x, padding_y),
+        TEXT_RENDERERS[text_backend],
+        renderer=text_backend,
+    )
 
     ANIMATION_DURATION = 0.25
     GROW_FACTOR = 1.13
     EMOJI_DURATION = 0.3
     EMOJI_GROW_FACTOR = 1.05
-    new_size_animation = lambda t: 1 + (GROW_FACTOR - 1) * max(0, min(1, 1 - abs(t - ANIMATION_DURATION / 2) / (ANIMATION_DURATION / 2)))
-    emoji_animation = lambda t: 1 + (EMOJI_GROW_FACTOR - 1) * max(0, min(1, 1 - abs(t - EMOJI_DURATION / 2) / (EMOJI_DURATION / 2)))
-    txt_clip = txt_clip.fx(vfx.resize, newsize=new_size_animation)
-    if emoji_clip:
-        emoji_clip = emoji_clip.fx(vfx.resize, lambda t: (emoji_animation(t) * emoji_clip.size[0], emoji_animation(t) * emoji_clip.size[1]))
+    duration = subtitle.end - subtitle.start
 
-    # Ensure all clips are RGB or RGBA
-    txt_clip = txt_clip.fl_image(lambda img: convert_channels(img, 3))
-    if emoji_clip:
-        # emoji_clip = emoji_clip.fl_image(lambda img: convert_channels(img, 3))
-        first_frame = emoji_clip.get_frame(0)  
-        if check_channel_mismatch(first_frame, 3):
-            emoji_clip = None
+    txt_clip = animated_clip(
+        rgba, GROW_FACTOR, ANIMATION_DURATION, subtitle.start, duration, fps
+    ).set_position("center")
 
-
-    
+    x = origin[0] - round(160 * scale) // 2
+    y = origin[1] + round(120 * scale)
+    position = (x, y)
+    print(f"Creating subtitle {position} clip for '{subtitle.word}'")
+    emoji_rgba = get_emoji_rgba(subtitle, scale)
+    if emoji_rgba is None:
+        emoji_clip = None
+    else:
+        emoji_clip = animated_clip(
+            emoji_rgba,
+            EMOJI_GROW_FACTOR,
+            EMOJI_DURATION,
+            subtitle.start,
+            duration,
+            fps,
+        ).set_position(position)
 
     # Use list to collect clips
     clips = [txt_clip, emoji_clip]
     return clips
 
 
+def write_clip(
+    clip,
+    output_path: str,
+    encoder: str = ENCODER,
+    fps: int = FPS,
+    preset: str = "medium",
+    crf: int | None = None,
+    threads: int | None = None,
+    video_filters: str | None = None,
+    frame_range=None,
+    audio_track: np.ndarray | None = None,
+):
+    """
+    `frame_range` (first, last) writes only those frames of the clip's frame
+    grid at `fps`, with the matching audio. `audio_track` (see editor/audio.py)
+    replaces the clip's audio and must cover exactly the written frames.
+    """
+    ffmpeg_params = ["-vf", video_filters] if video_filters else []
+    if encoder == "ffmpeg":
+        write_video(
+            clip,
+            output_path,
+            fps=fps,
+            preset=preset,
+            crf=23 if crf is None else crf,
+            threads=threads,
+            ffmpeg_params=ffmpeg_params,
+            frame_range=frame_range,
+            audio_track=audio_track,
+        )
+    elif encoder == "moviepy":
+        if frame_range is not None and frame_range[0] > 0:
+            first_frame, last_frame = frame_range
+            clip = clip.subclip(first_frame * (1.0 / fps), last_frame * (1.0 / fps))
+        if audio_track is not None:
+            clip = clip.set_audio(AudioArrayClip(audio_track, fps=AUDIO_FPS))
+        if crf is not None:
+            ffmpeg_params += ["-crf", str(crf)]
+        clip.write_videofile(
+            output_path,
+            audio_codec="aac",
+            fps=fps,
+            preset=preset,
+            threads=threads,
+            ffmpeg_params=ffmpeg_params or None,
+        )
+    else:
+        raise ValueError(f"Unknown encoder: {encoder}")
+
+
 def generate_audio(video_file_path: str, audio_file_path: str):
+    """
+    Transcription audio: mono 16 kHz low-bitrate MP3 extracted by ffmpeg.
+    """
     if os.path.exists(audio_file_path):
         print(f"EDITOR >> Audio file already exists -> {audio_file_path}")
         return
-    VideoFileClip(video_file_path).audio.write_audiofile(audio_file_path)
+    extract_speech_audio(video_file_path, audio_file_path)
     print(f"EDITOR >> Audio file generated -> {audio_file_path}")
 
 
+def pick_background_start(main_duration: float, additional_duration: float) -> float:
+    # Calculate the maximum start time for the additional video
+    max_start_time = max(0, additional_duration - main_duration)
+    return random.uniform(0, max_start_time)
+
+
+def get_background(path: Path, width: int) -> BackgroundProxy:
+    """
+    Proxy of the background footage at the main video's width and FPS,
+    transcoded on first use.
+    """
+    return background_library.get(path.lower_video_path, width, FPS)
+
+
+def pick_proxy_start(main_duration: float, proxy: BackgroundProxy) -> float:
+    # Start on a keyframe so the first background frame needs no extra decoding
+    return proxy.snap(pick_background_start(main_duration, proxy.duration))
+
+
 def append_additional_video(
-    main_video: CompositeVideoClip, additional_video: CompositeVideoClip
+    main_video: CompositeVideoClip,
+    additional_video: CompositeVideoClip,
+    start_time: float | None = None,
 ) -> CompositeVideoClip:
     # Load the main and additional videos
 
     # Ensure the additional video is the same length as the main video
     if additional_video.duration > main_video.duration:
-        # Calculate the maximum start time for the additional video
-        max_start_time = additional_video.duration - main_video.duration
-        random_start_time = random.uniform(0, max_start_time)
+        if start_time is None:
+            start_time = pick_background_start(
+                main_video.duration, additional_video.duration
+            )
+        random_start_time = start_time
         # Trim the additional video to the main video's duration
         additional_video = additional_video.subclip(
             random_start_time, random_start_time + main_video.duration
@@ -172,19 +328,14 @@ def append_additional_video(
     return final_video
 
 
+def get_resized_path(video_path: str) -> str:
+    return f"{video_path.split('.')[0]}_resized.mp4"
 
 
-def resize(video_path: str):
-    clip = VideoFileClip(video_path)
-
-    output_path = f"{video_path.split('.')[0]}_resized.mp4"
-    if os.path.exists(output_path):
-        print(f"Output file already exists -> {output_path}")
-        return
-
-    original_width = clip.size[0]
-    original_height = clip.size[1]
-
+def get_crop_box(original_width: int, original_height: int):
+    """
+    Centre crop (x1, y1, width, height) to the 1080x1920 aspect ratio.
+    """
     target_aspect_ratio = 1080 / 1920
 
     if original_width / original_height > target_aspect_ratio:
@@ -195,57 +346,385 @@ def resize(video_path: str):
         # Height is too large
         new_width = original_width
         new_height = int(new_width / target_aspect_ratio)
+    # yuv420p needs even dimensions
+    new_width -= new_width % 2
+    new_height -= new_height % 2
 
     # Calculate crop coordinates (center crop)
     x_center = original_width / 2
     y_center = original_height / 2
-    x1 = x_center - new_width / 2
-    y1 = y_center - new_height / 2
+    x1 = int(x_center - new_width / 2)
+    y1 = int(y_center - new_height / 2)
+    return x1, y1, new_width, new_height
+
+
+def get_crop_filter(original_width: int, original_height: int) -> str:
+    x1, y1, new_width, new_height = get_crop_box(original_width, original_height)
+    return f"crop={new_width}:{new_height}:{x1}:{y1}"
+
+
+def resize(video_path: str, encoder: str = ENCODER):
+    """
+    Crop an already rendered video to 9:16. build() applies the same crop inside
+    its single render, this is for existing files.
+    """
+    clip = VideoFileClip(video_path)
 
+    output_path = get_resized_path(video_path)
+    if os.path.exists(output_path):
+        print(f"Output file already exists -> {output_path}")
+        return
+
+    x1, y1, new_width, new_height = get_crop_box(clip.size[0], clip.size[1])
     cropped_clip = clip.crop(x1=x1, y1=y1, width=new_width, height=new_height)
-    cropped_clip.write_videofile(output_path, audio_codec="aac", fps=30)
+    write_clip(cropped_clip, output_path, encoder=encoder, fps=30)
     clip.close()
     cropped_clip.close()
-    
-def recut(video_path: str, segment_duration: int):
-    # Ensure the maximum segment duration is no more than 60 seconds
-    segment_duration = min(segment_duration, 60)
-    clip = VideoFileClip(video_path)
 
-    ranges = []
-    clip_duration = clip.duration
-    max_duration = int(clip_duration)
-    last = False
-    prev = 0
-    for num in range(0, max_duration, segment_duration):
-        if max_duration - num < segment_duration:
-            ranges.append((prev, clip_duration))
-            last = True
-        else:
-            ranges.append((prev, num))
-        prev = num
-    if not last:
-        ranges.append((prev, clip_duration))
-    ranges.pop(0)
-    
-    print(ranges)
-
-    for idx, clip_range in enumerate(ranges):
-        try:
-            print(f"Processing segment {idx+1} of {len(ranges)}...")
-            subclip = clip.subclip(*clip_range)
-            subclip_path = f"{video_path.split('.')[0]}_recut_pt_{idx+1}.mp4"
-            subclip.write_videofile(subclip_path, audio_codec="aac", fps=30)
-            time.sleep(1)
-        except Exception as e:
-            print(f"Error processing segment {idx+1}: {e}", file=sys.stderr)
-            continue
+
+def recut(
+    video_path: str,
+    segment_duration: int,
+    mode: str = "reencode",
+    max_workers: int | None = None,
+):
+    return recut_video(video_path, segment_duration, mode=mode, max_workers=max_workers)
+
 
 def main():
     resize("output_video_with_additional_c_subtitles.mp4", "output.mp4")
 
 
-def build(resize_video: bool, path: Path):
+def get_video_filters(
+    size, resize_video: bool, scale_filter: str | None = None
+) -> str | None:
+    """
+    Encoder-side filter chain: the optional 9:16 crop, then `scale_filter`.
+    The moviepy renderer composites at the preview scale already and passes
+    none; the ffmpeg burn-in scales at the end of its filtergraph.
+    """
+    filters = []
+    if resize_video:
+        filters.append(get_crop_filter(*size))
+    if scale_filter:
+        filters.append(scale_filter)
+    return ",".join(filters) or None
+
+
+def get_plan(path: Path, replan: bool = False) -> RenderPlan:
+    """
+    The short's persisted background choice, made on first build so previews
+    and the final render of the same source agree.
+    """
+    plan_path = get_plan_path(path.main_video_path, path.lower_video_path)
+    plan = None if replan else load_plan(plan_path)
+    main_infos = ffmpeg_parse_infos(path.main_video_path)
+    proxy = get_background(path, main_infos["video_size"][0])
+    if plan is None or plan.background_path != proxy.path:
+        plan = RenderPlan(
+            main_video_path=path.main_video_path,
+            background_path=proxy.path,
+            background_start=pick_proxy_start(main_infos["duration"], proxy),
+        )
+        save_plan(plan, plan_path)
+        print(f"EDITOR >> Render plan saved -> {plan_path}")
+    else:
+        print(f"EDITOR >> Reusing render plan -> {plan_path}")
+    return plan
+
+
+def mix_track(
+    path: Path, subtitles, plan: RenderPlan, frame_range, fps: float
+) -> np.ndarray:
+    """
+    Finished soundtrack (speech, background, bleeps) under the given frames.
+    """
+    first, last = frame_range
+    return mix_audio(
+        path.main_video_path,
+        plan.background_path,
+        plan.background_start,
+        subtitles,
+        start=first * (1.0 / fps),
+        duration=(last - first) / fps,
+    )
+
+
+def build_burn_in(
+    path: Path,
+    subtitles,
+    output_path: str,
+    plan: RenderPlan,
+    settings: RenderSettings,
+    resize_video: bool = False,
+):
+    main_infos = ffmpeg_parse_infos(path.main_video_path)
+    lower_infos = ffmpeg_parse_infos(plan.background_path)
+    # Same geometry as clips_array: widest input, heights stacked
+    size = (
+        max(main_infos["video_size"][0], lower_infos["video_size"][0]),
+        main_infos["video_size"][1] + lower_infos["video_size"][1],
+    )
+    video_filters = get_video_filters(size, resize_video, settings.get_scale_filter())
+    start = settings.get_start()
+    end = settings.get_end(main_infos["duration"])
+
+    emoji_overlays = []
+    for subtitle in subtitles.subtitles:
+        if subtitle.start >= end or subtitle.end <= start:
+            continue
+        emoji_path = get_emoji_path(subtitle)
+        if emoji_path is not None:
+            emoji_overlays.append((emoji_path, subtitle.start, subtitle.end))
+
+    # The scratch track goes with the directory, whether the render succeeds
+    with tempfile.TemporaryDirectory(
+        prefix="burn_in_", dir=os.path.dirname(output_path) or None
+    ) as work_dir:
+        audio_path = os.path.join(work_dir, "audio.wav")
+        write_track(
+            mix_audio(
+                path.main_video_path,
+                plan.background_path,
+                plan.background_start,
+                subtitles,
+                start=start,
+                duration=end - start,
+            ),
+            audio_path,
+        )
+        render_burn_in(
+            path.main_video_path,
+            plan.background_path,
+            subtitles,
+            emoji_overlays,
+            output_path,
+            black_jetbrainsMono_gold,
+            plan.background_start,
+            fps=settings.fps,
+            preset=settings.preset,
+            crf=23 if settings.crf is None else settings.crf,
+            threads=os.cpu_count(),
+            duration=end - start,
+            video_filters=video_filters,
+            start=start,
+            audio_path=audio_path,
+        )
+
+
+def open_video(video_path: str, scale: float = 1.0) -> VideoFileClip:
+    """
+    Video-only reader of `video_path`: the soundtrack comes from mix_audio().
+    """
+    if scale == 1.0:
+        return VideoFileClip(video_path, audio=False)
+    width, height = scale_size(ffmpeg_parse_infos(video_path)["video_size"], scale)
+    return VideoFileClip(
+        video_path,
+        audio=False,
+        target_resolution=(height, width),
+        resize_algorithm=PREVIEW_RESIZE_ALGORITHM,
+    )
+
+
+def compose_video(
+    path: Path,
+    subtitles,
+    background_start: float | None = None,
+    time_range=None,
+    prefetch_frames: int = PREFETCH_FRAMES,
+    fps: float = FPS,
+    scale: float = 1.0,
+):
+    """
+    Composite main + background video with caption and emoji overlays. With
+    `time_range` only the subtitles visible inside it get clips built, the
+    clip ends at its end and the readers start at its start.
+    Both inputs are decoded `prefetch_frames` ahead on their own threads
+    (0 decodes inline). With `scale` ffmpeg decodes both inputs at that
+    scale and captions and emoji are scaled to match, so the whole
+    composite is built at the smaller size.
+    """
+    main_video = open_video(path.main_video_path, scale)
+    # The background proxy matches the full-size main video whatever the scale,
+    # so every render of the short shares the proxy and its plan
+    main_width = ffmpeg_parse_infos(path.main_video_path)["video_size"][0]
+    proxy = get_background(path, main_width)
+    additional_video = open_video(proxy.path, scale)
+    origin = (main_video.size[0] // 2, main_video.size[1])
+
+    if background_start is None:
+        background_start = pick_proxy_start(main_video.duration, proxy)
+
+    segments = subtitles.subtitles
+    if time_range is not None:
+        segments = [
+            sub
+            for sub in segments
+            if sub.end > time_range[0] and sub.start < time_range[1]
+        ]
+    clips = [
+        create_subtitle_clip(sub, origin, fps=fps, scale=scale) for sub in segments
+    ]
+    subtitles_clips = [clip for clip, _ in clips if clip is not None]
+    emoji_clips = [clip for _, clip in clips if clip is not None]
+    print(f"EDITOR >> Glyph cache: {glyph_cache.stats()}")
+
+    end = main_video.duration
+    if time_range is not None:
+        end = min(time_range[1], end)
+
+    composite_vertical_video = append_additional_video(
+        main_video, additional_video, start_time=background_start
+    )
+    final_video = TimelineCompositor(
+        composite_vertical_video, subtitles_clips + emoji_clips
+    ).subclip(0, end)
+
+    # Position both readers frame-exactly, so a chunk starting mid-timeline
+    # decodes the same frames as a render from the start. Done last because
+    # every subclip()/fl() reads a frame through the shared readers.
+    first_t = time_range[0] if time_range is not None else 0
+    prefetch_clip(main_video, first_t, prefetch_frames)
+    if additional_video.duration > main_video.duration:
+        prefetch_clip(additional_video, background_start + first_t, prefetch_frames)
+    else:
+        prefetch_clip(additional_video, first_t, prefetch_frames)
+    return final_video
+
+
+def render_chunk(
+    path: Path,
+    subtitles,
+    background_start: float,
+    frame_range,
+    chunk_path: str,
+    settings: RenderSettings,
+    threads: int,
+    resize_video: bool,
+    prefetch_frames: int = PREFETCH_FRAMES,
+) -> str:
+    first_frame, last_frame = frame_range
+    # Same float arithmetic as the frame grid in write_video
+    step = 1.0 / settings.fps
+    time_range = (first_frame * step, last_frame * step)
+    final_video = compose_video(
+        path,
+        subtitles,
+        background_start,
+        time_range,
+        prefetch_frames,
+        settings.fps,
+        settings.scale,
+    )
+    video_filters = get_video_filters(final_video.size, resize_video)
+    write_video(
+        final_video,
+        chunk_path,
+        fps=settings.fps,
+        preset=settings.preset,
+        crf=23 if settings.crf is None else settings.crf,
+        threads=threads,
+        ffmpeg_params=["-vf", video_filters] if video_filters else None,
+        frame_range=frame_range,
+        with_audio=False,
+    )
+    return chunk_path
+
+
+def build_chunked(
+    path: Path,
+    subtitles,
+    output_path: str,
+    workers: int,
+    plan: RenderPlan,
+    settings: RenderSettings,
+    resize_video: bool = False,
+    prefetch_frames: int = PREFETCH_FRAMES,
+):
+    """
+    Split the timeline into `workers` frame ranges, render each in its own
+    process with only the subtitles that fall inside it, then concatenate the
+    chunks with stream copy and mux the audio once. Every chunk samples the
+    same frame times as a serial render, with the same background offset.
+    """
+    # No readers may be open while the pool forks: a worker inheriting the
+    # pipe of an ffmpeg process would keep it alive after the parent closes it
+    duration = ffmpeg_parse_infos(path.main_video_path)["duration"]
+    first, last = settings.get_frame_range(duration)
+    n_frames = last - first
+    bounds = np.linspace(first, last, workers + 1).astype(int)
+    frame_ranges = [
+        (int(start), int(stop))
+        for start, stop in zip(bounds[:-1], bounds[1:])
+        if stop > start
+    ]
+
+    threads = max(1, (os.cpu_count() or 1) // len(frame_ranges))
+    print(f"EDITOR >> Rendering {n_frames} frames in {len(frame_ranges)} chunks")
+
+    # Chunks and the track go with the directory, even if a worker fails
+    with tempfile.TemporaryDirectory(
+        prefix="chunks_", dir=os.path.dirname(output_path) or None
+    ) as work_dir:
+        chunk_paths = [
+            os.path.join(work_dir, f"chunk_{idx}.mp4")
+            for idx in range(len(frame_ranges))
+        ]
+        audio_path = os.path.join(work_dir, "audio.m4a")
+        with ProcessPoolExecutor(max_workers=len(frame_ranges)) as executor:
+            futures = [
+                executor.submit(
+                    render_chunk,
+                    path,
+                    subtitles,
+                    plan.background_start,
+                    frame_range,
+                    chunk_path,
+                    settings,
+                    threads,
+                    resize_video,
+                    prefetch_frames,
+                )
+                for frame_range, chunk_path in zip(frame_ranges, chunk_paths)
+            ]
+            # The parent mixes the soundtrack while the workers render
+            write_track(
+                mix_track(path, subtitles, plan, (first, last), settings.fps),
+                audio_path,
+            )
+            for future in futures:
+                future.result()
+
+        concat_chunks(chunk_paths, output_path, audio_path=audio_path)
+
+
+def build(
+    resize_video: bool,
+    path: Path,
+    encoder: str = ENCODER,
+    preset: str = "medium",
+    crf: int | None = None,
+    renderer: str = RENDERER,
+    workers: int = 1,
+    prefetch_frames: int = PREFETCH_FRAMES,
+    preview: bool = False,
+    time_range: Tuple[float, float] | None = None,
+    replan: bool = False,
+):
+    """
+    workers > 1 renders the timeline in that many chunks in parallel processes
+    (moviepy renderer only) and joins them without re-encoding.
+    prefetch_frames is the per-input read-ahead of decoded frames (moviepy
+    renderer only), 0 decodes inline.
+
+    preview=True writes a draft (<output>_preview.mp4) at reduced resolution
+    and frame rate with the ultrafast preset, ignoring preset/crf. time_range
+    (start, end) in seconds renders only that part. The transcription audio,
+    subtitles, background proxy and background offset are cached and shared
+    with the final build; captions are rasterized at each render's scale and
+    the soundtrack is mixed again. replan=True picks a new background offset.
+    """
 
     t = Transcription()
     generate_audio(
@@ -256,32 +735,66 @@ def build(resize_video: bool, path: Path):
     )
     t.print_subtitles(subtitles)
 
-    main_video = VideoFileClip(path.main_video_path)
-    additional_video = VideoFileClip(path.lower_video_path)
-    origin = (main_video.size[0] // 2, main_video.size[1])
-    x = origin[0] - 160 // 2 
-    y = origin[1] + 120
-    position = (x, y)
-
-    clips = [create_subtitle_clip(sub, origin) for sub in subtitles.subtitles]
-    subtitles_clips, emoji_clips = zip(*clips)
-    subtitles_clips = list(subtitles_clips)
-    emoji_clips = list(emoji_clips)
+    if preview:
+        settings = RenderSettings.for_preview(time_range)
+    else:
+        settings = RenderSettings(
+            fps=FPS, preset=preset, crf=crf, time_range=time_range
+        )
+    plan = get_plan(path, replan=replan)
 
-    subtitles_clips = [clip for clip in subtitles_clips if clip is not None]
-    emoji_clips = [clip for clip in emoji_clips if clip is not None]
+    # The 9:16 crop is applied inside the single render instead of re-encoding
+    output_path = path.output_path
+    if resize_video:
+        output_path = get_resized_path(output_path)
+    output_path = settings.get_output_path(output_path)
+
+    if renderer == "ffmpeg":
+        build_burn_in(
+            path,
+            subtitles,
+            output_path,
+            plan,
+            settings,
+            resize_video=resize_video,
+        )
+        return
 
-    CLIP = main_video.duration
-    if SHORT_VIDEO:
-        CLIP = 10
+    if workers > 1:
+        build_chunked(
+            path,
+            subtitles,
+            output_path,
+            workers,
+            plan,
+            settings,
+            resize_video=resize_video,
+            prefetch_frames=prefetch_frames,
+        )
+        return
 
-    composite_vertical_video = append_additional_video(main_video, additional_video)
-    final_video = CompositeVideoClip(
-        [composite_vertical_video] + subtitles_clips + emoji_clips
-    ).subclip(0, CLIP)
-    final_video.write_videofile(path.output_path, audio_codec="aac", fps=30, threads=os.cpu_count())
-    if resize_video:
-        resize(path.output_path)
+    final_video = compose_video(
+        path,
+        subtitles,
+        plan.background_start,
+        settings.time_range,
+        prefetch_frames=prefetch_frames,
+        fps=settings.fps,
+        scale=settings.scale,
+    )
+    frame_range = settings.get_frame_range(final_video.duration)
+    write_clip(
+        final_video,
+        output_path,
+        encoder=encoder,
+        fps=settings.fps,
+        preset=settings.preset,
+        crf=settings.crf,
+        threads=os.cpu_count(),
+        video_filters=get_video_filters(final_video.size, resize_video),
+        frame_range=frame_range,
+        audio_track=mix_track(path, subtitles, plan, frame_range, settings.fps),
+    )
 
 
 if __name__ == "__main__":
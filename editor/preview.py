@@ -0,0 +1,125 @@
+import hashlib
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from utils.utils import CACHE_PATH
+
+PLANS_PATH = os.path.join(CACHE_PATH, "plans")
+
+# Draft renders: half resolution, half frame rate, fastest x264 preset
+PREVIEW_SCALE = 0.5
+PREVIEW_FPS = 15
+PREVIEW_PRESET = "ultrafast"
+PREVIEW_CRF = 28
+# ffmpeg scaler the inputs of a scaled render are decoded with
+PREVIEW_RESIZE_ALGORITHM = "fast_bilinear"
+
+
+class RenderSettings(BaseModel):
+    """
+    Output-side settings of one build(). The transcript, background proxy
+    and background offset do not depend on them, so a preview and the final
+    render share those; caption bitmaps and the mixed soundtrack are made
+    for each render.
+    """
+
+    fps: float = 30
+    scale: float = 1.0
+    preset: str = "medium"
+    crf: Optional[int] = None
+    time_range: Optional[Tuple[float, float]] = None
+    preview: bool = False
+
+    @classmethod
+    def for_preview(cls, time_range: Optional[Tuple[float, float]] = None):
+        return cls(
+            fps=PREVIEW_FPS,
+            scale=PREVIEW_SCALE,
+            preset=PREVIEW_PRESET,
+            crf=PREVIEW_CRF,
+            time_range=time_range,
+            preview=True,
+        )
+
+    def get_output_path(self, output_path: str) -> str:
+        if not self.preview:
+            return output_path
+        return f"{os.path.splitext(output_path)[0]}_preview.mp4"
+
+    def get_end(self, duration: float) -> float:
+        if self.time_range is None:
+            return duration
+        return min(self.time_range[1], duration)
+
+    def get_start(self) -> float:
+        return self.time_range[0] if self.time_range is not None else 0.0
+
+    def get_frame_range(self, duration: float) -> Tuple[int, int]:
+        """
+        (first, last) of the frame grid np.arange(0, duration, 1 / fps) that
+        fall inside time_range.
+        """
+        times = np.arange(0, duration, 1.0 / self.fps)
+        start, end = self.get_start(), self.get_end(duration)
+        first = int(np.searchsorted(times, start - 1e-9))
+        last = int(np.searchsorted(times, end - 1e-9))
+        return first, last
+
+    def get_scale_filter(self) -> Optional[str]:
+        if self.scale == 1.0:
+            return None
+        # Even dimensions for yuv420p
+        return f"scale=trunc(iw*{self.scale}/2)*2:trunc(ih*{self.scale}/2)*2"
+
+
+def scale_size(size: Tuple[int, int], scale: float) -> Tuple[int, int]:
+    """
+    `size` scaled, rounded down to even dimensions for yuv420p.
+    """
+    if scale == 1.0:
+        return tuple(size)
+    return tuple(max(2, int(side * scale / 2) * 2) for side in size)
+
+
+class RenderPlan(BaseModel):
+    """
+    Random choices of a short (the background offset) persisted next to the
+    other cached intermediates, so the final render shows what the preview did.
+    """
+
+    main_video_path: str
+    background_path: str
+    background_start: float
+
+
+def get_plan_path(main_video_path: str, lower_video_path: str) -> str:
+    """
+    Plan file of a source pair. Named after both files for readability and
+    keyed on their absolute paths, so equal names in different directories
+    get different plans.
+    """
+    main_name = os.path.splitext(os.path.basename(main_video_path))[0]
+    lower_name = os.path.splitext(os.path.basename(lower_video_path))[0]
+    sources = "\0".join(
+        os.path.abspath(video_path)
+        for video_path in (main_video_path, lower_video_path)
+    )
+    digest = hashlib.sha256(sources.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(PLANS_PATH, f"{main_name}__{lower_name}__{digest}.json")
+
+
+def load_plan(plan_path: str) -> Optional[RenderPlan]:
+    if not os.path.exists(plan_path):
+        return None
+    with open(plan_path, "r") as file:
+        return RenderPlan.model_validate_json(file.read())
+
+
+def save_plan(plan: RenderPlan, plan_path: str) -> None:
+    os.makedirs(os.path.dirname(plan_path), exist_ok=True)
+    with open(f"{plan_path}.tmp", "w") as file:
+        file.write(plan.model_dump_json(indent=2))
+    os.replace(f"{plan_path}.tmp", plan_path)
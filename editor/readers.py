@@ -0,0 +1,178 @@
+import queue
+import subprocess as sp
+import threading
+
+import numpy as np
+from moviepy.config import get_setting
+from moviepy.video.io.ffmpeg_reader import FFMPEG_VideoReader
+
+# Decoded frames held ahead of the compositor per input (memory cap)
+PREFETCH_FRAMES = 8
+# Longest forward jump still served by reading on rather than seeking,
+# same threshold as moviepy's reader
+MAX_SEQUENTIAL_SKIP = 100
+
+
+def frame_label(fps: float, t: float) -> int:
+    """
+    0-based index moviepy's reader believes it holds after get_frame(t).
+    """
+    return int(fps * t + 0.00001)
+
+
+def align_reader(reader: FFMPEG_VideoReader, t: float) -> None:
+    """
+    Restart `reader` so that get_frame(t) and every sequential read after it
+    return exactly the source frames moviepy labels them with.
+
+    moviepy's own seek (`-ss t-1 -i file -ss 1` with constant frame rate
+    output) may deliver the neighbouring frame or repeat the first one
+    depending on where t falls between frames, so two readers seeking to
+    different points of the same file disagree. Here the seek lands half a
+    frame before the wanted one and frames are passed through untouched, so
+    the first frame out is always the labelled one.
+    """
+    label = frame_label(reader.fps, t)
+    reader.close()
+
+    i_arg = ["-i", reader.filename]
+    if label:
+        i_arg = ["-ss", "%.06f" % ((label - 0.5) / reader.fps)] + i_arg
+    cmd = (
+        [get_setting("FFMPEG_BINARY")]
+        + i_arg
+        + [
+            "-loglevel",
+            "error",
+            "-f",
+            "image2pipe",
+            "-vf",
+            "scale=%d:%d" % tuple(reader.size),
+            "-sws_flags",
+            reader.resize_algo,
+            "-vsync",
+            "passthrough",
+            "-pix_fmt",
+            reader.pix_fmt,
+            "-vcodec",
+            "rawvideo",
+            "-",
+        ]
+    )
+    reader.proc = sp.Popen(
+        cmd,
+        bufsize=reader.bufsize,
+        stdout=sp.PIPE,
+        stderr=sp.PIPE,
+        stdin=sp.DEVNULL,
+    )
+    reader.lastread = reader.read_frame()
+    reader.pos = label + 1
+
+
+class PrefetchReader:
+    """
+    Drop-in for a VideoFileClip's reader that decodes ahead on its own thread
+    into a ring of preallocated frames, so compositing overlaps with ffmpeg
+    decoding. Memory is capped at buffer_size + 1 frames: up to buffer_size
+    decoded ahead, plus the frame last returned, which stays in its slot until
+    the next one is read.
+
+    Sequential reads are served from the ring. A backwards or long forward
+    jump restarts decoding at the new position.
+    """
+
+    def __init__(self, reader: FFMPEG_VideoReader, buffer_size: int = PREFETCH_FRAMES):
+        if buffer_size < 1:
+            raise ValueError(f"buffer_size must be at least 1, got {buffer_size}")
+        self.reader = reader
+        self.fps = reader.fps
+        self.size = reader.size
+        w, h = reader.size
+        self.frames = np.empty((buffer_size + 1, h, w, reader.depth), dtype=np.uint8)
+        self.thread = None
+        self._start(reader.lastread, reader.pos)
+
+    def __getattr__(self, name):
+        # duration, nframes, infos, ... of the wrapped reader
+        return getattr(self.reader, name)
+
+    def _start(self, lastread: np.ndarray, pos: int) -> None:
+        self.free = queue.Queue()
+        self.filled = queue.Queue()
+        for slot in range(len(self.frames)):
+            self.free.put(slot)
+        self.stop = threading.Event()
+        self.lastread = lastread
+        self.slot = None  # ring slot lastread lives in, if any
+        self.pos = pos
+        self.thread = threading.Thread(target=self._decode, daemon=True)
+        self.thread.start()
+
+    def _decode(self) -> None:
+        stdout = self.reader.proc.stdout
+        while not self.stop.is_set():
+            try:
+                slot = self.free.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            buffer = memoryview(self.frames[slot]).cast("B")
+            filled = 0
+            try:
+                while filled < len(buffer):
+                    n = stdout.readinto(buffer[filled:])
+                    if not n:
+                        break
+                    filled += n
+            except (ValueError, OSError):
+                pass  # pipe closed by _stop()
+            if filled < len(buffer):
+                self.filled.put(None)
+                return
+            self.filled.put(slot)
+
+    def _stop(self) -> None:
+        if self.thread is not None:
+            self.stop.set()
+            self.reader.close()
+            self.thread.join()
+            self.thread = None
+
+    def _advance(self) -> None:
+        slot = self.filled.get()
+        if slot is None:
+            # End of stream: keep returning the last frame, like moviepy does
+            self.filled.put(None)
+            return
+        if self.slot is not None:
+            self.free.put(self.slot)
+        self.slot = slot
+        self.lastread = self.frames[slot]
+
+    def get_frame(self, t: float) -> np.ndarray:
+        pos = frame_label(self.fps, t) + 1
+        if pos == self.pos:
+            return self.lastread
+        if self.pos < pos <= self.pos + MAX_SEQUENTIAL_SKIP:
+            for _ in range(pos - self.pos):
+                self._advance()
+        else:
+            self._stop()
+            align_reader(self.reader, t)
+            self._start(self.reader.lastread, self.reader.pos)
+        self.pos = pos
+        return self.lastread
+
+    def close(self) -> None:
+        self._stop()
+        self.reader.close()
+
+
+def prefetch_clip(clip, t: float = 0, buffer_size: int = PREFETCH_FRAMES) -> None:
+    """
+    Align `clip`'s reader on t and, unless buffer_size is 0, switch it to a
+    PrefetchReader. Call after all subclip()/fl() derivations of the clip.
+    """
+    align_reader(clip.reader, t)
+    if buffer_size:
+        clip.reader = PrefetchReader(clip.reader, buffer_size)
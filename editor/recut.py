@@ -0,0 +1,346 @@
+import bisect
+import os
+import re
+import subprocess as sp
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from moviepy.config import get_setting
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+from pydantic import BaseModel
+
+# How far (seconds) a cut may move to land on a keyframe in "copy" / "auto" mode
+KEYFRAME_SNAP_TOLERANCE = 0.5
+RECUT_MODES = ("reencode", "copy", "auto")
+
+
+class RecutError(Exception):
+    pass
+
+
+class RecutSegment(BaseModel):
+    index: int
+    start: float
+    end: float
+    path: str
+    mode: str
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+
+def get_recut_ranges(
+    clip_duration: float, segment_duration: int
+) -> List[Tuple[float, float]]:
+    # Ensure the maximum segment duration is no more than 60 seconds
+    segment_duration = min(segment_duration, 60)
+    ranges = []
+    max_duration = int(clip_duration)
+    last = False
+    prev = 0
+    for num in range(0, max_duration, segment_duration):
+        if max_duration - num < segment_duration:
+            ranges.append((prev, clip_duration))
+            last = True
+        else:
+            ranges.append((prev, num))
+        prev = num
+    if not last:
+        ranges.append((prev, clip_duration))
+    ranges.pop(0)
+    return ranges
+
+
+def get_keyframes(video_path: str) -> List[float]:
+    """
+    Keyframe timestamps of the first video stream. Only keyframes are decoded.
+    """
+    cmd = [
+        get_setting("FFMPEG_BINARY"),
+        "-hide_banner",
+        "-skip_frame",
+        "nokey",
+        "-i",
+        video_path,
+        "-map",
+        "0:v:0",
+        "-vf",
+        "showinfo",
+        "-f",
+        "null",
+        "-",
+    ]
+    process = sp.run(cmd, stdout=sp.DEVNULL, stderr=sp.PIPE)
+    if process.returncode != 0:
+        raise RecutError(
+            f"Could not read keyframes of {video_path}: "
+            f"{process.stderr.decode(errors='replace').strip()}"
+        )
+    stderr = process.stderr.decode(errors="replace")
+    return sorted(float(t) for t in re.findall(r"pts_time:\s*([0-9.]+)", stderr))
+
+
+def snap(
+    time_point: float, keyframes: List[float], tolerance: float
+) -> Optional[float]:
+    if not keyframes:
+        return None
+    idx = bisect.bisect_left(keyframes, time_point)
+    first, last = max(idx - 1, 0), idx + 1
+    candidates = keyframes[first:last]
+    nearest = min(candidates, key=lambda keyframe: abs(keyframe - time_point))
+    if abs(nearest - time_point) <= tolerance:
+        return nearest
+    return None
+
+
+def _run(cmd: List[str]) -> None:
+    process = sp.run(cmd, stdout=sp.DEVNULL, stderr=sp.PIPE)
+    if process.returncode != 0:
+        raise RecutError(process.stderr.decode(errors="replace").strip())
+
+
+def _ffmpeg() -> List[str]:
+    return [get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error"]
+
+
+def cut_reencode(
+    video_path: str, start: float, end: float, output_path: str, preset: str, crf: int
+) -> None:
+    _run(
+        _ffmpeg()
+        + ["-ss", f"{start:.6f}", "-i", video_path, "-t", f"{end - start:.6f}"]
+        + ["-c:v", "libx264", "-preset", preset, "-crf", str(crf), "-r", "30"]
+        + ["-pix_fmt", "yuv420p", "-c:a", "aac", "-movflags", "+faststart"]
+        + [output_path]
+    )
+
+
+def cut_copy(
+    video_path: str, start: float, end: float, output_path: str, fps: float
+) -> None:
+    # The frame count bounds the video as in cut_smart(), -t only the audio
+    _run(
+        _ffmpeg()
+        + ["-ss", f"{start:.6f}", "-i", video_path, "-t", f"{end - start:.6f}"]
+        + ["-frames:v", str(round((end - start) * fps))]
+        + ["-map", "0", "-c", "copy", "-avoid_negative_ts", "make_zero"]
+        + ["-movflags", "+faststart", output_path]
+    )
+
+
+def cut_smart(
+    video_path: str,
+    start: float,
+    end: float,
+    output_path: str,
+    keyframes: List[float],
+    fps: float,
+    preset: str,
+    crf: int,
+) -> None:
+    """
+    Re-encode only the partial GOPs at both boundaries and stream-copy the
+    keyframe-aligned middle. Audio is re-encoded for the whole range in one
+    piece so there are no AAC priming gaps at the joins.
+    """
+    inner = [keyframe for keyframe in keyframes if start <= keyframe <= end]
+    if len(inner) < 2:
+        # No whole GOP inside the range, nothing to copy
+        cut_reencode(video_path, start, end, output_path, preset, crf)
+        return
+    copy_start, copy_end = inner[0], inner[-1]
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        pieces = []
+        if copy_start - start > 1e-3:
+            pieces.append(("head", start, copy_start, False))
+        pieces.append(("middle", copy_start, copy_end, True))
+        if end - copy_end > 1e-3:
+            pieces.append(("tail", copy_end, end, False))
+
+        concat_lines = []
+        for name, piece_start, piece_end, copy in pieces:
+            piece_path = os.path.join(work_dir, f"{name}.mp4")
+            cmd = _ffmpeg() + [
+                "-ss",
+                f"{piece_start:.6f}",
+                "-i",
+                video_path,
+                # Frame counts rather than -t: with stream copy -t lets reordered
+                # B-frames of the next GOP through
+                "-frames:v",
+                str(round((piece_end - piece_start) * fps)),
+                "-map",
+                "0:v:0",
+                "-an",
+            ]
+            if copy:
+                cmd += ["-c:v", "copy", "-avoid_negative_ts", "make_zero"]
+            else:
+                cmd += ["-c:v", "libx264", "-preset", preset, "-crf", str(crf)]
+                cmd += ["-pix_fmt", "yuv420p"]
+            _run(cmd + [piece_path])
+            concat_lines.append(f"file '{piece_path}'")
+
+        concat_path = os.path.join(work_dir, "concat.txt")
+        with open(concat_path, "w") as file:
+            file.write("\n".join(concat_lines))
+
+        _run(
+            _ffmpeg()
+            + ["-f", "concat", "-safe", "0", "-i", concat_path]
+            + ["-ss", f"{start:.6f}", "-t", f"{end - start:.6f}", "-i", video_path]
+            + ["-map", "0:v:0", "-map", "1:a:0?", "-c:v", "copy", "-c:a", "aac"]
+            + ["-movflags", "+faststart", output_path]
+        )
+
+
+def plan_segments(
+    video_path: str,
+    ranges: List[Tuple[float, float]],
+    mode: str,
+    keyframes: List[float],
+    duration: float,
+    tolerance: float,
+) -> List[RecutSegment]:
+    """
+    Segments for contiguous `ranges`. Outside "reencode" every boundary is
+    snapped to a keyframe once and shared by the two segments meeting there,
+    so the segments stay contiguous. A segment with both boundaries snapped
+    is stream-copied; the others are cut "smart" in mode="auto" and fail in
+    mode="copy".
+    """
+    boundaries = [start for start, _ in ranges[:1]] + [end for _, end in ranges]
+    snapped = [None] * len(boundaries)
+    if mode != "reencode":
+        # The end of the file is as good a cut point as a keyframe
+        cut_points = keyframes + [duration]
+        snapped = [snap(point, cut_points, tolerance) for point in boundaries]
+
+    segments = []
+    for idx in range(len(ranges)):
+        segment = RecutSegment(
+            index=idx + 1,
+            start=boundaries[idx] if snapped[idx] is None else snapped[idx],
+            end=boundaries[idx + 1] if snapped[idx + 1] is None else snapped[idx + 1],
+            path=f"{video_path.split('.')[0]}_recut_pt_{idx + 1}.mp4",
+            mode=mode,
+        )
+        if mode != "reencode":
+            if snapped[idx] is not None and snapped[idx + 1] is not None:
+                segment.mode = "copy"
+            elif mode == "copy":
+                segment.error = (
+                    f"RecutError: No keyframe within {tolerance}s of "
+                    f"{segment.start:.2f}-{segment.end:.2f}, "
+                    "use mode='auto' or 'reencode'"
+                )
+            else:
+                segment.mode = "smart"
+        segments.append(segment)
+    return segments
+
+
+def cut_segment(
+    video_path: str,
+    segment: RecutSegment,
+    keyframes: List[float],
+    fps: float,
+    preset: str,
+    crf: int,
+) -> RecutSegment:
+    started = time.time()
+    try:
+        if segment.mode == "reencode":
+            cut_reencode(
+                video_path, segment.start, segment.end, segment.path, preset, crf
+            )
+        elif segment.mode == "copy":
+            cut_copy(video_path, segment.start, segment.end, segment.path, fps)
+        else:
+            cut_smart(
+                video_path,
+                segment.start,
+                segment.end,
+                segment.path,
+                keyframes,
+                fps,
+                preset,
+                crf,
+            )
+    except Exception as e:
+        segment.error = f"{type(e).__name__}: {e}"
+    segment.elapsed = time.time() - started
+    return segment
+
+
+def recut_video(
+    video_path: str,
+    segment_duration: int,
+    mode: str = "reencode",
+    max_workers: Optional[int] = None,
+    preset: str = "medium",
+    crf: int = 23,
+    tolerance: float = KEYFRAME_SNAP_TOLERANCE,
+) -> List[RecutSegment]:
+    """
+    Cut a video into segments in parallel.
+
+    mode="reencode" re-encodes every segment (previous behaviour),
+    mode="copy" stream-copies segments whose boundaries snap to keyframes
+    within `tolerance` and fails the others, mode="auto" stream-copies when
+    possible and otherwise re-encodes only the GOPs around each boundary.
+
+    Raises RecutError after all segments finished if any of them failed.
+    """
+    if mode not in RECUT_MODES:
+        raise ValueError(f"Unknown recut mode: {mode}, expected one of {RECUT_MODES}")
+
+    infos = ffmpeg_parse_infos(video_path)
+    duration = infos["duration"]
+    ranges = get_recut_ranges(duration, segment_duration)
+    keyframes = get_keyframes(video_path) if mode != "reencode" else []
+    print(f"EDITOR >> Recutting {video_path} into {len(ranges)} segments ({mode})")
+
+    segments = plan_segments(video_path, ranges, mode, keyframes, duration, tolerance)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                cut_segment,
+                video_path,
+                segment,
+                keyframes,
+                infos["video_fps"],
+                preset,
+                crf,
+            )
+            for segment in segments
+            if not segment.error
+        ]
+        cut = {result.index: result for result in (f.result() for f in futures)}
+    results = [cut.get(segment.index, segment) for segment in segments]
+
+    for result in results:
+        if result.error:
+            print(
+                f"EDITOR >> Segment {result.index} {result.start:.2f}-{result.end:.2f} "
+                f"failed: {result.error}",
+                file=sys.stderr,
+            )
+        else:
+            print(
+                f"EDITOR >> Segment {result.index} {result.start:.2f}-{result.end:.2f} "
+                f"[{result.mode}] {result.elapsed:.1f}s -> {result.path}"
+            )
+
+    failed = [result for result in results if result.error]
+    if failed:
+        raise RecutError(
+            f"{len(failed)} of {len(results)} segments failed: "
+            + ", ".join(str(result.index) for result in failed)
+        )
+    return results
@@ -0,0 +1,102 @@
+import os
+from io import BytesIO
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageFont
+from pilmoji import Pilmoji
+from pilmoji.helpers import getsize
+from pilmoji.source import BaseSource
+
+from utils.emoji_index import EmojiIndex
+from utils.utils import ASSETS_PATH, IOS_EMOJI_PACK_PATH
+
+FONTS_PATH = os.path.join(ASSETS_PATH, "fonts")
+
+# ImageMagick font names -> TrueType files, looked up in FONTS_PATH first and
+# then in the system font directories
+FONT_FILES = {
+    "JetBrainsMono-NF-ExtraBold": "JetBrainsMonoNerdFont-ExtraBold.ttf",
+}
+
+
+class LocalEmojiSource(BaseSource):
+    """
+    Pilmoji source that reads emoji images from the local iOS emoji pack instead
+    of downloading them, resolved through the pack's index.
+    """
+
+    def __init__(self, emoji_pack_path: str = IOS_EMOJI_PACK_PATH):
+        self.emoji_index = EmojiIndex(emoji_pack_path)
+
+    def get_emoji(self, emoji: str, /) -> Optional[BytesIO]:
+        path = self.emoji_index.get_path(emoji)
+        if path is None:
+            return None
+        with open(path, "rb") as file:
+            return BytesIO(file.read())
+
+    def get_discord_emoji(self, id: int, /) -> Optional[BytesIO]:
+        return None
+
+
+def load_font(font_name: str, fontsize: int) -> ImageFont.FreeTypeFont:
+    font_file = FONT_FILES.get(font_name, font_name)
+    local_path = os.path.join(FONTS_PATH, font_file)
+    if os.path.exists(local_path):
+        return ImageFont.truetype(local_path, fontsize)
+    try:
+        # Pillow searches the system font directories for bare file names
+        return ImageFont.truetype(font_file, fontsize)
+    except OSError:
+        raise FileNotFoundError(
+            f"Font {font_name} not found at {local_path} or in system fonts"
+        )
+
+
+class PillowTextRenderer:
+    """
+    In-process replacement for moviepy's TextClip. The font is loaded once per
+    style, text is measured from font metrics and emoji are drawn inline by
+    Pilmoji in the same pass, so no ImageMagick subprocess is launched per word.
+    """
+
+    _renderers: Dict[str, "PillowTextRenderer"] = {}
+
+    def __init__(self, style: dict):
+        self.font = load_font(style["font"], style["fontsize"])
+        self.color = style.get("color", "black")
+        self.bg_color = style.get("bg_color", "transparent")
+        self.source = LocalEmojiSource()
+
+    @classmethod
+    def for_style(cls, style: dict) -> "PillowTextRenderer":
+        key = repr(sorted(style.items()))
+        if key not in cls._renderers:
+            cls._renderers[key] = cls(style)
+        return cls._renderers[key]
+
+    def measure(self, text: str) -> Tuple[int, int]:
+        """
+        Size of the rendered text without padding, matching ImageMagick's
+        `label:` geometry (advance width by ascent + descent).
+        """
+        width, _ = getsize(text, self.font)
+        ascent, descent = self.font.getmetrics()
+        return width, ascent + descent
+
+    def render(self, text: str, padding: Tuple[int, int] = (0, 0)) -> np.ndarray:
+        padding_x, padding_y = padding
+        text_width, text_height = self.measure(text)
+        size = (text_width + 2 * padding_x, text_height + 2 * padding_y)
+        background = (0, 0, 0, 0) if self.bg_color == "transparent" else self.bg_color
+        image = Image.new("RGBA", size, background)
+        # Centred like ImageMagick's `-gravity center`
+        position = ((size[0] - text_width) // 2, (size[1] - text_height) // 2)
+        with Pilmoji(image, source=self.source) as pilmoji:
+            pilmoji.text(position, text, fill=self.color, font=self.font)
+        return np.asarray(image, dtype=np.uint8)
+
+
+def render_text_pillow(text: str, style: dict, padding) -> np.ndarray:
+    return PillowTextRenderer.for_style(style).render(text, padding)
@@ -0,0 +1,67 @@
+from collections import defaultdict
+from typing import Dict, List
+
+import numpy as np
+from moviepy.editor import VideoClip
+
+TIMELINE_BUCKET_SIZE = 1.0  # seconds
+
+
+class TimelineCompositor(VideoClip):
+    """
+    Drop-in replacement for `CompositeVideoClip([background] + overlays)` when the
+    background covers the whole frame.
+
+    CompositeVideoClip asks every overlay whether it is playing on every frame.
+    Here the overlays are compiled once into an interval index (fixed-size time
+    buckets, each holding the overlays that intersect it, in layer order), so a
+    frame only looks at the handful of captions around `t`.
+    """
+
+    def __init__(
+        self,
+        background: VideoClip,
+        overlays: List[VideoClip],
+        bucket_size: float = TIMELINE_BUCKET_SIZE,
+    ):
+        VideoClip.__init__(self, duration=background.duration)
+        self.background = background
+        self.overlays = overlays
+        self.bucket_size = bucket_size
+        self.size = background.size
+        self.audio = background.audio
+        if getattr(background, "fps", None):
+            self.fps = background.fps
+
+        self.starts = np.array([clip.start for clip in overlays], dtype=float)
+        self.ends = np.array(
+            [np.inf if clip.end is None else clip.end for clip in overlays],
+            dtype=float,
+        )
+        self.index: Dict[int, List[int]] = defaultdict(list)
+        last_bucket = int((background.duration or 0) // bucket_size)
+        for idx, (start, end) in enumerate(zip(self.starts, self.ends)):
+            first = int(max(start, 0) // bucket_size)
+            last = (
+                min(int(end // bucket_size), last_bucket)
+                if end != np.inf
+                else last_bucket
+            )
+            for bucket in range(first, last + 1):
+                self.index[bucket].append(idx)
+
+        self.make_frame = self._make_frame
+
+    def active_overlays(self, t: float) -> List[VideoClip]:
+        bucket = self.index.get(int(t // self.bucket_size), [])
+        return [
+            self.overlays[idx]
+            for idx in bucket
+            if self.starts[idx] <= t < self.ends[idx]
+        ]
+
+    def _make_frame(self, t: float) -> np.ndarray:
+        frame = self.background.get_frame(t)
+        for clip in self.active_overlays(t):
+            frame = clip.blit_on(frame, t)
+        return frame
@@ -0,0 +1,302 @@
+import hashlib
+import json
+import re
+from typing import Optional, Tuple
+
+# Heavy curse stems and how they are censored, as the emoji prompt asks
+# (F@#K, SH!T, ...). Inflections keep their suffix: FUCKING -> F@#KING
+CURSE_STEMS = {
+    "motherfuck": "motherf@#k",
+    "fuck": "f@#k",
+    "shit": "sh!t",
+    "bitch": "b!tch",
+    "whore": "wh@re",
+    "faggot": "f@gg0t",
+}
+CURSE_SUFFIXES = (
+    "",
+    "s",
+    "es",
+    "ed",
+    "er",
+    "ers",
+    "in",
+    "ing",
+    "ings",
+    "ty",
+    "y",
+    "head",
+    "face",
+)
+# Milder words the LLM may or may not censor in context: segments with
+# these are left to it
+AMBIGUOUS_WORDS = (
+    "ass",
+    "asshole",
+    "bastard",
+    "bullshit",
+    "crap",
+    "cunt",
+    "damn",
+    "dick",
+    "dumbass",
+    "goddamn",
+    "hell",
+    "piss",
+    "pussy",
+    "slut",
+    "wtf",
+)
+
+KEYWORD_EMOJIS = {
+    "love": "❤️",
+    "heart": "❤️",
+    "happy": "😊",
+    "smile": "😊",
+    "sad": "😢",
+    "cry": "😭",
+    "laugh": "😂",
+    "funny": "😂",
+    "joke": "😂",
+    "angry": "😠",
+    "mad": "😠",
+    "scared": "😱",
+    "scary": "😱",
+    "afraid": "😱",
+    "shock": "😱",
+    "wow": "😮",
+    "surprise": "😮",
+    "think": "🤔",
+    "idea": "💡",
+    "question": "❓",
+    "why": "🤔",
+    "cool": "😎",
+    "sleep": "😴",
+    "tired": "😴",
+    "sick": "🤒",
+    "dead": "💀",
+    "die": "💀",
+    "kill": "🔪",
+    "fire": "🔥",
+    "hot": "🔥",
+    "cold": "🥶",
+    "money": "💰",
+    "cash": "💵",
+    "rich": "🤑",
+    "dollar": "💵",
+    "pay": "💸",
+    "buy": "🛒",
+    "work": "💼",
+    "job": "💼",
+    "boss": "👔",
+    "school": "🏫",
+    "book": "📚",
+    "read": "📖",
+    "write": "✍️",
+    "phone": "📱",
+    "call": "📞",
+    "computer": "💻",
+    "internet": "🌐",
+    "game": "🎮",
+    "music": "🎵",
+    "song": "🎵",
+    "sing": "🎤",
+    "dance": "💃",
+    "party": "🎉",
+    "birthday": "🎂",
+    "gift": "🎁",
+    "car": "🚗",
+    "drive": "🚗",
+    "plane": "✈️",
+    "fly": "✈️",
+    "travel": "✈️",
+    "home": "🏠",
+    "house": "🏠",
+    "city": "🏙️",
+    "world": "🌍",
+    "earth": "🌍",
+    "sun": "☀️",
+    "moon": "🌙",
+    "star": "⭐",
+    "rain": "🌧️",
+    "snow": "❄️",
+    "water": "💧",
+    "ocean": "🌊",
+    "sea": "🌊",
+    "tree": "🌳",
+    "flower": "🌸",
+    "dog": "🐶",
+    "cat": "🐱",
+    "fish": "🐟",
+    "bird": "🐦",
+    "horse": "🐴",
+    "food": "🍔",
+    "eat": "🍽️",
+    "hungry": "🍽️",
+    "pizza": "🍕",
+    "burger": "🍔",
+    "coffee": "☕",
+    "beer": "🍺",
+    "wine": "🍷",
+    "drink": "🥤",
+    "cake": "🍰",
+    "time": "⏰",
+    "clock": "⏰",
+    "fast": "⚡",
+    "win": "🏆",
+    "winner": "🏆",
+    "lose": "😞",
+    "fight": "🥊",
+    "gym": "🏋️",
+    "muscle": "💪",
+    "strong": "💪",
+    "run": "🏃",
+    "football": "🏈",
+    "soccer": "⚽",
+    "basketball": "🏀",
+    "baby": "👶",
+    "kid": "🧒",
+    "girl": "👧",
+    "boy": "👦",
+    "friend": "🤝",
+    "family": "👪",
+    "mom": "👩",
+    "dad": "👨",
+    "brain": "🧠",
+    "smart": "🧠",
+    "eye": "👀",
+    "look": "👀",
+    "watch": "👀",
+    "listen": "👂",
+    "talk": "🗣️",
+    "speak": "🗣️",
+    "yes": "👍",
+    "good": "👍",
+    "great": "👍",
+    "bad": "👎",
+    "no": "🚫",
+    "stop": "🛑",
+    "wait": "⏳",
+    "start": "🚀",
+    "rocket": "🚀",
+    "science": "🔬",
+    "doctor": "🩺",
+    "police": "👮",
+    "gun": "🔫",
+    "bomb": "💣",
+    "boom": "💥",
+    "crazy": "🤪",
+    "weird": "🤨",
+    "king": "👑",
+    "queen": "👑",
+    "god": "🙏",
+    "pray": "🙏",
+    "thanks": "🙏",
+    "ghost": "👻",
+    "alien": "👽",
+    "robot": "🤖",
+    "kiss": "😘",
+    "sex": "🍑",
+}
+STEM_SUFFIXES = ("s", "es", "ing", "ed", "er", "ly")
+# Shortest stem looked up once a suffix is stripped: shorter ones turn
+# other words into keywords (caring -> car, cares -> car)
+STEM_MIN_LENGTH = 4
+# Keyword emoji are only used for segments of up to this many words; in
+# longer ones the keyword found need not be what the segment is about
+KEYWORD_MAX_WORDS = 1
+# Emoji of a segment with a heavy curse in it
+CENSORED_EMOJI = "🤬"
+
+CURSE_PATTERN = re.compile(
+    r"\b(%s)(%s)\b"
+    % (
+        "|".join(sorted(CURSE_STEMS, key=len, reverse=True)),
+        "|".join(sorted(CURSE_SUFFIXES, key=len, reverse=True)),
+    ),
+    re.IGNORECASE,
+)
+AMBIGUOUS_PATTERN = re.compile(r"\b(%s)\b" % "|".join(AMBIGUOUS_WORDS), re.IGNORECASE)
+TOKEN_PATTERN = re.compile(r"[a-z']+")
+
+
+def get_lexicon_hash() -> str:
+    """
+    Fingerprint of the tables, for cache keys over annotations.
+    """
+    tables = [
+        CURSE_STEMS,
+        CURSE_SUFFIXES,
+        AMBIGUOUS_WORDS,
+        KEYWORD_EMOJIS,
+        STEM_SUFFIXES,
+        STEM_MIN_LENGTH,
+        KEYWORD_MAX_WORDS,
+        CENSORED_EMOJI,
+    ]
+    payload = json.dumps(tables, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def match_case(masked: str, original: str) -> str:
+    return "".join(
+        char.upper() if source.isupper() else char
+        for char, source in zip(masked, original)
+    )
+
+
+def censor_text(text: str) -> Tuple[str, bool]:
+    """
+    Text with every heavy curse word masked, and whether any was.
+    """
+    censored, count = CURSE_PATTERN.subn(
+        lambda match: match_case(CURSE_STEMS[match.group(1).lower()], match.group(1))
+        + match.group(2),
+        text,
+    )
+    return censored, count > 0
+
+
+def find_emoji(text: str) -> Optional[str]:
+    """
+    Emoji of the text when its only word is in KEYWORD_EMOJIS, as is or
+    with a common suffix stripped.
+    """
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    if len(tokens) != 1:
+        return None
+    token = tokens[0]
+    emoji = KEYWORD_EMOJIS.get(token)
+    if emoji is not None:
+        return emoji
+    for suffix in STEM_SUFFIXES:
+        stem = token[: len(token) - len(suffix)]
+        if token.endswith(suffix) and len(stem) >= STEM_MIN_LENGTH:
+            emoji = KEYWORD_EMOJIS.get(stem)
+            if emoji is not None:
+                return emoji
+    return None
+
+
+def resolve(text: str) -> Optional[dict]:
+    """
+    SelectedEmoji fields for the text when the lexicon settles it: no word
+    needs judgement on censoring, and either a heavy curse was censored or
+    the text is a single keyword. None sends the text to the LLM.
+    """
+    if AMBIGUOUS_PATTERN.search(text):
+        return None
+    censored, is_censored = censor_text(text)
+    if is_censored:
+        emoji = CENSORED_EMOJI
+    elif len(text.split()) <= KEYWORD_MAX_WORDS:
+        emoji = find_emoji(text)
+    else:
+        emoji = None
+    if emoji is None:
+        return None
+    return {
+        "emoji": [emoji],
+        "censored_curse_text": censored if is_censored else None,
+        "censored_text": is_censored,
+    }
@@ -1,8 +1,22 @@
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI, RateLimitError, DEFAULT_TIMEOUT
 import instructor
+import httpx
 from pydantic import BaseModel, Field
+import asyncio
 import backoff
-from typing import List
+import hashlib
+import time
+from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from llm.rate_limit import (
+    TokenBucket,
+    AIMDLimiter,
+    get_retry_after,
+    DEFAULT_RETRY_AFTER,
+)
+from llm.memo import EmojiMemo
+from llm import lexicon
+from utils.emoji_index import EmojiIndex
 from transcription.models import Subtitles, SubtitleSegment
 
 TEMPERATURE = 0
@@ -10,6 +24,60 @@ SEED = 0
 # LLM_MODEL = "gpt-3.5-turbo"
 LLM_MODEL = "gpt-4o-2024-05-13"
 
+EMOJI_SYSTEM_TASK = (
+    "Return relevent 1 emoji, a single standard one without skin tones, flags or "
+    "joined sequences; censor only heavy curse words like this: F@#K, SH!T, etc. "
+    "Only censor heavy words like FUCK, BITCH, WHORE, FAGGOT. Don't change "
+    "punctuation"
+)
+EMOJI_CONTENT = "Return relevent emojis and censored version for the text: {word}."
+# Batched annotation: numbered segments in, one indexed result per segment out
+EMOJI_BATCH_SYSTEM_TASK = (
+    f"{EMOJI_SYSTEM_TASK}. You get numbered text segments, one per line as "
+    "'<index>: <text>'. Return exactly one item per segment with its index and "
+    "its text copied unchanged."
+)
+EMOJI_BATCH_CONTENT = (
+    "Return relevent emojis and censored versions for the segments:\n{lines}"
+)
+# Segments per request: larger windows mean fewer round trips but longer,
+# costlier retries when the model drops or garbles items
+EMOJI_BATCH_SIZE = 25
+# Rounds of re-requesting failed items, in windows half as large each round,
+# before falling back to one request each
+EMOJI_BATCH_RETRIES = 2
+# Requests kept in flight by the async path (upper bound, AIMD lowers it on
+# 429s); 1 keeps annotation synchronous
+EMOJI_CONCURRENCY = 8
+ASYNC_MAX_ATTEMPTS = 8
+
+
+def get_prompt_hash() -> str:
+    """
+    Fingerprint of every emoji prompt: part of each cache key over LLM output.
+    """
+    prompts = [
+        EMOJI_SYSTEM_TASK,
+        EMOJI_CONTENT,
+        EMOJI_BATCH_SYSTEM_TASK,
+        EMOJI_BATCH_CONTENT,
+    ]
+    return hashlib.sha256("\0".join(prompts).encode("utf-8")).hexdigest()
+
+
+def get_memo_settings(pack: str) -> dict:
+    """
+    Everything an emoji memo entry depends on; `pack` is the emoji pack
+    fingerprint, so answers are not carried over to another pack.
+    """
+    return {
+        "model": LLM_MODEL,
+        "temperature": TEMPERATURE,
+        "seed": SEED,
+        "prompt": get_prompt_hash(),
+        "pack": pack,
+    }
+
 
 class RateLimitException(Exception):
     pass
@@ -25,9 +93,190 @@ class SelectedEmoji(BaseModel):
     censored_text: bool = Field(False, title="If the text was censored")
 
 
+class IndexedEmoji(SelectedEmoji):
+    index: int = Field(..., title="Index of the segment")
+    text: str = Field(..., title="Text of the segment, unchanged")
+
+
+class EmojiBatch(BaseModel):
+    items: List[IndexedEmoji] = Field(..., title="One result per segment")
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def get_windows(pending: List[int], size: int) -> List[List[int]]:
+    return [pending[first:][:size] for first in range(0, len(pending), size)]
+
+
+def validate_batch(
+    batch: EmojiBatch, texts: Dict[int, str]
+) -> Dict[int, SelectedEmoji]:
+    """
+    Results of the batch that line up with the segments sent: known index,
+    echoed text matching the segment, not duplicated, and a censored text
+    whenever censoring is claimed.
+    """
+    results, seen = {}, set()
+    for item in batch.items:
+        if item.index not in texts or item.index in seen:
+            seen.add(item.index)
+            results.pop(item.index, None)
+            continue
+        seen.add(item.index)
+        if normalize_text(item.text) != normalize_text(texts[item.index]):
+            continue
+        if item.censored_text and not item.censored_curse_text:
+            continue
+        results[item.index] = SelectedEmoji(
+            emoji=item.emoji,
+            censored_curse_text=item.censored_curse_text,
+            censored_text=item.censored_text,
+        )
+    return results
+
+
+class AsyncAnnotation:
+    """
+    One async annotation run: an AsyncOpenAI client whose responses feed the
+    token bucket's rate limit headers, and an AIMD limit on requests in flight.
+    Requests hitting a 429 wait out Retry-After and are sent again.
+    """
+
+    def __init__(self, concurrency: int):
+        self.bucket = TokenBucket()
+        self.limiter = AIMDLimiter(concurrency)
+        self.openai = AsyncOpenAI(
+            max_retries=0,
+            http_client=httpx.AsyncClient(
+                timeout=DEFAULT_TIMEOUT,
+                follow_redirects=True,
+                event_hooks={"response": [self.observe]},
+            ),
+        )
+        self.client = instructor.patch(self.openai)
+
+    async def observe(self, response) -> None:
+        self.bucket.update(response.headers)
+
+    async def extract_model(self, system_task: str, content: str, response_model):
+        messages = [
+            {"role": "system", "content": system_task},
+            {"role": "user", "content": content},
+        ]
+        for attempt in range(ASYNC_MAX_ATTEMPTS):
+            await self.bucket.acquire()
+            started = await self.limiter.acquire()
+            try:
+                resp = await self.client.chat.completions.create(
+                    model=LLM_MODEL,
+                    temperature=TEMPERATURE,
+                    seed=SEED,
+                    messages=messages,
+                    response_model=response_model,
+                )
+            except RateLimitError as e:
+                self.limiter.on_rate_limited(started)
+                retry_after = get_retry_after(e.response.headers)
+                if retry_after is None:
+                    retry_after = DEFAULT_RETRY_AFTER * 2**attempt
+                self.bucket.pause(retry_after)
+                continue
+            finally:
+                await self.limiter.release()
+            self.limiter.on_success()
+            return resp
+        raise RateLimitException(f"Rate limited {ASYNC_MAX_ATTEMPTS} times in a row")
+
+    async def get_emoji(self, subtitle_segment: SubtitleSegment) -> SelectedEmoji:
+        content = EMOJI_CONTENT.format(word=subtitle_segment.word)
+        return await self.extract_model(EMOJI_SYSTEM_TASK, content, SelectedEmoji)
+
+    async def get_emoji_batch(self, texts: Dict[int, str]) -> Dict[int, SelectedEmoji]:
+        lines = "\n".join(f"{idx}: {text}" for idx, text in texts.items())
+        content = EMOJI_BATCH_CONTENT.format(lines=lines)
+        resp = await self.extract_model(EMOJI_BATCH_SYSTEM_TASK, content, EmojiBatch)
+        return validate_batch(resp, texts)
+
+    @staticmethod
+    async def settle(coroutines) -> list:
+        """
+        Results of the coroutines run concurrently, exceptions in place of
+        the results of those that failed. Whatever happens none of them is
+        left running: if this is cancelled they are cancelled and awaited.
+        """
+        tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+        try:
+            return await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def run(self, subtitles: Subtitles, batch_size: int) -> List[SelectedEmoji]:
+        """
+        Results in subtitle order. Windows are sent concurrently, with the
+        same re-request rounds and per-segment fallback as the sync path. A
+        segment whose own request still fails raises, once nothing else is
+        in flight.
+        """
+        segments = subtitles.subtitles
+        results: Dict[int, SelectedEmoji] = {}
+        pending = list(range(len(segments))) if batch_size > 1 else []
+        size = batch_size
+        for attempt in range(1 + EMOJI_BATCH_RETRIES):
+            if not pending:
+                break
+            if attempt:
+                size = max(1, size // 2)
+            windows = get_windows(pending, size)
+            batches = await self.settle(
+                self.get_emoji_batch({idx: segments[idx].word for idx in window})
+                for window in windows
+            )
+            for window, batch in zip(windows, batches):
+                if isinstance(batch, BaseException):
+                    print(f">> batch of {len(window)} failed: {type(batch).__name__}")
+                else:
+                    results.update(batch)
+            pending = [idx for idx in pending if idx not in results]
+
+        remaining = [idx for idx in range(len(segments)) if idx not in results]
+        singles = await self.settle(self.get_emoji(segments[idx]) for idx in remaining)
+        for single in singles:
+            if isinstance(single, BaseException):
+                raise single
+        results.update(zip(remaining, singles))
+        return [results[idx] for idx in range(len(segments))]
+
+    async def close(self) -> None:
+        await self.openai.close()
+
+
 class Client:
     client = instructor.patch(OpenAI())
 
+    def __init__(
+        self, memo: EmojiMemo | None = None, emoji_index: EmojiIndex | None = None
+    ):
+        self.memo = memo if memo is not None else EmojiMemo()
+        self.emoji_index = emoji_index if emoji_index is not None else EmojiIndex()
+
+    def constrain(self, resp: SelectedEmoji) -> SelectedEmoji:
+        """
+        The response with every emoji replaced by the one the pack draws for
+        it, dropping those it has nothing for.
+        """
+        if not len(self.emoji_index):
+            return resp
+        emoji = []
+        for candidate in resp.emoji:
+            resolved = self.emoji_index.resolve(candidate)
+            if resolved is not None and resolved not in emoji:
+                emoji.append(resolved)
+        return resp.model_copy(update={"emoji": emoji})
+
     @backoff.on_exception(
         backoff.expo,
         Exception,
@@ -57,20 +306,158 @@ class Client:
                 raise e
 
     def get_emoji(self, subtitle_segment: SubtitleSegment):
-        system_task = "Return relevent 1 emoji; censor only heavy curse words like this: F@#K, SH!T, etc. Only censor heavy words like FUCK, BITCH, WHORE, FAGGOT. Don't change punctuation"
-        content = f"Return relevent emojis and censored version for the text: {subtitle_segment.word}."
-        resp = self.extract_model(system_task, content, SelectedEmoji)
+        content = EMOJI_CONTENT.format(word=subtitle_segment.word)
+        resp = self.extract_model(EMOJI_SYSTEM_TASK, content, SelectedEmoji)
         print(f">> {subtitle_segment.word} | {resp.emoji} | {resp.censored_curse_text} | {resp.censored_text}")
         return resp
 
-    def get_emojis(self, subtitles: Subtitles) -> Subtitles:
+    def get_emoji_batch(self, texts: Dict[int, str]) -> Dict[int, SelectedEmoji]:
+        """
+        Annotate several segments in one request; returns the valid results
+        by index, possibly fewer than asked for.
+        """
+        lines = "\n".join(f"{idx}: {text}" for idx, text in texts.items())
+        content = EMOJI_BATCH_CONTENT.format(lines=lines)
+        resp = self.extract_model(EMOJI_BATCH_SYSTEM_TASK, content, EmojiBatch)
+        results = validate_batch(resp, texts)
+        print(f">> batch of {len(texts)}: {len(results)} valid")
+        return results
+
+    def get_emojis_batched(
+        self, subtitles: Subtitles, batch_size: int = EMOJI_BATCH_SIZE
+    ) -> List[SelectedEmoji]:
+        """
+        Results for every segment, `batch_size` segments per request. Items
+        missing or misaligned in a response, and every item of a request that
+        failed or returned a malformed response, are re-requested in windows
+        half as large, up to EMOJI_BATCH_RETRIES times, then one by one.
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+        segments = subtitles.subtitles
+        results: Dict[int, SelectedEmoji] = {}
+        pending = list(range(len(segments)))
+        size = batch_size
+        for attempt in range(1 + EMOJI_BATCH_RETRIES):
+            if not pending:
+                break
+            if attempt:
+                size = max(1, size // 2)
+                print(f">> re-requesting {len(pending)} segments, {size} per request")
+            for window in get_windows(pending, size):
+                texts = {idx: segments[idx].word for idx in window}
+                try:
+                    results.update(self.get_emoji_batch(texts))
+                except Exception as e:
+                    print(f">> batch of {len(window)} failed: {type(e).__name__}")
+            pending = [idx for idx in pending if idx not in results]
+        for idx in pending:
+            results[idx] = self.get_emoji(segments[idx])
+        return [results[idx] for idx in range(len(segments))]
+
+    @staticmethod
+    def apply_emoji(subtitle_segment: SubtitleSegment, resp: SelectedEmoji) -> None:
+        subtitle_segment.emoji = resp.emoji
+        if resp.censored_text:
+            subtitle_segment.word = resp.censored_curse_text
+            subtitle_segment.censored = True
+
+    async def get_emojis_async(
+        self,
+        subtitles: Subtitles,
+        batch_size: int = EMOJI_BATCH_SIZE,
+        concurrency: int = EMOJI_CONCURRENCY,
+    ) -> List[SelectedEmoji]:
+        started = time.time()
+        annotation = AsyncAnnotation(concurrency)
+        try:
+            responses = await annotation.run(subtitles, batch_size)
+        finally:
+            await annotation.close()
+        print(
+            f">> {len(responses)} segments in {time.time() - started:.1f}s, "
+            f"{annotation.limiter.cuts} rate limit cuts"
+        )
+        return responses
+
+    def annotate(
+        self, subtitles: Subtitles, batch_size: int, concurrency: int
+    ) -> List[SelectedEmoji]:
+        """
+        LLM results for every segment, in order. batch_size 1 sends one request
+        per segment; concurrency above 1 keeps that many requests in flight.
+        Async callers can await get_emojis_async() directly; called from a
+        running event loop this blocks it while a worker thread annotates.
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+        if not subtitles.subtitles:
+            return []
+        if concurrency > 1:
+            annotation = self.get_emojis_async(subtitles, batch_size, concurrency)
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return asyncio.run(annotation)
+            # asyncio.run() cannot nest, run the annotation on its own loop
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                return executor.submit(asyncio.run, annotation).result()
+        if batch_size == 1:
+            return [self.get_emoji(segment) for segment in subtitles.subtitles]
+        return self.get_emojis_batched(subtitles, batch_size)
+
+    def get_emojis(
+        self,
+        subtitles: Subtitles,
+        batch_size: int = EMOJI_BATCH_SIZE,
+        concurrency: int = EMOJI_CONCURRENCY,
+    ) -> Subtitles:
+        """
+        Emoji and censoring for every segment. Texts the local lexicon settles
+        never reach the LLM; texts answered before (by any video, under the
+        same model settings, prompts and emoji pack) come from the memo in one
+        lookup; each distinct remaining text is sent to the LLM once and its
+        answer stored.
+        """
+        segments = subtitles.subtitles
+        texts = [normalize_text(segment.word) for segment in segments]
+        # First segment of each distinct text speaks for all of them
+        firsts = {}
+        for segment, text in zip(segments, texts):
+            firsts.setdefault(text, segment)
+
+        known = {}
+        for text, segment in firsts.items():
+            fields = lexicon.resolve(segment.word)
+            if fields is not None:
+                known[text] = SelectedEmoji(**fields)
+        local = len(known)
+
+        settings = get_memo_settings(self.emoji_index.get_fingerprint())
+        pending = [text for text in firsts if text not in known]
+        known.update(self.memo.get_many(pending, SelectedEmoji, **settings))
+        misses = [text for text in pending if text not in known]
+        responses = self.annotate(
+            Subtitles(subtitles=[firsts[text] for text in misses]),
+            batch_size,
+            concurrency,
+        )
+        self.memo.put_many(list(zip(misses, responses)), **settings)
+        known.update(zip(misses, responses))
+
+        hits = sum(text not in misses for text in texts)
+        print(
+            f">> emoji: {hits}/{len(texts)} segments "
+            f"({100 * hits / max(len(texts), 1):.0f}%) without a request, "
+            f"{local} distinct texts from the lexicon, "
+            f"{len(pending) - len(misses)} from memo, "
+            f"{len(misses)} sent to {LLM_MODEL}"
+        )
+
         new_subtitles = Subtitles(subtitles=[])
-        for idx, subtitle_segment in enumerate(subtitles.subtitles):
-            resp = self.get_emoji(subtitle_segment)
-            subtitle_segment.emoji = resp.emoji
-            if resp.censored_text:
-                subtitle_segment.word = resp.censored_curse_text
-                subtitle_segment.censored = True
+        constrained = {text: self.constrain(resp) for text, resp in known.items()}
+        for subtitle_segment, text in zip(segments, texts):
+            self.apply_emoji(subtitle_segment, constrained[text])
             new_subtitles.subtitles.append(subtitle_segment)
 
         return new_subtitles
@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple, Type
+
+from pydantic import BaseModel
+
+from utils.utils import CACHE_PATH
+
+MEMO_PATH = os.path.join(CACHE_PATH, "llm", "emoji_memo.sqlite")
+# Bound variables per SELECT ... IN (...), below SQLite's limit
+MEMO_QUERY_CHUNK = 500
+MEMO_TIMEOUT = 30.0  # seconds to wait for another process's write lock
+
+
+class EmojiMemo:
+    """
+    Persistent memo of LLM annotations shared by every video and process.
+    Rows are keyed by a hash of the normalized text together with the model
+    settings and prompt fingerprint the caller passes, so changing any of
+    those misses instead of returning stale answers.
+    """
+
+    def __init__(self, db_path: str = MEMO_PATH):
+        self.db_path = db_path
+
+    @contextmanager
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        connection = sqlite3.connect(self.db_path, timeout=MEMO_TIMEOUT)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS memo ("
+                " key TEXT PRIMARY KEY,"
+                " text TEXT NOT NULL,"
+                " response TEXT NOT NULL,"
+                " created REAL NOT NULL,"
+                " hits INTEGER NOT NULL DEFAULT 0)"
+            )
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def get_key(text: str, **settings) -> str:
+        payload = json.dumps(
+            {"text": text, **settings}, sort_keys=True, ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_many(
+        self, texts: List[str], model_class: Type[BaseModel], **settings
+    ) -> Dict[str, BaseModel]:
+        """
+        Stored responses for the texts that have one, by text.
+        """
+        keys = {self.get_key(text, **settings): text for text in texts}
+        found = {}
+        key_list = list(keys)
+        with self._connect() as connection:
+            for first in range(0, len(key_list), MEMO_QUERY_CHUNK):
+                last = first + MEMO_QUERY_CHUNK
+                chunk = key_list[first:last]
+                placeholders = ",".join("?" * len(chunk))
+                rows = connection.execute(
+                    f"SELECT key, response FROM memo WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                for key, response in rows:
+                    found[keys[key]] = model_class.model_validate_json(response)
+                if rows:
+                    connection.executemany(
+                        "UPDATE memo SET hits = hits + 1 WHERE key = ?",
+                        [(key,) for key, _ in rows],
+                    )
+        return found
+
+    def put_many(self, items: List[Tuple[str, BaseModel]], **settings) -> None:
+        now = time.time()
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO memo (key, text, response, created)"
+                " VALUES (?, ?, ?, ?)",
+                [
+                    (self.get_key(text, **settings), text, model.model_dump_json(), now)
+                    for text, model in items
+                ],
+            )
+
+    def stats(self) -> dict:
+        with self._connect() as connection:
+            entries, hits = connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM memo"
+            ).fetchone()
+        return {"entries": entries, "hits": hits}
@@ -0,0 +1,150 @@
+import asyncio
+import re
+import time
+from typing import Mapping, Optional
+
+# Requests per second before the first rate limit headers arrive
+DEFAULT_REQUEST_RATE = 5.0
+DEFAULT_BURST = 5
+# Wait after a 429 that carries no Retry-After
+DEFAULT_RETRY_AFTER = 1.0  # seconds
+# AIMD: concurrency grows by AIMD_INCREASE per window of successes and is
+# multiplied by AIMD_DECREASE on a rate limit
+AIMD_INCREASE = 1.0
+AIMD_DECREASE = 0.5
+
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """
+    Seconds in an OpenAI reset header ("1s", "6m0s", "20ms"), None if unparsable.
+    """
+    parts = DURATION_PART.findall(value or "")
+    if not parts:
+        return None
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def get_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Seconds to wait according to retry-after-ms or retry-after.
+    """
+    try:
+        if headers.get("retry-after-ms") is not None:
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after") is not None:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+class TokenBucket:
+    """
+    Request rate limiter for one event loop. Refills at `rate` tokens per
+    second up to `capacity`; the rate follows x-ratelimit-limit-requests and
+    an exhausted x-ratelimit-remaining-requests or a Retry-After pauses it.
+    """
+
+    def __init__(
+        self, rate: float = DEFAULT_REQUEST_RATE, capacity: int = DEFAULT_BURST
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        now = time.monotonic()
+        self.paused_until = max(self.paused_until, now + seconds)
+        self._refill(now)
+        self.tokens = 0.0
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        limit = headers.get("x-ratelimit-limit-requests")
+        if limit is not None and limit.isdigit() and int(limit) > 0:
+            # Limits are per minute
+            self._refill(time.monotonic())
+            self.rate = int(limit) / 60
+        remaining = headers.get("x-ratelimit-remaining-requests")
+        if remaining is not None and remaining.isdigit() and int(remaining) == 0:
+            reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+            if reset:
+                self.pause(reset)
+
+
+class AIMDLimiter:
+    """
+    Concurrency limit that grows additively while requests succeed and halves
+    when a rate limit hits. Only a 429 on a request started after the last
+    cut cuts again, so one burst of 429s counts once.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        increase: float = AIMD_INCREASE,
+        decrease: float = AIMD_DECREASE,
+    ):
+        if max_concurrency < min_concurrency:
+            raise ValueError(
+                f"max_concurrency {max_concurrency} is below "
+                f"min_concurrency {min_concurrency}"
+            )
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.increase = increase
+        self.decrease = decrease
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self.last_cut = 0.0
+        self.cuts = 0
+        self.condition = asyncio.Condition()
+
+    async def acquire(self) -> float:
+        """
+        Wait for a free slot; returns the start time to report back with.
+        """
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        return time.monotonic()
+
+    async def release(self) -> None:
+        async with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def on_success(self) -> None:
+        # About +increase per round trip at the current limit
+        self.limit = min(self.max_concurrency, self.limit + self.increase / self.limit)
+
+    def on_rate_limited(self, started: float) -> None:
+        if started < self.last_cut:
+            return
+        self.limit = max(self.min_concurrency, self.limit * self.decrease)
+        self.last_cut = time.monotonic()
+        self.cuts += 1
+        print(f">> rate limited, concurrency down to {int(self.limit)}")
@@ -1,6 +1,9 @@
 import os
 import shutil
 
+from utils.emoji_atlas import build_atlas
+from utils.utils import EMOJI_ATLAS_PATH
+
 def create_directory_structure(base_dir, structure):
     for dir_path in structure:
         os.makedirs(os.path.join(base_dir, dir_path), exist_ok=True)
@@ -43,6 +46,11 @@ if __name__ == "__main__":
     src_emoji_pack = "./setup/ios_emoji_pack"
     dest_emoji_pack = os.path.join(base_directory, "ios_emoji_pack")
     copy_emoji_pack(src_emoji_pack, dest_emoji_pack)
+
+    # Pre-decode the pack into the memory-mapped atlas the editor renders from
+    if os.path.exists(dest_emoji_pack):
+        count = build_atlas(dest_emoji_pack, EMOJI_ATLAS_PATH)
+        print(f"Packed {count} emoji into {EMOJI_ATLAS_PATH}")
     
     # Copy other base files from setup directory to base_directory
     src_setup_dir = "./setup"
@@ -0,0 +1,141 @@
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Batches with this word get a response that fails validation
+GARBLED_WORD = "garbled"
+# And single requests for this word too
+BROKEN_WORD = "broken"
+LATENCY = (0.05, 0.15)  # seconds, random per request
+
+
+def fake_emoji(text: str) -> dict:
+    censored = text == "shit"
+    return {
+        "emoji": [f"e{len(text)}"],
+        "censored_curse_text": "SH!T" if censored else None,
+        "censored_text": censored,
+    }
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """
+    Chat completions stand-in answering the emoji tools with fake_emoji().
+    It serves at most `server.capacity` requests at once and rejects the
+    rest with a 429.
+    """
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, status: int, payload: dict, headers: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.requests += 1
+            rejected = server.in_flight >= server.capacity
+            if rejected:
+                server.rejected += 1
+            else:
+                server.in_flight += 1
+        headers = {
+            "x-ratelimit-limit-requests": "6000",
+            "x-ratelimit-remaining-requests": "5999",
+        }
+        if rejected:
+            headers["retry-after-ms"] = "50"
+            error = {
+                "error": {
+                    "message": "Rate limit reached",
+                    "type": "requests",
+                    "code": "rate_limit_exceeded",
+                }
+            }
+            self.send_json(429, error, headers)
+            return
+        try:
+            time.sleep(server.rng.uniform(*LATENCY))
+            tool = request["tools"][0]["function"]["name"]
+            content = request["messages"][-1]["content"]
+            if tool == "EmojiBatch":
+                items = []
+                for line in content.split("\n")[1:]:
+                    idx, text = line.split(": ", 1)
+                    items.append({"index": int(idx), "text": text, **fake_emoji(text)})
+                arguments = {"items": items}
+                if GARBLED_WORD in content:
+                    with server.lock:
+                        server.garbled += 1
+                    arguments = {"items": "not a list"}
+            else:
+                text = content.rsplit(": ", 1)[1].rstrip(".")
+                with server.lock:
+                    server.singles.append(text)
+                arguments = fake_emoji(text)
+                if text == BROKEN_WORD:
+                    arguments = {"emoji": "not a list"}
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+        completion = {
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": request["model"],
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {
+                        "role": "assistant",
+                        "content": None,
+                        "tool_calls": [
+                            {
+                                "id": "call-test",
+                                "type": "function",
+                                "function": {
+                                    "name": tool,
+                                    "arguments": json.dumps(arguments),
+                                },
+                            }
+                        ],
+                    },
+                }
+            ],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }
+        self.send_json(200, completion, headers)
+
+
+@contextmanager
+def serve_fake_openai(capacity: int = 1000):
+    """
+    A running fake server; its `base_url` is the OpenAI base URL to use.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAIHandler)
+    server.capacity = capacity
+    server.lock = threading.Lock()
+    server.rng = random.Random(0)
+    server.in_flight = server.requests = server.rejected = server.garbled = 0
+    server.singles = []
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,27 @@
+import subprocess as sp
+from typing import Optional, Tuple
+
+from moviepy.config import get_setting
+
+
+def make_video(
+    path: str,
+    duration: float,
+    size: Tuple[int, int] = (64, 48),
+    fps: int = 30,
+    source: str = "testsrc2",
+    frequency: Optional[float] = None,
+) -> str:
+    """
+    H.264 clip of an ffmpeg test pattern, every frame different, with a sine
+    tone of `frequency` Hz as its audio when one is given.
+    """
+    width, height = size
+    cmd = [get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error"]
+    cmd += ["-f", "lavfi", "-i", f"{source}=s={width}x{height}:r={fps}:d={duration}"]
+    if frequency is not None:
+        cmd += ["-f", "lavfi", "-i", f"sine=frequency={frequency}:duration={duration}"]
+        cmd += ["-c:a", "aac", "-shortest"]
+    cmd += ["-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p"]
+    sp.run(cmd + [path], check=True)
+    return path
@@ -0,0 +1,157 @@
+import asyncio
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import pytest  # noqa: E402
+
+from fake_openai import (  # noqa: E402
+    BROKEN_WORD,
+    GARBLED_WORD,
+    LATENCY,
+    fake_emoji,
+    serve_fake_openai,
+)
+from llm.main import AsyncAnnotation, Client  # noqa: E402
+from llm.memo import EmojiMemo  # noqa: E402
+from llm.rate_limit import AIMDLimiter, get_retry_after, parse_duration  # noqa: E402
+from transcription.models import Subtitles, SubtitleSegment  # noqa: E402
+from utils.emoji_index import EmojiIndex  # noqa: E402
+
+# The fake server answers at most SERVER_CAPACITY requests at once and
+# rejects the rest with a 429
+SERVER_CAPACITY = 3
+CONCURRENCY = 8
+BATCH_SIZE = 5
+
+
+def make_subtitles(n: int) -> Subtitles:
+    words = ["yeah", "you know", "shit", "dude", "what"]
+    return Subtitles(
+        subtitles=[
+            SubtitleSegment(word=words[i % len(words)], start=i, end=i + 1)
+            for i in range(n)
+        ]
+    )
+
+
+def run_annotation(subtitles: Subtitles, batch_size: int):
+    async def run():
+        annotation = AsyncAnnotation(CONCURRENCY)
+        try:
+            return await annotation.run(subtitles, batch_size), annotation.limiter
+        finally:
+            await annotation.close()
+
+    return asyncio.run(run())
+
+
+def test_rate_limit_header_parsing():
+    assert parse_duration("6m0s") == 360.0
+    assert parse_duration("20ms") == 0.02
+    assert parse_duration("") is None
+    assert get_retry_after({"retry-after-ms": "50"}) == 0.05
+    assert get_retry_after({"retry-after": "2"}) == 2.0
+    assert get_retry_after({}) is None
+
+
+def test_aimd_limiter_cuts_once_per_burst():
+    async def run():
+        limiter = AIMDLimiter(8)
+        started = [await limiter.acquire() for _ in range(4)]
+        for t in started:
+            limiter.on_rate_limited(t)
+        assert limiter.limit == 4 and limiter.cuts == 1
+        for _ in range(4):
+            await limiter.release()
+        for _ in range(8):
+            limiter.on_success()
+        assert 5 < limiter.limit <= 6
+
+    asyncio.run(run())
+
+
+def test_async_annotation_against_fake_server(monkeypatch):
+    with serve_fake_openai(SERVER_CAPACITY) as server:
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        subtitles = make_subtitles(120)
+        started = time.monotonic()
+        responses, limiter = run_annotation(subtitles, BATCH_SIZE)
+        elapsed = time.monotonic() - started
+
+        singles, _ = run_annotation(make_subtitles(12), 1)
+
+    expected = [fake_emoji(segment.word) for segment in subtitles.subtitles]
+    assert [r.model_dump() for r in responses] == expected
+    assert [r.model_dump() for r in singles] == expected[:12]
+
+    # The server turned requests away, the limiter backed off, and still
+    # several windows were in flight at once
+    assert server.rejected > 0
+    assert limiter.cuts > 0
+    windows = len(subtitles.subtitles) // BATCH_SIZE
+    serial_time = windows * sum(LATENCY) / 2
+    assert elapsed < serial_time / 1.5
+
+
+def test_async_malformed_windows_are_requested_again(monkeypatch):
+    words = [f"word {idx}" for idx in range(20)]
+    words[7] = GARBLED_WORD
+    subtitles = Subtitles(
+        subtitles=[
+            SubtitleSegment(word=word, start=idx, end=idx + 1)
+            for idx, word in enumerate(words)
+        ]
+    )
+    with serve_fake_openai() as server:
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        responses, _ = run_annotation(subtitles, BATCH_SIZE)
+
+    assert [r.model_dump() for r in responses] == [fake_emoji(w) for w in words]
+    # Windows of 5, 2 and 1 came back garbled, then only that item went alone
+    assert server.garbled == 3
+    assert server.singles == [GARBLED_WORD]
+
+
+def test_async_failure_leaves_nothing_running(monkeypatch):
+    subtitles = Subtitles(
+        subtitles=[
+            SubtitleSegment(word=word, start=idx, end=idx + 1)
+            for idx, word in enumerate(["yeah", BROKEN_WORD, "dude", "what"])
+        ]
+    )
+
+    async def run():
+        annotation = AsyncAnnotation(CONCURRENCY)
+        try:
+            with pytest.raises(Exception):
+                await annotation.run(subtitles, 1)
+            return asyncio.all_tasks()
+        finally:
+            await annotation.close()
+
+    with serve_fake_openai() as server:
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        tasks = asyncio.run(run())
+
+    assert len(tasks) == 1  # only the test coroutine itself
+    assert sorted(server.singles) == sorted(["yeah", BROKEN_WORD, "dude", "what"])
+
+
+def test_annotate_inside_running_loop(tmp_path, monkeypatch):
+    subtitles = make_subtitles(6)
+    client = Client(
+        memo=EmojiMemo(str(tmp_path / "memo.sqlite")),
+        emoji_index=EmojiIndex(str(tmp_path / "no_pack")),
+    )
+
+    async def run():
+        return client.annotate(subtitles, BATCH_SIZE, CONCURRENCY)
+
+    with serve_fake_openai() as server:
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        responses = asyncio.run(run())
+
+    expected = [fake_emoji(segment.word) for segment in subtitles.subtitles]
+    assert [r.model_dump() for r in responses] == expected
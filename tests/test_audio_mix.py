@@ -0,0 +1,96 @@
+import subprocess as sp
+
+import numpy as np
+import pytest
+from moviepy.config import get_setting
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+from editor.audio import BACKGROUND_GAIN, BLEEP_GAIN, DUCK_GAIN, DUCK_RAMP, mix_audio
+from transcription.models import Subtitles, SubtitleSegment
+from utils.audio import AUDIO_FPS, decode_pcm
+
+CENSORED = Subtitles(
+    subtitles=[SubtitleSegment(word="SH!T", start=0.5, end=1.0, censored=True)]
+)
+
+
+def make_media(path: str, duration: float = 1, frequency: float = None) -> str:
+    """
+    Black video, with a sine tone of `frequency` Hz when one is given.
+    """
+    cmd = [get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error"]
+    cmd += ["-f", "lavfi", "-i", f"color=c=black:s=64x64:r=10:d={duration}"]
+    if frequency is not None:
+        cmd += ["-f", "lavfi", "-i", f"sine=frequency={frequency}:duration={duration}"]
+    sp.run(cmd + ["-shortest", path], check=True)
+    return path
+
+
+def decode_main(path: str) -> np.ndarray:
+    duration = ffmpeg_parse_infos(path)["duration"]
+    return decode_pcm(path, duration=duration)[: int(round(duration * AUDIO_FPS))]
+
+
+def test_background_is_trimmed_and_turned_down(tmp_path):
+    main_path = make_media(str(tmp_path / "main.mp4"), duration=2)
+    background_path = make_media(str(tmp_path / "bg.mp4"), duration=4, frequency=660)
+
+    # Not a whole number of periods of the tone, so a wrong offset shows
+    track = mix_audio(main_path, background_path, 1.37, Subtitles(subtitles=[]))
+    duration = ffmpeg_parse_infos(main_path)["duration"]
+    background = decode_pcm(background_path, 1.37, duration)[: len(track)]
+    assert len(background) == len(track)
+    np.testing.assert_allclose(track, background * BACKGROUND_GAIN, atol=1e-6)
+    assert np.abs(track).max() > 0.01
+
+
+def test_bleep_replaces_speech_only_in_censored_interval(tmp_path):
+    main_path = make_media(str(tmp_path / "main.mp4"), duration=2, frequency=440)
+    background_path = make_media(str(tmp_path / "bg.mp4"), duration=4)
+    bleep_path = make_media(str(tmp_path / "bleep.mp4"), frequency=1000)
+
+    track = mix_audio(main_path, background_path, 0.0, CENSORED, bleep_path=bleep_path)
+    speech = decode_main(main_path)
+    bleep = decode_pcm(bleep_path)
+    assert track.shape == speech.shape
+
+    ramp = int(DUCK_RAMP * AUDIO_FPS) + 1
+    first, last = int(0.5 * AUDIO_FPS), int(1.0 * AUDIO_FPS)
+    outside = np.concatenate(
+        [np.arange(0, first - ramp), np.arange(last + ramp, len(track))]
+    )
+    inside = np.arange(first + ramp, last - ramp)
+
+    # Untouched speech and no bleep energy outside the censored interval
+    np.testing.assert_allclose(track[outside], speech[outside], atol=1e-6)
+    # Inside it the bleep plays from its start over speech at DUCK_GAIN
+    expected = speech[inside] * DUCK_GAIN + bleep[inside - first] * BLEEP_GAIN
+    np.testing.assert_allclose(track[inside], expected, atol=1e-5)
+    residual = track[inside] - speech[inside] * DUCK_GAIN
+    assert np.abs(residual).max() > 0.9 * BLEEP_GAIN * np.abs(bleep).max()
+
+
+def test_bleep_without_samples_is_an_error(tmp_path):
+    video_path = make_media(str(tmp_path / "main.mp4"), frequency=440)
+    silent_path = make_media(str(tmp_path / "silent.mp4"))
+    subtitles = Subtitles(
+        subtitles=[SubtitleSegment(word="SH!T", start=0.2, end=0.6, censored=True)]
+    )
+
+    track = mix_audio(video_path, video_path, 0.0, subtitles, bleep_path=video_path)
+    assert track.shape[1] == 2 and len(track) > 0
+    with pytest.raises(ValueError, match="no samples"):
+        mix_audio(video_path, video_path, 0.0, subtitles, bleep_path=silent_path)
+
+
+def test_missing_bleep_only_ducks(tmp_path):
+    video_path = make_media(str(tmp_path / "main.mp4"), frequency=440)
+    subtitles = Subtitles(
+        subtitles=[SubtitleSegment(word="SH!T", start=0.2, end=0.6, censored=True)]
+    )
+    missing_path = str(tmp_path / "missing.mp3")
+
+    track = mix_audio(video_path, video_path, 0.0, subtitles, bleep_path=missing_path)
+    clean = mix_audio(video_path, video_path, 0.0, Subtitles(subtitles=[]))
+    assert track.shape == clean.shape
+    assert (abs(track) <= abs(clean) + 1e-6).all()
@@ -0,0 +1,44 @@
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import instructor  # noqa: E402
+from openai import OpenAI  # noqa: E402
+
+from fake_openai import GARBLED_WORD, fake_emoji, serve_fake_openai  # noqa: E402
+from llm.main import Client  # noqa: E402
+from llm.memo import EmojiMemo  # noqa: E402
+from transcription.models import Subtitles, SubtitleSegment  # noqa: E402
+from utils.emoji_index import EmojiIndex  # noqa: E402
+
+
+def make_client(tmp_path, base_url: str) -> Client:
+    client = Client(
+        memo=EmojiMemo(str(tmp_path / "memo.sqlite")),
+        emoji_index=EmojiIndex(str(tmp_path / "no_pack")),
+    )
+    client.client = instructor.patch(OpenAI(base_url=base_url, api_key="test"))
+    return client
+
+
+def make_subtitles(words) -> Subtitles:
+    return Subtitles(
+        subtitles=[
+            SubtitleSegment(word=word, start=idx, end=idx + 1)
+            for idx, word in enumerate(words)
+        ]
+    )
+
+
+def test_malformed_batches_are_requested_again(tmp_path):
+    words = [f"word {idx}" for idx in range(10)]
+    words[3] = GARBLED_WORD
+    with serve_fake_openai() as server:
+        client = make_client(tmp_path, server.base_url)
+        responses = client.get_emojis_batched(make_subtitles(words), batch_size=4)
+
+    assert [r.model_dump() for r in responses] == [fake_emoji(w) for w in words]
+    # Windows of 4, 2 and 1 around the garbled segment fail, then it is sent
+    # on its own
+    assert server.garbled == 3
+    assert server.singles == [GARBLED_WORD]
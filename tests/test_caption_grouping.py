@@ -0,0 +1,61 @@
+from transcription.columnar import SubtitleColumns
+from transcription.grouping import CaptionLimits, group_captions
+from transcription.models import Subtitles, SubtitleSegment
+
+
+def make_columns(words):
+    return SubtitleColumns.from_subtitles(
+        Subtitles(
+            subtitles=[
+                SubtitleSegment(
+                    word=word, start=start, end=end, emoji=emoji, censored=censored
+                )
+                for word, start, end, emoji, censored in words
+            ]
+        )
+    )
+
+
+def test_limits_split_captions():
+    columns = make_columns(
+        [
+            ("so", 0.0, 0.2, [], False),
+            ("what", 0.25, 0.4, ["🤔"], False),
+            ("the", 0.45, 0.5, [], False),
+            ("F@#K.", 0.55, 0.8, ["🤬"], True),  # fourth word, over max_words
+            ("is", 0.85, 0.9, [], False),  # after a sentence end
+            ("happening", 0.95, 1.3, ["😱"], False),
+            ("here", 2.0, 2.1, [], False),  # after a long pause
+        ]
+    )
+    limits = CaptionLimits(
+        max_chars=16, max_words=3, min_duration=0.4, gap_threshold=0.35
+    )
+    captions = group_captions(columns, limits).to_subtitles().subtitles
+
+    assert [c.word for c in captions] == [
+        "so what the",
+        "F@#K.",
+        "is happening",
+        "here",
+    ]
+    assert [c.emoji for c in captions] == [["🤔"], ["🤬"], ["😱"], []]
+    assert [c.censored for c in captions] == [False, True, False, False]
+    assert [c.start for c in captions] == [0.0, 0.55, 0.85, 2.0]
+    # Held for min_duration, but never into the next caption
+    assert [c.end for c in captions] == [0.5, 0.85, 1.3, 2.4]
+
+
+def test_char_limit_and_oversized_words():
+    columns = make_columns(
+        [
+            ("incomprehensibilities", 0.0, 0.5, [], False),
+            ("a", 0.5, 0.6, [], False),
+            ("bb", 0.6, 0.7, [], False),
+            ("cccc", 0.7, 0.8, [], False),
+        ]
+    )
+    limits = CaptionLimits(max_chars=6, max_words=5)
+    captions = group_captions(columns, limits).to_subtitles().subtitles
+    assert [c.word for c in captions] == ["incomprehensibilities", "a bb", "cccc"]
+    assert len(group_captions(make_columns([]), limits)) == 0
@@ -0,0 +1,92 @@
+import os
+import subprocess as sp
+
+import numpy as np
+import pytest
+from moviepy.config import get_setting
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import editor.main  # noqa: E402
+from editor.main import (  # noqa: E402
+    build_chunked,
+    compose_video,
+    get_plan,
+    mix_track,
+    write_clip,
+)
+from editor.preview import RenderSettings  # noqa: E402
+from editor.text_render import render_text_pillow  # noqa: E402
+from lavfi import make_video  # noqa: E402
+from test_text_render import find_font  # noqa: E402
+from transcription.models import Subtitles, SubtitleSegment  # noqa: E402
+from utils.utils import Path  # noqa: E402
+
+# Seconds of main video, long enough that later chunks seek rather than read on
+DURATION = 12
+WORDS = ["one", "two", "three", "four", "five", "six", "seven"]
+
+
+def read_frames(video_path: str) -> np.ndarray:
+    width, height = ffmpeg_parse_infos(video_path)["video_size"]
+    cmd = [get_setting("FFMPEG_BINARY"), "-loglevel", "error", "-i", video_path]
+    cmd += ["-f", "rawvideo", "-pix_fmt", "rgb24", "-"]
+    data = sp.run(cmd, check=True, stdout=sp.PIPE).stdout
+    return np.frombuffer(data, dtype=np.uint8).reshape(-1, height, width, 3)
+
+
+@pytest.fixture
+def short(tmp_path, monkeypatch):
+    """
+    A short's inputs under tmp_path, captions rendered with Pillow.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(editor.main.TEXT_RENDERERS, "imagemagick", render_text_pillow)
+    monkeypatch.setitem(editor.main.black_jetbrainsMono_gold, "font", find_font())
+    os.makedirs("assets/downloads")
+    make_video("assets/downloads/main.mp4", DURATION, (160, 120), frequency=440)
+    make_video(
+        "assets/bg.mp4", 2 * DURATION, (160, 120), source="testsrc", frequency=220
+    )
+
+    path = Path(raw_name="main", lower_video_name="bg", output_name="out")
+    # Segments across the chunk boundaries, one-frame gaps between some
+    step = DURATION / len(WORDS)
+    subtitles = Subtitles(
+        subtitles=[
+            SubtitleSegment(word=word, start=idx * step, end=(idx + 0.9) * step)
+            for idx, word in enumerate(WORDS)
+        ]
+    )
+    return path, subtitles
+
+
+@pytest.mark.parametrize("time_range", [None, (4.5, 10.3)])
+def test_chunked_matches_serial(short, time_range):
+    path, subtitles = short
+    plan = get_plan(path)
+    settings = RenderSettings(preset="ultrafast", crf=0, time_range=time_range)
+
+    build_chunked(path, subtitles, "chunked.mp4", 3, plan, settings)
+
+    final_video = compose_video(
+        path, subtitles, plan.background_start, time_range, fps=settings.fps
+    )
+    frame_range = settings.get_frame_range(final_video.duration)
+    write_clip(
+        final_video,
+        "serial.mp4",
+        encoder="ffmpeg",
+        fps=settings.fps,
+        preset=settings.preset,
+        crf=settings.crf,
+        frame_range=frame_range,
+        audio_track=mix_track(path, subtitles, plan, frame_range, settings.fps),
+    )
+
+    serial = read_frames("serial.mp4")
+    assert len(serial) == frame_range[1] - frame_range[0]
+    assert np.array_equal(read_frames("chunked.mp4"), serial)
+    # Only the output is left next to it
+    assert sorted(os.listdir(".")) == ["assets", "chunked.mp4", "serial.mp4"]
@@ -0,0 +1,207 @@
+import json
+import os
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import default
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from openai import OpenAI
+
+from editor.audio import write_track
+from transcription.chunking import (
+    AudioChunk,
+    find_silences,
+    merge_chunk_words,
+    plan_chunks,
+    transcribe_chunked,
+)
+from utils.audio import decode_pcm
+
+SAMPLE_RATE = 16000
+WORD_DURATION = 0.3
+# Each word is a tone burst whose pitch encodes its index
+BASE_FREQUENCY = 300.0
+FREQUENCY_STEP = 50.0
+WORKERS = 2
+REQUEST_LATENCY = 0.2
+
+
+def tone_words():
+    """
+    (start, index) of every word: short gaps within phrases, long pauses
+    between them, and one long phrase without any pause to force a hard cut.
+    """
+    words, t, idx = [], 0.5, 0
+    for phrase_length in (4, 4, 14, 3):
+        for _ in range(phrase_length):
+            words.append((t, idx))
+            t += WORD_DURATION + 0.05
+            idx += 1
+        t += 0.8
+    return words, t
+
+
+def synthesize(words, duration):
+    samples = np.zeros(int(duration * SAMPLE_RATE), dtype=np.float32)
+    n = int(WORD_DURATION * SAMPLE_RATE)
+    time_axis = np.arange(n) / SAMPLE_RATE
+    for start, idx in words:
+        first = int(start * SAMPLE_RATE)
+        frequency = BASE_FREQUENCY + FREQUENCY_STEP * idx
+        last = first + n
+        samples[first:last] = 0.5 * np.sin(2 * np.pi * frequency * time_axis)
+    return samples
+
+
+def detect_words(samples):
+    """
+    What the stand-in endpoint "hears": every tone burst, named by its pitch.
+    """
+    frame = SAMPLE_RATE // 100
+    n_frames = len(samples) // frame
+    framed = samples[: n_frames * frame].reshape(n_frames, frame)
+    energy = np.mean(framed**2, axis=1)
+    loud = np.concatenate([[0], (energy > 1e-3).astype(np.int8), [0]])
+    edges = np.diff(loud)
+    words = []
+    starts = np.flatnonzero(edges == 1) * frame
+    ends = np.flatnonzero(edges == -1) * frame
+    for first, last in zip(starts, ends):
+        burst = samples[first:last]
+        spectrum = np.abs(np.fft.rfft(burst))
+        frequency = np.argmax(spectrum) * SAMPLE_RATE / len(burst)
+        idx = int(round((frequency - BASE_FREQUENCY) / FREQUENCY_STEP))
+        words.append(
+            {
+                "word": f"w{idx}",
+                "start": first / SAMPLE_RATE,
+                "end": last / SAMPLE_RATE,
+            }
+        )
+    return words
+
+
+class FakeTranscriptionHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            header = f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode()
+            message = BytesParser(policy=default).parsebytes(header + body)
+            fields = {
+                part.get_param("name", header="content-disposition"): part
+                for part in message.iter_parts()
+            }
+            upload_path = os.path.join(
+                server.tmp_dir, f"upload_{threading.get_ident()}.mp3"
+            )
+            with open(upload_path, "wb") as file:
+                file.write(fields["file"].get_payload(decode=True))
+            samples = decode_pcm(upload_path, fps=SAMPLE_RATE, nchannels=1)[:, 0]
+            time.sleep(REQUEST_LATENCY)
+            response = {
+                "text": "",
+                "language": "english",
+                "duration": len(samples) / SAMPLE_RATE,
+                "words": detect_words(samples),
+            }
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+                server.requests += 1
+        payload = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def test_find_silences():
+    words, duration = tone_words()
+    silences = find_silences(synthesize(words, duration))
+    # Leading silence plus one pause after each phrase
+    assert len(silences) == 5
+    assert np.all(silences[:, 1] - silences[:, 0] >= 0.3)
+
+
+def test_plan_chunks_prefers_silences():
+    silences = np.array([[9.0, 10.0], [19.0, 21.0]])
+    chunks = plan_chunks(
+        30.0, silences, chunk_duration=10.0, max_chunk_duration=15.0, overlap=1.0
+    )
+    assert [(c.start, c.end) for c in chunks] == [(0.0, 9.5), (9.5, 20.0), (20.0, 30.0)]
+    assert chunks[1].audio_start == 8.5 and chunks[1].audio_end == 21.0
+
+
+def test_merge_chunk_words_drops_straddling_duplicates():
+    chunks = [
+        AudioChunk(start=0.0, end=5.0, audio_start=0.0, audio_end=6.0),
+        AudioChunk(start=5.0, end=10.0, audio_start=4.0, audio_end=10.0),
+    ]
+    first = [
+        {"word": "hello", "start": 4.0, "end": 4.5},
+        {"word": "world", "start": 4.8, "end": 5.1},  # cut short by the chunk edge
+    ]
+    second = [
+        {"word": "hello", "start": 4.0, "end": 4.5},
+        {"word": "world", "start": 4.8, "end": 5.4},
+        {"word": "again", "start": 6.0, "end": 6.3},
+    ]
+    merged = merge_chunk_words(chunks, [first, second])
+    assert [w["word"] for w in merged] == ["hello", "world", "again"]
+    assert merged[1]["end"] == 5.4
+
+
+def test_transcribe_chunked_against_local_endpoint(tmp_path):
+    words, duration = tone_words()
+    audio_path = str(tmp_path / "speech.wav")
+    write_track(synthesize(words, duration)[:, None], audio_path, fps=SAMPLE_RATE)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeTranscriptionHandler)
+    server.lock = threading.Lock()
+    server.in_flight = server.max_in_flight = server.requests = 0
+    server.tmp_dir = str(tmp_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        client = OpenAI(
+            api_key="test",
+            base_url=f"http://127.0.0.1:{server.server_address[1]}/v1",
+            max_retries=0,
+        )
+
+        def transcribe(chunk_path):
+            with open(chunk_path, "rb") as audio_file:
+                return client.audio.transcriptions.create(
+                    file=audio_file,
+                    model="whisper-1",
+                    response_format="verbose_json",
+                    timestamp_granularities=["word"],
+                ).words
+
+        result = transcribe_chunked(
+            audio_path,
+            transcribe,
+            workers=WORKERS,
+            chunk_duration=3.0,
+            max_chunk_duration=4.0,
+            overlap=0.5,
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert server.requests >= 4
+    assert 1 < server.max_in_flight <= WORKERS
+    assert [w["word"] for w in result] == [f"w{idx}" for _, idx in words]
+    starts = np.array([w["start"] for w in result])
+    assert np.allclose(starts, [start for start, _ in words], atol=0.06)
@@ -0,0 +1,104 @@
+import random
+
+import numpy as np
+
+from transcription.columnar import SubtitleColumns
+from transcription.models import Subtitles, SubtitleSegment
+
+WORDS = ["so", "like", "what", "the", "hell", "is", "ünïcödé", "going", "on"]
+EMOJIS = ["😀", "🔥", "🤬", "👍🏽", "🇱🇹"]
+
+
+def random_subtitles(seed: int, n: int = 300) -> Subtitles:
+    rng = random.Random(seed)
+    t, segments = 0.0, []
+    for _ in range(n):
+        start = t + rng.choice([0.0, 0.05, 0.09, 0.1, 0.11, 0.5, 1.7])
+        end = start + rng.choice([0.1, 0.3, 1.99, 2.0, 2.01, 3.3]) * rng.random()
+        segments.append(
+            SubtitleSegment(
+                word=rng.choice(WORDS),
+                start=start,
+                end=end,
+                emoji=rng.sample(EMOJIS, rng.randint(0, 2)),
+                censored=rng.random() < 0.2,
+            )
+        )
+        t = end
+    return Subtitles(subtitles=segments)
+
+
+def reference_add_dots(subtitles: Subtitles, threshold_delta: float) -> Subtitles:
+    for segment in subtitles.subtitles:
+        if segment.end - segment.start > threshold_delta:
+            segment.word += "..."
+    return subtitles
+
+
+def reference_merge(subtitles: Subtitles, threshold_delta: float) -> Subtitles:
+    segments = subtitles.subtitles
+    merged, skip = [], False
+    for idx, segment in enumerate(segments):
+        if skip:
+            skip = False
+            continue
+        if idx + 1 < len(segments):
+            following = segments[idx + 1]
+            if following.start - segment.end < threshold_delta:
+                merged.append(
+                    SubtitleSegment(
+                        word=f"{segment.word} {following.word}",
+                        start=segment.start,
+                        end=following.end,
+                        emoji=segment.emoji + following.emoji,
+                    )
+                )
+                skip = True
+            else:
+                merged.append(segment)
+        if idx + 1 == len(segments) and not skip:
+            merged.append(segment)
+    return Subtitles(subtitles=merged)
+
+
+def test_round_trip_is_lossless():
+    for seed in range(3):
+        subtitles = random_subtitles(seed)
+        assert SubtitleColumns.from_subtitles(subtitles).to_subtitles() == subtitles
+    empty = Subtitles(subtitles=[])
+    assert SubtitleColumns.from_subtitles(empty).to_subtitles() == empty
+
+
+def test_passes_match_reference():
+    for seed in range(10):
+        subtitles = random_subtitles(seed)
+        columns = SubtitleColumns.from_subtitles(subtitles)
+        for threshold in (0.0, 0.1, 0.5):
+            expected = reference_merge(subtitles.model_copy(deep=True), threshold)
+            assert columns.merge(threshold).to_subtitles() == expected
+        expected = reference_add_dots(subtitles.model_copy(deep=True), 2.0)
+        assert columns.add_dots(2.0).to_subtitles() == expected
+    for n in (0, 1, 2):
+        subtitles = random_subtitles(0, n)
+        columns = SubtitleColumns.from_subtitles(subtitles)
+        assert columns.merge(0.1).to_subtitles() == reference_merge(subtitles, 0.1)
+
+
+def test_binary_file_round_trip(tmp_path):
+    subtitles = random_subtitles(7)
+    columns = SubtitleColumns.from_subtitles(subtitles).add_dots(2.0).merge(0.1)
+    file_path = str(tmp_path / "subtitles.subc")
+    columns.save(file_path)
+
+    mapped = SubtitleColumns.load(file_path)
+    assert isinstance(mapped.start, np.memmap)
+    assert not mapped.start.flags.writeable
+    assert mapped.to_subtitles() == columns.to_subtitles()
+    assert (
+        SubtitleColumns.load(file_path, mmap=False).to_subtitles()
+        == columns.to_subtitles()
+    )
+
+    empty_path = str(tmp_path / "empty.subc")
+    SubtitleColumns.from_subtitles(Subtitles(subtitles=[])).save(empty_path)
+    assert len(SubtitleColumns.load(empty_path)) == 0
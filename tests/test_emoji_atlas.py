@@ -0,0 +1,52 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from utils.emoji_atlas import EmojiAtlas, build_atlas
+from utils.emoji_index import EmojiIndex
+
+PACK_PATH = os.path.join(os.path.dirname(__file__), "..", "setup", "ios_emoji_pack")
+# An RGBA and a grayscale + alpha ("LA") file
+PACK_FILES = ["1f44d.png", "1f600.png", "1f3b1.png"]
+
+
+def decode(path: str) -> np.ndarray:
+    return np.asarray(Image.open(path).convert("RGBA"))
+
+
+@pytest.fixture
+def pack(tmp_path):
+    pack_path = tmp_path / "pack"
+    pack_path.mkdir()
+    for name in PACK_FILES:
+        shutil.copy(os.path.join(PACK_PATH, name), pack_path / name)
+    return str(pack_path)
+
+
+def test_atlas_frames_match_decoded_pngs(pack, tmp_path):
+    atlas_path = str(tmp_path / "atlas.bin")
+    assert build_atlas(pack, atlas_path) == len(PACK_FILES)
+    atlas = EmojiAtlas(atlas_path, pack)
+    assert len(atlas) == len(PACK_FILES)
+    assert atlas.get_fingerprint() == EmojiIndex(pack).get_fingerprint()
+
+    for emoji, name in [("👍🏽", "1f44d.png"), ("😀", "1f600.png"), ("🎱", "1f3b1.png")]:
+        frame = atlas.get_frame(emoji)
+        np.testing.assert_array_equal(frame, decode(os.path.join(pack, name)))
+        # A read-only view of the mapping, not a copy
+        assert not frame.flags.writeable
+        assert np.shares_memory(frame, atlas.data)
+    assert atlas.get_frame("🇱🇹") is None
+    assert atlas.index.get_path("😀") == os.path.join(pack, "1f600.png")
+
+
+def test_atlas_rejects_other_files(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        EmojiAtlas(str(tmp_path / "missing.bin"))
+    other = tmp_path / "other.bin"
+    other.write_bytes(b"not an atlas at all")
+    with pytest.raises(ValueError):
+        EmojiAtlas(str(other))
@@ -0,0 +1,25 @@
+import os
+
+from utils.emoji_index import EmojiIndex
+
+PACK_PATH = os.path.join(os.path.dirname(__file__), "..", "setup", "ios_emoji_pack")
+
+
+def test_sequences_resolve_to_pack_files():
+    index = EmojiIndex(PACK_PATH)
+    assert len(index) > 1000
+    # Lowercase hex file names, variation selectors and skin tones ignored
+    assert index.get_path("😀").endswith("1f600.png")
+    assert index.resolve("❤️") == "❤"
+    assert index.resolve("👍🏽") == "👍"
+    assert index.resolve("👨‍👩‍👧") == "👨"
+    # Flags and plain text have no stand-in
+    assert index.resolve("🇱🇹") is None
+    assert index.resolve("x") is None
+    assert index.resolve("") is None
+
+
+def test_missing_pack_is_empty(tmp_path):
+    index = EmojiIndex(str(tmp_path / "missing"))
+    assert len(index) == 0
+    assert index.get_path("😀") is None
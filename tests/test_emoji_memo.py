@@ -0,0 +1,103 @@
+import os
+import shutil
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import instructor  # noqa: E402
+from openai import OpenAI  # noqa: E402
+
+import llm.main  # noqa: E402
+from fake_openai import fake_emoji, serve_fake_openai  # noqa: E402
+from llm.main import Client  # noqa: E402
+from llm.memo import EmojiMemo  # noqa: E402
+from transcription.models import Subtitles, SubtitleSegment  # noqa: E402
+from utils.emoji_index import EmojiIndex  # noqa: E402
+
+PACK_PATH = os.path.join(os.path.dirname(__file__), "..", "setup", "ios_emoji_pack")
+# None of these is settled by the lexicon, so each is up to the memo or the LLM
+WORDS = ["alpha", "beta gamma", "Alpha", "delta", " ALPHA "]
+DISTINCT = 3  # case and spacing aside: alpha, beta gamma, delta
+
+
+def make_pack(path, names) -> EmojiIndex:
+    os.makedirs(path, exist_ok=True)
+    for name in names:
+        shutil.copy(os.path.join(PACK_PATH, name), os.path.join(path, name))
+    return EmojiIndex(str(path))
+
+
+def annotate(tmp_path, base_url: str, words=WORDS, emoji_index: EmojiIndex = None):
+    """
+    Emoji for the words from a fresh client on the memo in tmp_path, one request
+    per text, as a later video would get them.
+    """
+    if emoji_index is None:
+        emoji_index = EmojiIndex(str(tmp_path / "no_pack"))
+    client = Client(
+        memo=EmojiMemo(str(tmp_path / "memo.sqlite")), emoji_index=emoji_index
+    )
+    client.client = instructor.patch(OpenAI(base_url=base_url, api_key="test"))
+    subtitles = Subtitles(
+        subtitles=[
+            SubtitleSegment(word=word, start=idx, end=idx + 1)
+            for idx, word in enumerate(words)
+        ]
+    )
+    return client.get_emojis(subtitles, batch_size=1, concurrency=1)
+
+
+def test_memo_hit_skips_the_api(tmp_path):
+    with serve_fake_openai() as server:
+        first = annotate(tmp_path, server.base_url)
+        # Each distinct text is sent once, duplicates share its answer
+        assert server.requests == DISTINCT
+        second = annotate(tmp_path, server.base_url)
+        assert server.requests == DISTINCT
+
+    assert sorted(server.singles) == ["alpha", "beta gamma", "delta"]
+    assert [s.emoji for s in first.subtitles] == [s.emoji for s in second.subtitles]
+    assert first.subtitles[0].emoji == fake_emoji("alpha")["emoji"]
+    assert EmojiMemo(str(tmp_path / "memo.sqlite")).stats() == {
+        "entries": DISTINCT,
+        "hits": DISTINCT,
+    }
+
+
+def test_memo_misses_on_new_text(tmp_path):
+    with serve_fake_openai() as server:
+        annotate(tmp_path, server.base_url)
+        annotate(tmp_path, server.base_url, WORDS + ["epsilon"])
+
+    assert server.requests == DISTINCT + 1
+    assert server.singles[-1] == "epsilon"
+
+
+def test_memo_invalidated_by_model_change(tmp_path, monkeypatch):
+    with serve_fake_openai() as server:
+        annotate(tmp_path, server.base_url)
+        monkeypatch.setattr(llm.main, "LLM_MODEL", "gpt-4o-mini")
+        annotate(tmp_path, server.base_url)
+        assert server.requests == 2 * DISTINCT
+        annotate(tmp_path, server.base_url)
+        assert server.requests == 2 * DISTINCT
+
+
+def test_memo_invalidated_by_prompt_change(tmp_path, monkeypatch):
+    with serve_fake_openai() as server:
+        annotate(tmp_path, server.base_url)
+        monkeypatch.setattr(
+            llm.main, "EMOJI_CONTENT", "Emojis and censoring for the text: {word}."
+        )
+        annotate(tmp_path, server.base_url)
+        assert server.requests == 2 * DISTINCT
+
+
+def test_memo_invalidated_by_emoji_pack_change(tmp_path):
+    smileys = make_pack(tmp_path / "smileys", ["1f600.png"])
+    more = make_pack(tmp_path / "more", ["1f600.png", "1f602.png"])
+    with serve_fake_openai() as server:
+        annotate(tmp_path, server.base_url, emoji_index=smileys)
+        annotate(tmp_path, server.base_url, emoji_index=smileys)
+        assert server.requests == DISTINCT
+        annotate(tmp_path, server.base_url, emoji_index=more)
+        assert server.requests == 2 * DISTINCT
@@ -0,0 +1,40 @@
+import os
+
+import numpy as np
+
+from editor.glyph_cache import GlyphCache
+
+STYLE = {"font": "test", "fontsize": 10}
+
+
+def render(text, style, padding):
+    return np.full((4, 8 * len(text), 4), len(text), dtype=np.uint8)
+
+
+def test_renders_without_memory_cache(tmp_path):
+    cache = GlyphCache(str(tmp_path), max_items=0)
+    rgba = cache.get_or_render("word", STYLE, (0, 0), render)
+    assert rgba.shape == (4, 32, 4)
+    # Served from disk the second time
+    again = cache.get_or_render("word", STYLE, (0, 0), render)
+    np.testing.assert_array_equal(again, rgba)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_disk_store_evicts_least_recently_used(tmp_path):
+    entry_bytes = 128 + 4 * 8 * 4  # .npy header and one 1-character bitmap
+    cache = GlyphCache(str(tmp_path), max_items=0, max_bytes=3 * entry_bytes)
+    for idx, text in enumerate("abc"):
+        cache.get_or_render(text, STYLE, (0, 0), render)
+        path = cache._disk_path(cache.get_key(text, STYLE, (0, 0)))
+        os.utime(path, (idx, idx))
+    # Using "a" makes "b" the oldest, so adding "d" evicts it
+    cache.get_or_render("a", STYLE, (0, 0), render)
+    cache.get_or_render("d", STYLE, (0, 0), render)
+
+    cached = {
+        text
+        for text in "abcd"
+        if os.path.exists(cache._disk_path(cache.get_key(text, STYLE, (0, 0))))
+    }
+    assert cached == {"a", "c", "d"}
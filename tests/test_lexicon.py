@@ -0,0 +1,73 @@
+import pytest
+
+from llm.lexicon import AMBIGUOUS_WORDS, CENSORED_EMOJI, censor_text, resolve
+
+
+@pytest.mark.parametrize(
+    "text, censored",
+    [
+        ("fuck", "f@#k"),
+        ("FUCKING", "F@#KING"),
+        ("Fucked", "F@#ked"),
+        ("motherfuckers", "motherf@#kers"),
+        ("shitty", "sh!tty"),
+        ("bitches", "b!tches"),
+        ("shithead", "sh!thead"),
+        ("That's SHIT, man", "That's SH!T, man"),
+    ],
+)
+def test_curse_suffixes_keep_case(text, censored):
+    assert censor_text(text) == (censored, True)
+
+
+def test_words_containing_a_stem_are_not_censored():
+    assert censor_text("shitake fuckless") == ("shitake fuckless", False)
+
+
+def test_single_words_are_resolved():
+    assert resolve("Fucking!") == {
+        "emoji": [CENSORED_EMOJI],
+        "censored_curse_text": "F@#king!",
+        "censored_text": True,
+    }
+    assert resolve("pizza")["emoji"] == ["🍕"]
+    assert resolve("Books.")["emoji"] == ["📚"]
+    assert resolve("whatever") is None
+
+
+def test_short_stems_are_not_stripped():
+    # caring is not car + ing
+    assert resolve("caring") is None
+    assert resolve("cares") is None
+
+
+@pytest.mark.parametrize("word", AMBIGUOUS_WORDS)
+def test_ambiguous_words_go_to_the_llm(word):
+    assert resolve(word) is None
+    assert resolve(word.upper() + "!") is None
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "I love pizza",
+        "no money",
+        "my dog is sick",
+        "what the hell",
+    ],
+)
+def test_multi_word_keywords_go_to_the_llm(text):
+    assert resolve(text) is None
+
+
+def test_heavy_curses_resolve_in_any_segment():
+    assert resolve("what the fuck") == {
+        "emoji": [CENSORED_EMOJI],
+        "censored_curse_text": "what the f@#k",
+        "censored_text": True,
+    }
+    assert resolve("Shit, I love pizza")["censored_curse_text"] == (
+        "Sh!t, I love pizza"
+    )
+    # An ambiguous word next to the curse still needs the LLM
+    assert resolve("fuck this ass") is None
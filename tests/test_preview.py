@@ -0,0 +1,14 @@
+from editor.preview import get_plan_path, scale_size
+
+
+def test_plan_path_depends_on_directories():
+    first = get_plan_path("a/video.mp4", "assets/bg.mp4")
+    second = get_plan_path("b/video.mp4", "assets/bg.mp4")
+    assert first != second
+    assert first == get_plan_path("a/video.mp4", "assets/bg.mp4")
+
+
+def test_scale_size_keeps_even_dimensions():
+    assert scale_size((640, 840), 1.0) == (640, 840)
+    assert scale_size((640, 840), 0.5) == (320, 420)
+    assert scale_size((478, 270), 0.5) == (238, 134)
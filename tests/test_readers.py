@@ -0,0 +1,50 @@
+import numpy as np
+from moviepy.editor import VideoFileClip
+
+from editor.readers import MAX_SEQUENTIAL_SKIP, prefetch_clip
+from lavfi import make_video
+
+FPS = 30
+DURATION = 6  # seconds, long enough for a seek past MAX_SEQUENTIAL_SKIP
+
+
+def read_all(video_path: str) -> list:
+    """
+    Every frame, read sequentially through moviepy's own reader.
+    """
+    clip = VideoFileClip(video_path, audio=False)
+    frames = [clip.get_frame(idx / FPS).copy() for idx in range(DURATION * FPS)]
+    clip.close()
+    return frames
+
+
+def test_prefetched_frames_match_sequential_reads(tmp_path):
+    video_path = make_video(str(tmp_path / "source.mp4"), DURATION, fps=FPS)
+    expected = read_all(video_path)
+    n_frames = len(expected)
+    # Sequential, skipping a few, backwards, and far enough forward to seek
+    order = list(range(20)) + [23, 27, 5, 6, 7]
+    order += [10 + MAX_SEQUENTIAL_SKIP + 20, n_frames - 1, 0, 1]
+
+    for buffer_size in (0, 1, 4):
+        clip = VideoFileClip(video_path, audio=False)
+        prefetch_clip(clip, 0, buffer_size)
+        for idx in order:
+            assert np.array_equal(clip.get_frame(idx / FPS), expected[idx]), (
+                buffer_size,
+                idx,
+            )
+        clip.close()
+
+
+def test_reader_aligned_mid_clip_matches_sequential_reads(tmp_path):
+    video_path = make_video(str(tmp_path / "source.mp4"), DURATION, fps=FPS)
+    expected = read_all(video_path)
+
+    # Where a chunk of a parallel render starts reading
+    for first in (1, 44, 97):
+        clip = VideoFileClip(video_path, audio=False)
+        prefetch_clip(clip, first / FPS, 4)
+        for idx in range(first, first + 30):
+            assert np.array_equal(clip.get_frame(idx / FPS), expected[idx]), idx
+        clip.close()
@@ -0,0 +1,70 @@
+import re
+import subprocess as sp
+
+from moviepy.config import get_setting
+
+from editor.recut import get_recut_ranges, plan_segments, recut_video
+
+KEYFRAMES = [0.0, 6.8, 13.6, 20.4, 27.2]
+DURATION = 30.0
+
+
+def plan(mode: str):
+    ranges = get_recut_ranges(DURATION, 7)
+    return plan_segments("video.mp4", ranges, mode, KEYFRAMES, DURATION, 0.5)
+
+
+def test_auto_segments_share_snapped_boundaries():
+    segments = plan("auto")
+    assert segments[0].start == 0.0 and segments[-1].end == DURATION
+    for previous, segment in zip(segments, segments[1:]):
+        assert previous.end == segment.start
+    # 7 and 14 snap to 6.8 and 13.6, 21 is too far from a keyframe
+    assert [(s.start, s.end, s.mode) for s in segments] == [
+        (0.0, 6.8, "copy"),
+        (6.8, 13.6, "copy"),
+        (13.6, 21, "smart"),
+        (21, DURATION, "smart"),
+    ]
+
+
+def test_copy_mode_fails_unsnappable_segments():
+    segments = plan("copy")
+    assert [segment.error is None for segment in segments] == [
+        True,
+        True,
+        False,
+        False,
+    ]
+    assert all(segment.mode == "copy" for segment in segments)
+
+
+def test_reencode_keeps_requested_ranges():
+    segments = plan("reencode")
+    assert [(s.start, s.end) for s in segments] == get_recut_ranges(DURATION, 7)
+    assert all(segment.mode == "reencode" for segment in segments)
+
+
+def make_video(path: str, duration: float, fps: int, gop: int) -> str:
+    cmd = [get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error"]
+    cmd += ["-f", "lavfi", "-i", f"testsrc=size=128x72:rate={fps}:duration={duration}"]
+    cmd += ["-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}"]
+    cmd += ["-c:v", "libx264", "-g", str(gop), "-bf", "3", "-pix_fmt", "yuv420p"]
+    sp.run(cmd + ["-c:a", "aac", "-shortest", path], check=True)
+    return path
+
+
+def count_frames(path: str) -> int:
+    cmd = [get_setting("FFMPEG_BINARY"), "-i", path, "-map", "0:v:0", "-f", "null", "-"]
+    stderr = sp.run(cmd, stderr=sp.PIPE, check=True).stderr.decode()
+    return int(re.findall(r"frame=\s*(\d+)", stderr)[-1])
+
+
+def test_copy_segments_do_not_overlap(tmp_path):
+    video_path = make_video(str(tmp_path / "source.mp4"), 20, 30, 45)
+    segments = recut_video(video_path, 7, mode="copy", max_workers=2)
+
+    # Keyframes every 1.5 s: the cut at 7 moves to 7.5
+    assert [(s.start, s.end) for s in segments] == [(0, 7.5), (7.5, 20)]
+    # B-frames of the next GOP stay out, so no frame is in both segments
+    assert [count_frames(segment.path) for segment in segments] == [225, 375]
@@ -0,0 +1,68 @@
+import glob
+import os
+
+import numpy as np
+import pytest
+from moviepy.config import get_setting
+
+from editor.text_render import FONTS_PATH, PillowTextRenderer, render_text_pillow
+
+FONT_DIRS = [
+    FONTS_PATH,
+    "/usr/share/fonts",
+    "/usr/local/share/fonts",
+    os.path.expanduser("~/.fonts"),
+    "/Library/Fonts",
+    "/System/Library/Fonts",
+]
+TEXTS = ["HELLO", "WHAT'S UP?", "MOTHERF@#KER", "I"]
+PADDING = (20, 10)
+
+
+def find_font() -> str:
+    for font_dir in FONT_DIRS:
+        fonts = sorted(glob.glob(os.path.join(font_dir, "**", "*.ttf"), recursive=True))
+        if fonts:
+            return fonts[0]
+    pytest.skip("No TrueType font available")
+
+
+@pytest.fixture
+def style():
+    return {"font": find_font(), "bg_color": "gold", "color": "black", "fontsize": 60}
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_render_matches_measure(style, text):
+    renderer = PillowTextRenderer.for_style(style)
+    width, height = renderer.measure(text)
+    rgba = renderer.render(text, PADDING)
+
+    assert rgba.dtype == np.uint8
+    assert rgba.shape == (height + 2 * PADDING[1], width + 2 * PADDING[0], 4)
+    # Opaque background with the text drawn on it
+    assert (rgba[..., 3] == 255).all()
+    assert (rgba[..., :3] != rgba[0, 0, :3]).any()
+
+
+def test_wider_text_measures_wider(style):
+    renderer = PillowTextRenderer.for_style(style)
+    assert renderer.measure("HELLO")[0] < renderer.measure("HELLO HELLO")[0]
+    assert renderer.measure("I")[1] == renderer.measure("HELLO")[1]
+
+
+@pytest.mark.skipif(
+    get_setting("IMAGEMAGICK_BINARY") == "unset", reason="ImageMagick not installed"
+)
+@pytest.mark.parametrize("text", TEXTS)
+def test_pillow_matches_imagemagick(style, text):
+    os.environ.setdefault("OPENAI_API_KEY", "test")
+    from editor.main import render_text_imagemagick
+
+    expected = render_text_imagemagick(text, style, PADDING)
+    rgba = render_text_pillow(text, style, PADDING)
+
+    assert rgba.shape == expected.shape
+    # Same geometry and colours; only antialiasing of glyph edges may differ
+    difference = np.abs(rgba.astype(np.int16) - expected.astype(np.int16))
+    assert difference.mean() < 4
@@ -0,0 +1,50 @@
+import numpy as np
+from moviepy.editor import CompositeVideoClip, ImageClip, VideoFileClip
+
+from editor.animation import animated_clip
+from editor.timeline import TimelineCompositor
+from lavfi import make_video
+
+FPS = 30
+
+
+def make_rgba(width: int, height: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    rgba = rng.integers(0, 256, (height, width, 4), dtype=np.uint8)
+    # Opaque centre, soft edges, fully transparent corner
+    rgba[2:-2, 2:-2, 3] = 255
+    rgba[:3, :3, 3] = 0
+    return rgba
+
+
+def make_overlays(duration: float):
+    overlays = []
+    for idx, start in enumerate(np.arange(0, duration, 0.37)):
+        rgba = make_rgba(24 + idx % 5, 10 + idx % 3, idx)
+        # Animated captions in the centre, like create_subtitle_clip()
+        caption = animated_clip(rgba, 1.13, 0.25, start, 0.33, FPS)
+        overlays.append(caption.set_position("center"))
+        # Static emoji-like overlays, some hanging over the frame edge
+        image = ImageClip(rgba[..., :3]).set_mask(
+            ImageClip(rgba[..., 3] / 255.0, ismask=True)
+        )
+        position = (-8 + (idx * 13) % 60, -4 + (idx * 7) % 44)
+        overlays.append(
+            image.set_start(start + 0.1).set_duration(0.5).set_position(position)
+        )
+    return overlays
+
+
+def test_frames_match_composite_video_clip(tmp_path):
+    background = VideoFileClip(
+        make_video(str(tmp_path / "background.mp4"), 3, fps=FPS), audio=False
+    )
+    overlays = make_overlays(background.duration)
+
+    expected = CompositeVideoClip([background] + overlays)
+    timeline = TimelineCompositor(background, overlays, bucket_size=0.5)
+
+    # Every frame of the output grid, bucket boundaries included
+    for t in np.arange(0, background.duration, 1.0 / FPS):
+        assert np.array_equal(timeline.get_frame(t), expected.get_frame(t)), t
+    background.close()
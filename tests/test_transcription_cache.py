@@ -0,0 +1,104 @@
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import transcription.cache
+from transcription.cache import TranscriptionCache
+from transcription.columnar import SubtitleColumns
+from transcription.models import Subtitles, SubtitleSegment
+
+
+def make_columns(words) -> SubtitleColumns:
+    return SubtitleColumns.from_subtitles(
+        Subtitles(
+            subtitles=[
+                SubtitleSegment(word=word, start=idx, end=idx + 1)
+                for idx, word in enumerate(words)
+            ]
+        )
+    )
+
+
+def get_words(columns: SubtitleColumns):
+    return [segment.word for segment in columns.to_subtitles().subtitles]
+
+
+class Clock:
+    """
+    time.time() stand-in ticking one second per call, so every access is
+    ordered however fast the test runs.
+    """
+
+    def __init__(self):
+        self.ticks = itertools.count(1)
+
+    def time(self) -> float:
+        return float(next(self.ticks))
+
+
+def put_entries(cache_dir: str, worker: int, count: int) -> None:
+    cache = TranscriptionCache(cache_dir)
+    for idx in range(count):
+        cache.put_columns(f"{worker}-{idx}", make_columns([f"w{worker}", str(idx)]))
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    monkeypatch.setattr(transcription.cache, "time", Clock())
+    columns = make_columns(["a"] * 50)
+    probe = TranscriptionCache(str(tmp_path / "probe"))
+    probe.put_columns("probe", columns)
+    entry_size = probe.stats()["bytes"]
+
+    cache = TranscriptionCache(str(tmp_path / "cache"), max_bytes=3 * entry_size)
+    for key in ["first", "second", "third"]:
+        cache.put_columns(key, columns)
+    # Reading "first" makes "second" the least recently used
+    assert cache.get_columns("first") is not None
+    cache.put_columns("fourth", columns)
+
+    assert cache.get_columns("second") is None
+    for key in ["first", "third", "fourth"]:
+        assert cache.get_columns(key) is not None
+    assert not os.path.exists(tmp_path / "cache" / "second.subc")
+    assert cache.stats()["entries"] == 3
+    assert cache.stats()["bytes"] <= 3 * entry_size
+
+
+def test_instances_share_the_directory(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    TranscriptionCache(cache_dir).put_columns("key", make_columns(["hello", "world"]))
+
+    other = TranscriptionCache(cache_dir)
+    assert get_words(other.get_columns("key")) == ["hello", "world"]
+    assert other.stats()["entries"] == 1
+
+
+def test_processes_write_one_consistent_index(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        futures = [
+            executor.submit(put_entries, cache_dir, worker, 5) for worker in range(4)
+        ]
+        for future in futures:
+            future.result()
+
+    cache = TranscriptionCache(cache_dir)
+    assert cache.stats()["entries"] == 20
+    assert get_words(cache.get_columns("3-4")) == ["w3", "4"]
+    # Writes are atomic: no temporary file is left behind
+    assert not [name for name in os.listdir(cache_dir) if name.endswith(".tmp")]
+
+
+def test_corrupt_index_is_reset(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    cache = TranscriptionCache(cache_dir)
+    cache.put_columns("key", make_columns(["hello"]))
+    with open(os.path.join(cache_dir, "index.json"), "w") as file:
+        file.write('{"key": {"file": "key.su')
+
+    assert cache.get_columns("key") is None
+    cache.put_columns("other", make_columns(["again"]))
+    assert get_words(cache.get_columns("other")) == ["again"]
+    with open(os.path.join(cache_dir, "index.json")) as file:
+        assert list(json.load(file)) == ["other"]
@@ -0,0 +1,168 @@
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from transcription.columnar import SubtitleColumns
+from utils.utils import CACHE_PATH
+
+TRANSCRIPTION_CACHE_PATH = os.path.join(CACHE_PATH, "transcriptions")
+TRANSCRIPTION_CACHE_MAX_BYTES = 256 * 1024 * 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path: str) -> str:
+    """
+    sha256 of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_key(**parts) -> str:
+    """
+    Stable key over json-serialisable parts (content hashes, parameters).
+    """
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def write_atomic(file_path: str, data: str) -> None:
+    directory = os.path.dirname(file_path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            file.write(data)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+class TranscriptionCache:
+    """
+    Content-addressed store of transcription results (subtitle columns in
+    their binary format), shared between processes on one host.
+
+    index.json maps key -> {file, size, last_access}. Every index update
+    happens under an exclusive flock on .lock, entry files and the index are
+    replaced atomically, and the least recently used entries are evicted
+    once the total size exceeds `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = TRANSCRIPTION_CACHE_PATH,
+        max_bytes: int = TRANSCRIPTION_CACHE_MAX_BYTES,
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.lock_path = os.path.join(cache_dir, ".lock")
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @contextmanager
+    def _locked(self):
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_index(self) -> dict:
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except json.JSONDecodeError:
+            print(
+                f"TRANSCRIPTION >> Cache index {self.index_path} unreadable, resetting"
+            )
+            return {}
+
+    def _write_index(self, index: dict) -> None:
+        write_atomic(self.index_path, json.dumps(index, indent=2))
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.subc")
+
+    def _touch(self, key: str) -> Optional[str]:
+        """
+        Path of the key's entry if it is cached, marking it used. Call under
+        the lock.
+        """
+        index = self._read_index()
+        entry = index.get(key)
+        entry_path = self._entry_path(key)
+        if entry is None or entry["file"] != os.path.basename(entry_path):
+            return None
+        if not os.path.exists(entry_path):
+            return None
+        entry["last_access"] = time.time()
+        self._write_index(index)
+        return entry_path
+
+    def _add(self, key: str, entry_path: str) -> None:
+        """
+        Index a freshly written entry file and evict. Call under the lock.
+        """
+        index = self._read_index()
+        previous = index.get(key)
+        if previous is not None and previous["file"] != os.path.basename(entry_path):
+            # Same key stored in an older format
+            previous_path = os.path.join(self.cache_dir, previous["file"])
+            if os.path.exists(previous_path):
+                os.remove(previous_path)
+        index[key] = {
+            "file": os.path.basename(entry_path),
+            "size": os.path.getsize(entry_path),
+            "last_access": time.time(),
+        }
+        self._evict(index, keep=key)
+        self._write_index(index)
+
+    def get_columns(self, key: str) -> Optional[SubtitleColumns]:
+        with self._locked():
+            entry_path = self._touch(key)
+            if entry_path is None:
+                return None
+            # Memory mapped: stays valid if the entry is evicted meanwhile
+            return SubtitleColumns.load(entry_path)
+
+    def put_columns(self, key: str, columns: SubtitleColumns) -> None:
+        with self._locked():
+            columns.save(self._entry_path(key))
+            self._add(key, self._entry_path(key))
+
+    def _evict(self, index: dict, keep: str) -> None:
+        total = sum(entry["size"] for entry in index.values())
+        by_age = sorted(index.items(), key=lambda item: item[1]["last_access"])
+        for key, entry in by_age:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            entry_path = os.path.join(self.cache_dir, entry["file"])
+            if os.path.exists(entry_path):
+                os.remove(entry_path)
+            total -= entry["size"]
+            del index[key]
+            print(f"TRANSCRIPTION >> Evicted cache entry {key[:12]}")
+
+    def stats(self) -> dict:
+        with self._locked():
+            index = self._read_index()
+        return {
+            "entries": len(index),
+            "bytes": sum(entry["size"] for entry in index.values()),
+            "max_bytes": self.max_bytes,
+        }
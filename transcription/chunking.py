@@ -0,0 +1,222 @@
+import os
+import subprocess as sp
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+import numpy as np
+from moviepy.config import get_setting
+from pydantic import BaseModel
+
+from utils.audio import decode_pcm, SPEECH_SAMPLE_RATE, SPEECH_BITRATE
+
+# Silence detection on the decoded mono speech track
+ENERGY_FRAME_DURATION = 0.02  # seconds
+SILENCE_THRESHOLD_DB = -35.0  # relative to the loudest frame
+MIN_SILENCE_DURATION = 0.3  # seconds
+
+# Chunks are cut in the silence closest to CHUNK_DURATION after the previous
+# cut, or hard at MAX_CHUNK_DURATION when there is none
+CHUNK_DURATION = 240.0  # seconds
+MAX_CHUNK_DURATION = 600.0  # seconds
+# Audio each chunk gets past its cuts, so words on a cut are heard whole
+CHUNK_OVERLAP = 1.0  # seconds
+TRANSCRIPTION_WORKERS = 4
+# Shorter audio (under the upload limit) goes out as a single request
+CHUNKED_MIN_DURATION = 300.0  # seconds
+
+
+class AudioChunk(BaseModel):
+    """
+    Words of the chunk are those with their middle in [start, end); the audio
+    sent is [audio_start, audio_end), which overlaps the neighbours.
+    """
+
+    start: float
+    end: float
+    audio_start: float
+    audio_end: float
+
+
+def get_word_field(word, name: str):
+    # The API returns word objects, cached / test data plain dicts
+    return word[name] if isinstance(word, dict) else getattr(word, name)
+
+
+def find_silences(
+    samples: np.ndarray,
+    sample_rate: int = SPEECH_SAMPLE_RATE,
+    frame_duration: float = ENERGY_FRAME_DURATION,
+    threshold_db: float = SILENCE_THRESHOLD_DB,
+    min_duration: float = MIN_SILENCE_DURATION,
+) -> np.ndarray:
+    """
+    (start, end) seconds of every run of frames quieter than threshold_db
+    below the loudest frame and at least min_duration long, as an (n, 2) array.
+    """
+    frame = max(1, int(round(frame_duration * sample_rate)))
+    n_frames = len(samples) // frame
+    if not n_frames:
+        return np.zeros((0, 2))
+    frames = samples[: n_frames * frame].reshape(n_frames, frame).astype(np.float64)
+    energy_db = 10 * np.log10(np.mean(frames**2, axis=1) + 1e-12)
+    silent = energy_db < energy_db.max() + threshold_db
+
+    edges = np.diff(np.concatenate([[0], silent.astype(np.int8), [0]]))
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1)
+    runs = np.stack([run_starts, run_ends], axis=1) * (frame / sample_rate)
+    return runs[runs[:, 1] - runs[:, 0] >= min_duration]
+
+
+def plan_chunks(
+    duration: float,
+    silences: np.ndarray,
+    chunk_duration: float = CHUNK_DURATION,
+    max_chunk_duration: float = MAX_CHUNK_DURATION,
+    overlap: float = CHUNK_OVERLAP,
+) -> List[AudioChunk]:
+    """
+    Split [0, duration) in the middle of silences, aiming for chunk_duration
+    long chunks and never exceeding max_chunk_duration.
+    """
+    if max_chunk_duration < chunk_duration:
+        raise ValueError(
+            f"max_chunk_duration {max_chunk_duration} is below "
+            f"chunk_duration {chunk_duration}"
+        )
+    midpoints = silences.mean(axis=1) if len(silences) else np.zeros(0)
+    cuts = [0.0]
+    while duration - cuts[-1] > chunk_duration:
+        low = cuts[-1] + chunk_duration / 2
+        high = min(cuts[-1] + max_chunk_duration, duration)
+        candidates = midpoints[(midpoints > low) & (midpoints < high)]
+        if len(candidates):
+            cut = candidates[
+                np.argmin(np.abs(candidates - (cuts[-1] + chunk_duration)))
+            ]
+        else:
+            cut = high
+        if cut >= duration:
+            break
+        cuts.append(float(cut))
+    cuts.append(duration)
+
+    return [
+        AudioChunk(
+            start=start,
+            end=end,
+            audio_start=max(0.0, start - overlap),
+            audio_end=min(duration, end + overlap),
+        )
+        for start, end in zip(cuts[:-1], cuts[1:])
+    ]
+
+
+def write_speech_chunk(
+    samples: np.ndarray, output_path: str, sample_rate: int = SPEECH_SAMPLE_RATE
+) -> None:
+    """
+    Encode mono float samples as MP3 in the same format as extract_speech_audio.
+    """
+    cmd = [
+        get_setting("FFMPEG_BINARY"),
+        "-y",
+        "-loglevel",
+        "error",
+        "-f",
+        "f32le",
+        "-ar",
+        str(sample_rate),
+        "-ac",
+        "1",
+        "-i",
+        "pipe:0",
+        "-b:a",
+        f"{SPEECH_BITRATE}k",
+        output_path,
+    ]
+    process = sp.run(cmd, input=samples.astype(np.float32).tobytes(), stderr=sp.PIPE)
+    if process.returncode != 0:
+        error = process.stderr.decode(errors="replace")
+        raise IOError(f"ffmpeg failed writing {output_path}:\n{error.strip()}")
+
+
+def merge_chunk_words(
+    chunks: List[AudioChunk], chunk_words: List[List[dict]]
+) -> List[dict]:
+    """
+    Concatenate the (already offset) words of every chunk, each chunk keeping
+    only the words centred in its own span. A word on a cut can still come
+    back from both sides with slightly different timings; consecutive equal
+    words that overlap in time are collapsed into the longer one.
+    """
+    merged = []
+    for idx, (chunk, words) in enumerate(zip(chunks, chunk_words)):
+        last = idx == len(chunks) - 1
+        for word in words:
+            middle = (word["start"] + word["end"]) / 2
+            if middle < chunk.start or (middle >= chunk.end and not last):
+                continue
+            previous = merged[-1] if merged else None
+            if (
+                previous is not None
+                and previous["word"].strip().lower() == word["word"].strip().lower()
+                and word["start"] < previous["end"]
+            ):
+                if word["end"] - word["start"] > previous["end"] - previous["start"]:
+                    merged[-1] = word
+                continue
+            merged.append(word)
+    return merged
+
+
+def transcribe_chunked(
+    audio_path: str,
+    transcribe: Callable[[str], list],
+    workers: int = TRANSCRIPTION_WORKERS,
+    chunk_duration: float = CHUNK_DURATION,
+    max_chunk_duration: float = MAX_CHUNK_DURATION,
+    overlap: float = CHUNK_OVERLAP,
+) -> List[dict]:
+    """
+    Word timestamps of `audio_path`, transcribed as silence-split chunks with
+    at most `workers` requests in flight. `transcribe` takes the path of a
+    chunk's MP3 and returns its words (objects or dicts with word, start, end)
+    relative to the chunk.
+    """
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+    samples = decode_pcm(audio_path, fps=SPEECH_SAMPLE_RATE, nchannels=1)[:, 0]
+    if not len(samples):
+        raise ValueError(f"No audio in {audio_path}")
+    duration = len(samples) / SPEECH_SAMPLE_RATE
+    chunks = plan_chunks(
+        duration, find_silences(samples), chunk_duration, max_chunk_duration, overlap
+    )
+    print(
+        f"TRANSCRIPTION >> Transcribing {duration:.1f}s of {audio_path} as "
+        f"{len(chunks)} chunks, {workers} at a time"
+    )
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+
+        def transcribe_chunk(idx: int) -> List[dict]:
+            chunk = chunks[idx]
+            chunk_path = os.path.join(tmp_dir, f"chunk_{idx:04d}.mp3")
+            first = int(round(chunk.audio_start * SPEECH_SAMPLE_RATE))
+            last = int(round(chunk.audio_end * SPEECH_SAMPLE_RATE))
+            write_speech_chunk(samples[first:last], chunk_path)
+            return [
+                {
+                    "word": get_word_field(word, "word"),
+                    "start": get_word_field(word, "start") + chunk.audio_start,
+                    "end": get_word_field(word, "end") + chunk.audio_start,
+                }
+                for word in transcribe(chunk_path)
+            ]
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            chunk_words = list(executor.map(transcribe_chunk, range(len(chunks))))
+
+    return merge_chunk_words(chunks, chunk_words)
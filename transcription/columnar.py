@@ -0,0 +1,290 @@
+import json
+import os
+import struct
+from typing import Dict, List
+
+import numpy as np
+
+from transcription.models import Subtitles, SubtitleSegment
+
+COLUMNS_MAGIC = b"SUBCOL1\n"
+COLUMNS_ALIGNMENT = 64  # bytes, start of every array in the file
+# name -> dtype of the arrays stored in a columns file
+COLUMN_DTYPES = {
+    "start": "<f8",
+    "end": "<f8",
+    "censored": "|b1",
+    "word_ids": "<i4",
+    "emoji_offsets": "<i8",
+    "emoji_ids": "<i4",
+}
+
+
+def intern(table: List[str], lookup: Dict[str, int], strings: List[str]) -> np.ndarray:
+    """
+    Ids of `strings` in `table`, appending the ones not in it yet.
+    """
+    ids = np.empty(len(strings), dtype=np.int32)
+    for idx, string in enumerate(strings):
+        string_id = lookup.get(string)
+        if string_id is None:
+            string_id = lookup[string] = len(table)
+            table.append(string)
+        ids[idx] = string_id
+    return ids
+
+
+class SubtitleColumns:
+    """
+    Subtitles as parallel arrays: start / end times, censored flags, ids into
+    an interned word table and, CSR style, the emoji ids of every segment
+    (emoji_ids[emoji_offsets[i]:emoji_offsets[i + 1]]) into an emoji table.
+
+    Converts losslessly to and from the pydantic Subtitles, and saves to a
+    binary file whose arrays load as read-only memory maps.
+    """
+
+    def __init__(
+        self,
+        start: np.ndarray,
+        end: np.ndarray,
+        censored: np.ndarray,
+        word_ids: np.ndarray,
+        emoji_offsets: np.ndarray,
+        emoji_ids: np.ndarray,
+        words: List[str],
+        emojis: List[str],
+    ):
+        self.start = start
+        self.end = end
+        self.censored = censored
+        self.word_ids = word_ids
+        self.emoji_offsets = emoji_offsets
+        self.emoji_ids = emoji_ids
+        self.words = words
+        self.emojis = emojis
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    @classmethod
+    def from_subtitles(cls, subtitles: Subtitles) -> "SubtitleColumns":
+        segments = subtitles.subtitles
+        words, emojis = [], []
+        emoji_counts = [len(segment.emoji) for segment in segments]
+        emoji_offsets = np.zeros(len(segments) + 1, dtype=np.int64)
+        np.cumsum(emoji_counts, out=emoji_offsets[1:])
+        return cls(
+            start=np.array([segment.start for segment in segments], dtype=np.float64),
+            end=np.array([segment.end for segment in segments], dtype=np.float64),
+            censored=np.array([segment.censored for segment in segments], dtype=bool),
+            word_ids=intern(words, {}, [segment.word for segment in segments]),
+            emoji_offsets=emoji_offsets,
+            emoji_ids=intern(
+                emojis, {}, [emoji for segment in segments for emoji in segment.emoji]
+            ),
+            words=words,
+            emojis=emojis,
+        )
+
+    def to_subtitles(self) -> Subtitles:
+        offsets = self.emoji_offsets.tolist()
+        emoji_ids = self.emoji_ids.tolist()
+        return Subtitles(
+            subtitles=[
+                SubtitleSegment(
+                    word=self.words[word_id],
+                    start=start,
+                    end=end,
+                    emoji=[self.emojis[i] for i in emoji_ids[first:last]],
+                    censored=censored,
+                )
+                for word_id, start, end, censored, first, last in zip(
+                    self.word_ids.tolist(),
+                    self.start.tolist(),
+                    self.end.tolist(),
+                    self.censored.tolist(),
+                    offsets[:-1],
+                    offsets[1:],
+                )
+            ]
+        )
+
+    def get_segment_words(self) -> List[str]:
+        return [self.words[word_id] for word_id in self.word_ids.tolist()]
+
+    def get_segment_emojis(self, idx: int) -> List[str]:
+        first, last = self.emoji_offsets[idx], self.emoji_offsets[idx + 1]
+        return [self.emojis[i] for i in self.emoji_ids[first:last].tolist()]
+
+    def _with_words(self, words: List[str], strings: List[str]) -> np.ndarray:
+        lookup = {word: idx for idx, word in enumerate(words)}
+        return intern(words, lookup, strings)
+
+    def add_dots(self, threshold_delta: float) -> "SubtitleColumns":
+        """
+        "..." after every word held longer than threshold_delta seconds.
+        """
+        words = list(self.words)
+        word_ids = np.array(self.word_ids, dtype=np.int32)
+        long_words = (self.end - self.start) > threshold_delta
+        if long_words.any():
+            unique_ids, inverse = np.unique(word_ids[long_words], return_inverse=True)
+            dotted_ids = self._with_words(
+                words, [f"{words[word_id]}..." for word_id in unique_ids.tolist()]
+            )
+            word_ids[long_words] = dotted_ids[inverse]
+        return SubtitleColumns(
+            start=np.array(self.start),
+            end=np.array(self.end),
+            censored=np.array(self.censored),
+            word_ids=word_ids,
+            emoji_offsets=np.array(self.emoji_offsets),
+            emoji_ids=np.array(self.emoji_ids),
+            words=words,
+            emojis=list(self.emojis),
+        )
+
+    def get_merge_pairs(self, threshold_delta: float) -> np.ndarray:
+        """
+        Whether each segment absorbs the next one. Matches the greedy left to
+        right pairing: in a run of consecutive close gaps every other segment,
+        starting with the first, takes its neighbour.
+        """
+        n = len(self)
+        pairs = np.zeros(n, dtype=bool)
+        if n < 2:
+            return pairs
+        close = (self.start[1:] - self.end[:-1]) < threshold_delta
+        positions = np.arange(n - 1)
+        run_starts = close & ~np.concatenate([[False], close[:-1]])
+        run_start = np.maximum.accumulate(np.where(run_starts, positions, -1))
+        pairs[:-1] = close & ((positions - run_start) % 2 == 0)
+        return pairs
+
+    def merge(self, threshold_delta: float) -> "SubtitleColumns":
+        """
+        Join neighbouring segments less than threshold_delta seconds apart into
+        one two-word segment, as Transcription.merge_subtitles does.
+        """
+        pairs = self.get_merge_pairs(threshold_delta)
+        absorbed = np.zeros(len(self), dtype=bool)
+        absorbed[1:] = pairs[:-1]
+        rows = np.flatnonzero(~absorbed)
+        is_pair = pairs[rows]
+        partners = np.minimum(rows + 1, max(len(self) - 1, 0))
+
+        words = list(self.words)
+        word_ids = np.array(self.word_ids[rows], dtype=np.int32)
+        if is_pair.any():
+            pair_keys = np.stack(
+                [self.word_ids[rows[is_pair]], self.word_ids[partners[is_pair]]], axis=1
+            )
+            unique_keys, inverse = np.unique(pair_keys, axis=0, return_inverse=True)
+            joined_ids = self._with_words(
+                words, [f"{words[a]} {words[b]}" for a, b in unique_keys.tolist()]
+            )
+            word_ids[is_pair] = joined_ids[inverse.reshape(-1)]
+
+        # A pair's emoji are its two segments' emoji, already adjacent in
+        # emoji_ids, so only the offsets change
+        return SubtitleColumns(
+            start=self.start[rows].copy(),
+            end=np.where(is_pair, self.end[partners], self.end[rows]),
+            # Merged segments start uncensored, like a fresh SubtitleSegment
+            censored=np.where(is_pair, False, self.censored[rows]),
+            word_ids=word_ids,
+            emoji_offsets=np.concatenate(
+                [self.emoji_offsets[rows], self.emoji_offsets[-1:]]
+            ),
+            emoji_ids=np.array(self.emoji_ids),
+            words=words,
+            emojis=list(self.emojis),
+        )
+
+    def format_table(self) -> List[str]:
+        """
+        "word | start to end | emoji" lines with aligned columns.
+        """
+        if not len(self):
+            return []
+        segment_words = self.get_segment_words()
+        segment_emojis = [
+            " ".join(self.get_segment_emojis(idx)) for idx in range(len(self))
+        ]
+        word_width = int(
+            np.array([len(word) for word in self.words])[self.word_ids].max()
+        )
+        emoji_width = max(len(emoji) for emoji in segment_emojis)
+        return [
+            f"{word:<{word_width}} | {start:07.6f} to {end:07.6f} | "
+            f"{emoji:<{emoji_width}}"
+            for word, start, end, emoji in zip(
+                segment_words, self.start.tolist(), self.end.tolist(), segment_emojis
+            )
+        ]
+
+    def save(self, file_path: str) -> None:
+        """
+        Magic, header length, JSON header (tables and array layout), then the
+        arrays, each aligned to COLUMNS_ALIGNMENT bytes.
+        """
+        arrays = {
+            name: np.ascontiguousarray(getattr(self, name), dtype=dtype)
+            for name, dtype in COLUMN_DTYPES.items()
+        }
+        layout, offset = {}, 0
+        for name, array in arrays.items():
+            layout[name] = {"shape": list(array.shape), "offset": offset}
+            offset += -(-array.nbytes // COLUMNS_ALIGNMENT) * COLUMNS_ALIGNMENT
+        header = json.dumps(
+            {"words": self.words, "emojis": self.emojis, "arrays": layout},
+            ensure_ascii=False,
+        ).encode("utf-8")
+        data_start = len(COLUMNS_MAGIC) + 8 + len(header)
+        data_start = -(-data_start // COLUMNS_ALIGNMENT) * COLUMNS_ALIGNMENT
+
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(COLUMNS_MAGIC)
+            file.write(struct.pack("<Q", len(header)))
+            file.write(header)
+            for name, array in arrays.items():
+                file.seek(data_start + layout[name]["offset"])
+                file.write(array.tobytes())
+            file.truncate(data_start + offset)
+        os.replace(tmp_path, file_path)
+
+    @classmethod
+    def load(cls, file_path: str, mmap: bool = True) -> "SubtitleColumns":
+        """
+        Read a file written by save(). With mmap the arrays are read-only views
+        of the file, paged in on access.
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found at {file_path}")
+        with open(file_path, "rb") as file:
+            magic = file.read(len(COLUMNS_MAGIC))
+            if magic != COLUMNS_MAGIC:
+                raise ValueError(f"{file_path} is not a subtitle columns file")
+            (header_length,) = struct.unpack("<Q", file.read(8))
+            header = json.loads(file.read(header_length).decode("utf-8"))
+        data_start = len(COLUMNS_MAGIC) + 8 + header_length
+        data_start = -(-data_start // COLUMNS_ALIGNMENT) * COLUMNS_ALIGNMENT
+
+        arrays = {}
+        for name, dtype in COLUMN_DTYPES.items():
+            shape = tuple(header["arrays"][name]["shape"])
+            offset = data_start + header["arrays"][name]["offset"]
+            count = int(np.prod(shape))
+            if not count:
+                arrays[name] = np.zeros(shape, dtype=dtype)
+            elif mmap:
+                arrays[name] = np.memmap(
+                    file_path, dtype=dtype, mode="r", offset=offset, shape=shape
+                )
+            else:
+                arrays[name] = np.fromfile(
+                    file_path, dtype=dtype, count=count, offset=offset
+                )
+        return cls(**arrays, words=header["words"], emojis=header["emojis"])
@@ -0,0 +1,101 @@
+from typing import List, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from transcription.columnar import SubtitleColumns, intern
+
+# Sized for the 60px JetBrains Mono caption style on a vertical short
+MAX_CAPTION_CHARS = 16
+MAX_CAPTION_WORDS = 3
+MIN_CAPTION_DURATION = 0.4  # seconds on screen
+CAPTION_GAP_THRESHOLD = 0.35  # seconds of silence that end a caption
+SENTENCE_ENDINGS = (".", "!", "?")
+
+
+class CaptionLimits(BaseModel):
+    max_chars: int = MAX_CAPTION_CHARS
+    max_words: int = MAX_CAPTION_WORDS
+    min_duration: float = MIN_CAPTION_DURATION
+    gap_threshold: float = CAPTION_GAP_THRESHOLD
+    break_after_sentence: bool = True
+
+
+def get_caption_spans(
+    columns: SubtitleColumns, limits: CaptionLimits
+) -> List[Tuple[int, int]]:
+    """
+    (first, last) segment of every caption. Greedy in one pass: a segment
+    joins the open caption unless that would break the character or word
+    limit, it follows a pause longer than gap_threshold, or the caption ends
+    a sentence. A segment over the limits on its own still gets a caption.
+    """
+    segment_words = columns.get_segment_words()
+    starts = columns.start.tolist()
+    ends = columns.end.tolist()
+    spans = []
+    first, chars, words = 0, 0, 0
+    for idx, word in enumerate(segment_words):
+        n_words = len(word.split()) or 1
+        if idx > first:
+            closes = (
+                chars + 1 + len(word) > limits.max_chars
+                or words + n_words > limits.max_words
+                or starts[idx] - ends[idx - 1] > limits.gap_threshold
+                or (
+                    limits.break_after_sentence
+                    and segment_words[idx - 1].endswith(SENTENCE_ENDINGS)
+                )
+            )
+            if not closes:
+                chars += 1 + len(word)
+                words += n_words
+                continue
+            spans.append((first, idx - 1))
+        first, chars, words = idx, len(word), n_words
+    if segment_words:
+        spans.append((first, len(segment_words) - 1))
+    return spans
+
+
+def group_captions(
+    columns: SubtitleColumns, limits: CaptionLimits = CaptionLimits()
+) -> SubtitleColumns:
+    """
+    Caption segments built from runs of neighbouring subtitle segments within
+    `limits`. A caption shows its words joined by spaces and all their emoji,
+    is censored if any of its words is, and stays up for at least
+    min_duration unless the next caption starts sooner.
+    """
+    spans = np.array(get_caption_spans(columns, limits), dtype=np.int64).reshape(-1, 2)
+    firsts, lasts = spans[:, 0], spans[:, 1]
+
+    start = columns.start[firsts].copy()
+    end = columns.end[lasts].copy()
+    next_start = np.append(start[1:], np.inf)
+    end = np.maximum(end, np.minimum(start + limits.min_duration, next_start))
+
+    censored = (
+        np.logical_or.reduceat(columns.censored, firsts)
+        if len(firsts)
+        else np.zeros(0, dtype=bool)
+    )
+
+    words = list(columns.words)
+    segment_words = columns.get_segment_words()
+    captions = [" ".join(segment_words[a:][: b - a + 1]) for a, b in spans.tolist()]
+    word_ids = intern(words, {word: idx for idx, word in enumerate(words)}, captions)
+
+    # Emoji of a run of segments are contiguous, only the offsets change
+    return SubtitleColumns(
+        start=start,
+        end=end,
+        censored=censored,
+        word_ids=word_ids,
+        emoji_offsets=np.append(
+            columns.emoji_offsets[firsts], columns.emoji_offsets[-1]
+        ),
+        emoji_ids=np.array(columns.emoji_ids),
+        words=words,
+        emojis=list(columns.emojis),
+    )
@@ -3,11 +3,36 @@ from datetime import datetime
 import uuid
 from pydantic import BaseModel
 from typing import List
-from llm.main import Client
+from llm.main import (
+    Client,
+    LLM_MODEL,
+    TEMPERATURE,
+    SEED,
+    EMOJI_BATCH_SIZE,
+    get_prompt_hash,
+)
+from llm.lexicon import get_lexicon_hash
 from transcription.models import Subtitles, SubtitleSegment
-from utils.utils import Path, Loader
+from transcription.cache import TranscriptionCache, get_key, hash_file
+from transcription.columnar import SubtitleColumns
+from transcription.grouping import CaptionLimits, group_captions
+from transcription.chunking import (
+    transcribe_chunked,
+    CHUNK_DURATION,
+    MAX_CHUNK_DURATION,
+    CHUNK_OVERLAP,
+    CHUNKED_MIN_DURATION,
+    TRANSCRIPTION_WORKERS,
+)
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+from utils.utils import Path, Loader, TRANSCRIPTION_SIZE_LIMIT
 import os
 
+TRANSCRIPTION_MODEL = "whisper-1"
+TIMESTAMP_GRANULARITIES = ["word"]
+DOTS_THRESHOLD_DELTA = 2.0
+MERGE_THRESHOLD_DELTA = 0.1
+
 
 class Utils:
     @staticmethod
@@ -23,115 +48,153 @@ class Utils:
 
 
 class Transcription:
-    def __init__(self):
+    def __init__(self, workers: int = TRANSCRIPTION_WORKERS):
+        self.workers = workers
         self.client = OpenAI()
         self.llm = Client()
         self.loader = Loader()
         self.path = Path()
+        self.cache = TranscriptionCache()
 
     def transcribe_audio(self, full_audio_file_path: str):
         print(f"TRANSCRIPTION >> Transcribing audio from {full_audio_file_path}")
         audio_file = open(full_audio_file_path, "rb")
         transcript = self.client.audio.transcriptions.create(
             file=audio_file,
-            model="whisper-1",
+            model=TRANSCRIPTION_MODEL,
             response_format="verbose_json",
-            timestamp_granularities=["word"],
+            timestamp_granularities=TIMESTAMP_GRANULARITIES,
         )
         return transcript
 
+    def transcribe_words(self, full_audio_file_path: str) -> list:
+        """
+        Word timestamps of the audio. Long audio, or audio over the upload
+        limit, is split on silences and the chunks transcribed concurrently.
+        """
+        duration = ffmpeg_parse_infos(full_audio_file_path)["duration"]
+        size = os.path.getsize(full_audio_file_path)
+        if duration <= CHUNKED_MIN_DURATION and size <= TRANSCRIPTION_SIZE_LIMIT:
+            return self.transcribe_audio(full_audio_file_path).words
+        return transcribe_chunked(
+            full_audio_file_path,
+            lambda chunk_path: self.transcribe_audio(chunk_path).words,
+            workers=self.workers,
+        )
+
+    def run_stage(self, stage: str, key: str, compute) -> SubtitleColumns:
+        """
+        Output of one pipeline stage from the cache, or computed and stored.
+        """
+        columns = self.cache.get_columns(key)
+        if columns is not None:
+            print(f"TRANSCRIPTION >> {stage}: loaded from cache ({key[:12]})")
+            return columns
+        print(f"TRANSCRIPTION >> {stage}: running")
+        columns = compute()
+        self.cache.put_columns(key, columns)
+        return columns
+
     def get_subtitles(
         self,
         full_audio_file_path: str,
         save_path: str = "subtitles.json",
         add_emoji: bool = True,
+        dots_threshold_delta: float = DOTS_THRESHOLD_DELTA,
+        caption_limits: CaptionLimits = CaptionLimits(),
     ) -> Subtitles:
-        if os.path.exists(save_path):
-            print("TRANSCRIPTION >> Loading subtitles from cache")
-            subtitles = self.loader.load_from_json(Subtitles, save_path)
-            return subtitles
+        """
+        Whisper words -> add_dots -> caption grouping -> emoji, each stage
+        cached under a key of its parent stage's key and its own parameters.
+        Changing a parameter re-runs only that stage and the ones after it;
+        the same audio under another name hits the cache. A copy of the
+        result is written to save_path.
+        """
         print(f"TRANSCRIPTION >> Creating subtitles for {full_audio_file_path}")
-        transcript = self.transcribe_audio(full_audio_file_path)
-        subtitles = Subtitles(subtitles=transcript.words)
-        subtitles = self.add_dots(subtitles)
-        subtitles = self.merge_subtitles(subtitles)
-        self.print_subtitles(subtitles, format_text=True)
+        raw_key = get_key(
+            stage="raw",
+            audio=hash_file(full_audio_file_path),
+            model=TRANSCRIPTION_MODEL,
+            timestamp_granularities=TIMESTAMP_GRANULARITIES,
+            chunking={
+                "min_duration": CHUNKED_MIN_DURATION,
+                "chunk_duration": CHUNK_DURATION,
+                "max_chunk_duration": MAX_CHUNK_DURATION,
+                "overlap": CHUNK_OVERLAP,
+            },
+        )
+        raw = self.run_stage(
+            "raw",
+            raw_key,
+            lambda: SubtitleColumns.from_subtitles(
+                Subtitles(subtitles=self.transcribe_words(full_audio_file_path))
+            ),
+        )
+
+        dotted_key = get_key(
+            stage="dotted", parent=raw_key, threshold_delta=dots_threshold_delta
+        )
+        dotted = self.run_stage(
+            "dotted", dotted_key, lambda: raw.add_dots(dots_threshold_delta)
+        )
+
+        grouped_key = get_key(
+            stage="grouped", parent=dotted_key, limits=caption_limits.model_dump()
+        )
+        columns = self.run_stage(
+            "grouped", grouped_key, lambda: group_captions(dotted, caption_limits)
+        )
+        print(f"TRANSCRIPTION >> {len(dotted)} words in {len(columns)} captions")
+        self.print_columns(columns, format_text=True)
+
         if add_emoji:
-            subtitles = self.llm.get_emojis(subtitles)
+            grouped = columns
+            emoji_key = get_key(
+                stage="emoji",
+                parent=grouped_key,
+                model=LLM_MODEL,
+                temperature=TEMPERATURE,
+                seed=SEED,
+                prompt=get_prompt_hash(),
+                lexicon=get_lexicon_hash(),
+                emoji_pack=self.llm.emoji_index.get_fingerprint(),
+                batch_size=EMOJI_BATCH_SIZE,
+            )
+            columns = self.run_stage(
+                "emoji",
+                emoji_key,
+                lambda: SubtitleColumns.from_subtitles(
+                    self.llm.get_emojis(grouped.to_subtitles())
+                ),
+            )
+
+        subtitles = columns.to_subtitles()
         print(f"TRANSCRIPTION >> Saving subtitles to {save_path}")
         self.loader.save_to_json(subtitles, save_path)
         return subtitles
 
     def print_subtitles(self, subtitles: Subtitles, format_text=False) -> None:
-        text = ""
-
-        if format_text:
-            for subtitle_segment in subtitles.subtitles:
-                text += f"{subtitle_segment.word} "
-
-        # Calculate the maximum word length to align the columns
-        max_word_length = max(
-            len(subtitle_segment.word) for subtitle_segment in subtitles.subtitles
-        )
-        max_emoji_length = max(
-            len(" ".join(subtitle_segment.emoji))
-            for subtitle_segment in subtitles.subtitles
-        )
+        self.print_columns(SubtitleColumns.from_subtitles(subtitles), format_text)
 
-        for subtitle_segment in subtitles.subtitles:
-            word = subtitle_segment.word
-            emoji = " ".join(subtitle_segment.emoji)
-            start = subtitle_segment.start
-            end = subtitle_segment.end
-
-            # print(f"len of emoji: {len(emoji)} max_emoji_length: {max_emoji_length} emoji: {emoji}")
-            if len(emoji) < max_emoji_length:
-                emoji += " " * (max_emoji_length - len(emoji))
-                # print(f"len of emoji: {len(emoji)} max_emoji_length: {max_emoji_length} emoji: *{emoji}*")
-            line = f"{word:<{max_word_length}} | {start:07.6f} to {end:07.6f} | {emoji}"
+    def print_columns(self, columns: SubtitleColumns, format_text=False) -> None:
+        for line in columns.format_table():
             print(line)
-
+        text = ""
+        if format_text:
+            text = "".join(f"{word} " for word in columns.get_segment_words())
         print(text)
 
-    def add_dots(self, subtitles: Subtitles, treshold_delta: float = 2.0) -> Subtitles:
-        new_subtitles = Subtitles(subtitles=[])
-        for subtitle_segment in subtitles.subtitles:
-            delta = subtitle_segment.end - subtitle_segment.start
-            # print(f"delta: {delta}")
-            if delta > treshold_delta:
-                subtitle_segment.word += "..."
-            new_subtitles.subtitles.append(subtitle_segment)
-
-        return subtitles
+    def add_dots(
+        self, subtitles: Subtitles, treshold_delta: float = DOTS_THRESHOLD_DELTA
+    ) -> Subtitles:
+        columns = SubtitleColumns.from_subtitles(subtitles)
+        return columns.add_dots(treshold_delta).to_subtitles()
 
     def merge_subtitles(
-        self, subtitles: Subtitles, threshold_delta: float = 0.1
+        self, subtitles: Subtitles, threshold_delta: float = MERGE_THRESHOLD_DELTA
     ) -> Subtitles:
-        l = len(subtitles.subtitles)
-        new_subtitles = Subtitles(subtitles=[])
-        skip = False
-        for idx, subtitle in enumerate(subtitles.subtitles):
-            if skip:
-                skip = False
-                continue
-
-            if idx + 1 < l:
-                delta = subtitles.subtitles[idx + 1].start - subtitle.end
-                if delta < threshold_delta:
-                    word = f"{subtitle.word} {subtitles.subtitles[idx + 1].word}"
-                    new_subtitle_segment = SubtitleSegment(
-                        word=word,
-                        start=subtitle.start,
-                        end=subtitles.subtitles[idx + 1].end,
-                        emoji=subtitle.emoji + subtitles.subtitles[idx + 1].emoji,
-                    )
-                    new_subtitles.subtitles.append(new_subtitle_segment)
-                    skip = True
-                else:
-                    new_subtitles.subtitles.append(subtitle)
-            if idx + 1 == l and not skip:
-                new_subtitles.subtitles.append(subtitle)
-        return new_subtitles
+        columns = SubtitleColumns.from_subtitles(subtitles)
+        return columns.merge(threshold_delta).to_subtitles()
 
 
 class TTS:
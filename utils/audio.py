@@ -0,0 +1,44 @@
+import subprocess as sp
+from typing import Optional
+
+import numpy as np
+from moviepy.config import get_setting
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+# Rendered soundtracks
+AUDIO_FPS = 44100
+NCHANNELS = 2
+
+# Transcription upload: mono 16 kHz speech, bitrate lowered for long sources
+# so the file stays under the API's 25 MB limit
+SPEECH_SAMPLE_RATE = 16000
+SPEECH_BITRATE = 32  # kbps
+MIN_SPEECH_BITRATE = 8  # kbps
+MP3_BITRATES = (8, 16, 24, 32)  # MPEG-2 layer III rates up to SPEECH_BITRATE
+
+
+def decode_pcm(
+    path: str,
+    start: float = 0.0,
+    duration: Optional[float] = None,
+    fps: int = AUDIO_FPS,
+    nchannels: int = NCHANNELS,
+) -> np.ndarray:
+    """
+    Audio of `path` as a float32 (samples, nchannels) array in [-1, 1],
+    decoded in one ffmpeg run. Files without audio give an empty array.
+    """
+    if not ffmpeg_parse_infos(path).get("audio_found"):
+        return np.zeros((0, nchannels), dtype=np.float32)
+    cmd = [get_setting("FFMPEG_BINARY"), "-loglevel", "error"]
+    if start > 0:
+        cmd += ["-ss", f"{start:.6f}"]
+    cmd += ["-i", path]
+    if duration is not None:
+        cmd += ["-t", f"{duration:.6f}"]
+    cmd += ["-vn", "-f", "f32le", "-ac", str(nchannels), "-ar", str(fps), "-"]
+    process = sp.run(cmd, stdout=sp.PIPE, stderr=sp.PIPE)
+    if process.returncode != 0:
+        error = process.stderr.decode(errors="replace")
+        raise IOError(f"ffmpeg failed decoding audio of {path}:\n{error.strip()}")
+    return np.frombuffer(process.stdout, dtype=np.float32).reshape(-1, nchannels)
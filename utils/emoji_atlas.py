@@ -0,0 +1,126 @@
+import json
+import os
+import struct
+import sys
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from utils.emoji_index import EmojiIndex, Key
+from utils.utils import EMOJI_ATLAS_PATH, IOS_EMOJI_PACK_PATH
+
+ATLAS_MAGIC = b"EMOATL1\n"
+ATLAS_ALIGNMENT = 64  # bytes, start of every image in the blob
+
+
+def align(offset: int) -> int:
+    return -(-offset // ATLAS_ALIGNMENT) * ATLAS_ALIGNMENT
+
+
+def build_atlas(
+    pack_path: str = IOS_EMOJI_PACK_PATH, atlas_path: str = EMOJI_ATLAS_PATH
+) -> int:
+    """
+    Decode every emoji of the pack to RGBA once and pack them into one file:
+    magic, header length, JSON header (pack fingerprint and, per emoji, its
+    hex name, blob offset and shape), then the images, each aligned to
+    ATLAS_ALIGNMENT bytes. Returns the number of emoji written.
+    """
+    index = EmojiIndex(pack_path)
+    if not len(index):
+        raise FileNotFoundError(f"No emoji found in {pack_path}")
+    entries, offset = [], 0
+    for key in sorted(index.paths):
+        # Only the PNG header is read here, decoding happens while writing
+        with Image.open(index.paths[key]) as image:
+            width, height = image.size
+        entries.append(["-".join(f"{cp:x}" for cp in key), offset, height, width])
+        offset += align(height * width * 4)
+    header = json.dumps({"pack": index.get_fingerprint(), "entries": entries}).encode(
+        "utf-8"
+    )
+    data_start = align(len(ATLAS_MAGIC) + 8 + len(header))
+
+    tmp_path = f"{atlas_path}.tmp"
+    os.makedirs(os.path.dirname(atlas_path) or ".", exist_ok=True)
+    with open(tmp_path, "wb") as file:
+        file.write(ATLAS_MAGIC)
+        file.write(struct.pack("<Q", len(header)))
+        file.write(header)
+        for key, (_, entry_offset, height, width) in zip(sorted(index.paths), entries):
+            with Image.open(index.paths[key]) as image:
+                rgba = np.asarray(image.convert("RGBA"))
+            if rgba.shape != (height, width, 4):
+                raise ValueError(f"{index.paths[key]} changed while building the atlas")
+            file.seek(data_start + entry_offset)
+            file.write(rgba.tobytes())
+        file.truncate(data_start + offset)
+    os.replace(tmp_path, atlas_path)
+    return len(entries)
+
+
+class EmojiAtlas:
+    """
+    The emoji pack pre-decoded into one read-only memory-mapped file built by
+    build_atlas(). Frames are zero-copy (height, width, 4) uint8 views of the
+    mapping, so render processes share the decoded pixels through the page
+    cache instead of each decoding its own PNGs. Emoji resolve as in
+    EmojiIndex.
+    """
+
+    def __init__(
+        self, atlas_path: str = EMOJI_ATLAS_PATH, pack_path: str = IOS_EMOJI_PACK_PATH
+    ):
+        if not os.path.exists(atlas_path):
+            raise FileNotFoundError(f"Emoji atlas not found at {atlas_path}")
+        with open(atlas_path, "rb") as file:
+            magic = file.read(len(ATLAS_MAGIC))
+            if magic != ATLAS_MAGIC:
+                raise ValueError(f"{atlas_path} is not an emoji atlas")
+            (header_length,) = struct.unpack("<Q", file.read(8))
+            header = json.loads(file.read(header_length).decode("utf-8"))
+        self.atlas_path = atlas_path
+        self.fingerprint = header["pack"]
+        self.entries: Dict[Key, Tuple[int, Tuple[int, int, int]]] = {}
+        for name, offset, height, width in header["entries"]:
+            key = tuple(int(part, 16) for part in name.split("-"))
+            self.entries[key] = (offset, (height, width, 4))
+        self.index = EmojiIndex(pack_path, keys=self.entries)
+        data_start = align(len(ATLAS_MAGIC) + 8 + header_length)
+        if os.path.getsize(atlas_path) > data_start:
+            self.data = np.memmap(
+                atlas_path, dtype=np.uint8, mode="r", offset=data_start
+            )
+        else:
+            self.data = np.zeros(0, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get_fingerprint(self) -> str:
+        return self.fingerprint
+
+    def get_frame(self, emoji: str) -> Optional[np.ndarray]:
+        """
+        RGBA view of the pack emoji drawn for `emoji`, None if there is none.
+        """
+        key = self.index.resolve_key(emoji)
+        if key is None:
+            return None
+        offset, shape = self.entries[key]
+        end = offset + shape[0] * shape[1] * 4
+        return self.data[offset:end].reshape(shape)
+
+
+if __name__ == "__main__":
+    pack_path = sys.argv[1] if len(sys.argv) > 1 else IOS_EMOJI_PACK_PATH
+    atlas_path = sys.argv[2] if len(sys.argv) > 2 else EMOJI_ATLAS_PATH
+    started = time.time()
+    count = build_atlas(pack_path, atlas_path)
+    size = os.path.getsize(atlas_path) / 2**20
+    print(
+        f"EDITOR >> Packed {count} emoji from {pack_path} into {atlas_path} "
+        f"({size:.1f} MB) in {time.time() - started:.1f}s"
+    )
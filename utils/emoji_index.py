@@ -0,0 +1,144 @@
+import hashlib
+import os
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.utils import IOS_EMOJI_PACK_PATH
+
+# Shown when a subtitle has no emoji, as before
+DEFAULT_EMOJI = "🤔"
+VARIATION_SELECTORS = (0xFE0E, 0xFE0F)
+SKIN_TONES = range(0x1F3FB, 0x1F400)
+ZWJ = 0x200D
+# Flags are pairs of these; a lone letter is no stand-in for one
+REGIONAL_INDICATORS = range(0x1F1E6, 0x1F200)
+# Below this it is text (letters, digits, punctuation), not an emoji to match
+MIN_EMOJI_CODEPOINT = 0x2000
+PACK_FILE = re.compile(r"^([0-9a-f]+(?:-[0-9a-f]+)*)\.png$")
+# Name words too common to tell emoji apart when looking for a neighbour
+NAME_STOPWORDS = {
+    "WITH",
+    "AND",
+    "OF",
+    "FACE",
+    "SIGN",
+    "SYMBOL",
+    "BLACK",
+    "WHITE",
+    "SMALL",
+    "LARGE",
+    "LATIN",
+    "LETTER",
+    "CAPITAL",
+    "CIRCLED",
+}
+
+Key = Tuple[int, ...]
+
+
+def get_file_name(key: Key) -> str:
+    return "-".join(f"{cp:x}" for cp in key) + ".png"
+
+
+def get_name_words(codepoints: Key) -> set:
+    words = set()
+    for codepoint in codepoints:
+        words.update(unicodedata.name(chr(codepoint), "").split())
+    return words - NAME_STOPWORDS
+
+
+class EmojiIndex:
+    """
+    The emoji the pack can draw, read once from its directory: full
+    codepoint sequences (pack files are lowercase hex joined by "-") to PNG
+    paths. Lookups never touch the filesystem.
+
+    resolve() maps any emoji string to one the pack has: the sequence as is,
+    without variation selectors, without skin tones, its first ZWJ part, its
+    first code point, and finally the pack emoji whose Unicode name shares
+    the most words with it. Those nearest matches are memoized.
+
+    With `keys` the directory is not scanned: the index covers exactly those
+    sequences (as the emoji atlas does), with paths where the pack keeps them.
+    """
+
+    def __init__(
+        self, pack_path: str = IOS_EMOJI_PACK_PATH, keys: Optional[Iterable[Key]] = None
+    ):
+        self.pack_path = pack_path
+        self.paths: Dict[Key, str] = {}
+        self.fallbacks: Dict[Key, Optional[Key]] = {}
+        self.name_words: Dict[Key, set] = {}
+        if keys is not None:
+            self.paths = {
+                key: os.path.join(pack_path, get_file_name(key)) for key in keys
+            }
+        elif not os.path.isdir(pack_path):
+            print(
+                f"EDITOR >> Emoji pack not found at {pack_path}, no emoji will be drawn"
+            )
+            return
+        else:
+            for entry in os.scandir(pack_path):
+                match = PACK_FILE.match(entry.name)
+                if match is not None:
+                    key = tuple(int(part, 16) for part in match.group(1).split("-"))
+                    self.paths[key] = entry.path
+        self.name_words = {key: get_name_words(key) for key in self.paths}
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __contains__(self, emoji: str) -> bool:
+        return tuple(ord(char) for char in emoji) in self.paths
+
+    def get_fingerprint(self) -> str:
+        names = sorted("-".join(f"{cp:x}" for cp in key) for key in self.paths)
+        return hashlib.sha256("\n".join(names).encode("utf-8")).hexdigest()
+
+    def get_available(self) -> List[str]:
+        return sorted("".join(chr(cp) for cp in key) for key in self.paths)
+
+    def _nearest(self, key: Key) -> Optional[Key]:
+        if key not in self.fallbacks:
+            words = get_name_words(key)
+            best, best_score = None, 0.0
+            for candidate, candidate_words in self.name_words.items():
+                common = len(words & candidate_words)
+                if not common:
+                    continue
+                score = common / len(words | candidate_words)
+                if score > best_score:
+                    best, best_score = candidate, score
+            self.fallbacks[key] = best
+        return self.fallbacks[key]
+
+    def resolve_key(self, emoji: str) -> Optional[Key]:
+        key = tuple(ord(char) for char in emoji)
+        if not key:
+            return None
+        plain = tuple(cp for cp in key if cp not in VARIATION_SELECTORS)
+        toneless = tuple(cp for cp in plain if cp not in SKIN_TONES)
+        first_part = toneless[: toneless.index(ZWJ)] if ZWJ in toneless else toneless
+        for candidate in (key, plain, toneless, first_part):
+            if candidate in self.paths:
+                return candidate
+        if not first_part or first_part[0] < MIN_EMOJI_CODEPOINT:
+            return None
+        if first_part[0] in REGIONAL_INDICATORS:
+            return None
+        if first_part[:1] in self.paths:
+            return first_part[:1]
+        return self._nearest(first_part)
+
+    def resolve(self, emoji: str) -> Optional[str]:
+        """
+        The pack emoji drawn for `emoji`, None if there is no sensible one.
+        """
+        key = self.resolve_key(emoji)
+        return None if key is None else "".join(chr(cp) for cp in key)
+
+    def get_path(self, emoji: str) -> Optional[str]:
+        key = self.resolve_key(emoji)
+        return None if key is None else self.paths[key]
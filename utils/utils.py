@@ -11,6 +11,10 @@ STORAGE_PATH = "assets/storage/"
 CACHE_PATH = "assets/cache/"
 FULL_EMOJI_FONT_PATH = "/Users/paulius/Library/Fonts/NotoColorEmoji-Regular.ttf"
 IOS_EMOJI_PATH = "assets/ios_emoji"
+IOS_EMOJI_PACK_PATH = "assets/ios_emoji_pack"
+EMOJI_ATLAS_PATH = "assets/ios_emoji_atlas.bin"
+# Largest file the transcription API accepts
+TRANSCRIPTION_SIZE_LIMIT = 25 * 1024 * 1024  # bytes
 
 
 class Path: